@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Throughput of the quiz API (manifest_quiz.api) over keep-alive connections.
+
+By default the server runs in this process on a background thread, over the
+same bank the app loads. Pass --url to benchmark a separately started
+server (`python -m manifest_quiz.api`) instead, which keeps the client's
+CPU out of the server's process.
+
+Each client connection plays quizzes in a loop: GET /quiz, then POST
+/score with random answers, with a GET /fields every --fields-every quizzes.
+Reports requests per second and p50/p99 latency per endpoint.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.api import QuizService, start_in_thread
+from manifest_quiz.question_bank import FIELD_MAPPING, QuestionBank
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+
+async def request(reader, writer, method: str, target: str, host: str, body: bytes = b"") -> bytes:
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+        f"Content-Type: application/json\r\n\r\n".encode('utf-8') + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    payload = await reader.readexactly(length)
+    if status != 200:
+        raise RuntimeError(f"{method} {target}: HTTP {status} {payload[:200]!r}")
+    return payload
+
+
+async def client(host: str, port: int, quizzes: int, questions: int, fields_every: int,
+                 rng: random.Random, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    fields = list(FIELD_MAPPING)
+
+    async def timed(endpoint: str, *args) -> bytes:
+        start = time.perf_counter()
+        payload = await request(reader, writer, *args)
+        latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+        return payload
+
+    try:
+        for i in range(quizzes):
+            if fields_every and i % fields_every == 0:
+                await timed("/fields", "GET", "/fields", host)
+            target = f"/quiz?n={questions}"
+            if rng.random() < 0.5:
+                target += f"&field={quote(rng.choice(fields))}"
+            quiz = json.loads(await timed("/quiz", "GET", target, host))
+            submission = {
+                "version": quiz["version"],
+                "answers": [{"id": q["id"], "answer": rng.randrange(4)} for q in quiz["questions"]],
+            }
+            await timed("/score", "POST", "/score", host, json.dumps(submission).encode('utf-8'))
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, args) -> dict:
+    latencies = {}
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, args.quizzes, args.questions, args.fields_every, random.Random(rng.random()), latencies)
+        for _ in range(args.connections)
+    ))
+    wall = time.perf_counter() - start
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "wall_seconds": wall,
+        "requests": total,
+        "requests_per_second": total / wall,
+        "quizzes_per_second": args.connections * args.quizzes / wall,
+        "endpoints": {
+            endpoint: {"count": len(v), "p50_ms": percentile(v, 0.5) * 1000, "p99_ms": percentile(v, 0.99) * 1000}
+            for endpoint, v in latencies.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the quiz API')
+    parser.add_argument('--url', help='Benchmark a running server (e.g. http://127.0.0.1:8000) instead of in-process')
+    parser.add_argument('--csv', default='quiz_all_combined.csv', help='Combined quiz CSV (in-process server)')
+    parser.add_argument('--compiled', default='quiz_all_combined.qbank', help='Compiled bank, if it exists')
+    parser.add_argument('--connections', type=int, default=32, help='Concurrent client connections')
+    parser.add_argument('--quizzes', type=int, default=50, help='Quizzes played per connection')
+    parser.add_argument('--questions', type=int, default=10, help='Questions per quiz')
+    parser.add_argument('--fields-every', type=int, default=5, help='GET /fields once every N quizzes (0: never)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+        questions = None
+    else:
+        bank = QuestionBank.load(args.csv, args.compiled)
+        host, port = start_in_thread(QuizService(bank))
+        questions = len(bank)
+
+    results = asyncio.run(run(host, port, args))
+    results["bank_questions"] = questions
+    results["config"] = vars(args)
+
+    print(f"{results['requests']} requests in {results['wall_seconds']:.2f}s: "
+          f"{results['requests_per_second']:.0f} req/s, {results['quizzes_per_second']:.0f} quizzes/s")
+    for endpoint, summary in results["endpoints"].items():
+        print(f"  {endpoint:<8} p50 {summary['p50_ms']:6.2f}ms  p99 {summary['p99_ms']:6.2f}ms  (n={summary['count']})")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
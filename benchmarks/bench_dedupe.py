@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Scaling of the near-duplicate detection used by combine_quizzes.py.
+
+Builds synthetic banks of growing size from the recorded quiz rows. Every
+distinct question is spliced from random passages of the recorded texts,
+so distinct questions share vocabulary the way real ones do without being
+near duplicates of each other. Each question then appears --cluster-size
+times as paraphrase-like variants (a fraction --mutation of its characters
+replaced), like the same fact generated by a few runs over one file.
+
+Reports the time at each size and the scaling exponent between consecutive
+sizes (log of the time ratio over log of the size ratio): about 1 is
+linear, 2 would be quadratic.
+"""
+
+import argparse
+import csv
+import glob
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.dedupe import DEFAULT_THRESHOLD, find_near_duplicates, question_text
+
+
+def load_texts(pattern: str):
+    texts = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as f:
+            texts += [question_text(row) for row in list(csv.reader(f))[1:] if len(row) >= 8]
+    return texts
+
+
+def splice(texts, length: int, piece: int, rng: random.Random) -> str:
+    """A new question text made of random `piece`-character passages of the recorded texts."""
+    parts = []
+    while sum(map(len, parts)) < length:
+        text = rng.choice(texts)
+        start = rng.randrange(max(1, len(text) - piece))
+        parts.append(text[start:start + piece])
+    return "".join(parts)[:length]
+
+
+def mutate(text: str, rate: float, alphabet: str, rng: random.Random) -> str:
+    """Replace a fraction `rate` of the characters with characters of the corpus, as a rewording would."""
+    chars = list(text)
+    for _ in range(int(len(chars) * rate)):
+        chars[rng.randrange(len(chars))] = rng.choice(alphabet)
+    return "".join(chars)
+
+
+def synthetic_bank(base, num_rows: int, cluster_size: int, mutation: float, rng: random.Random):
+    lengths = sorted(len(text) for text in base)
+    alphabet = "".join(base)
+    texts = []
+    while len(texts) < num_rows:
+        original = splice(base, rng.choice(lengths), 12, rng)
+        texts += [original] + [mutate(original, mutation, alphabet, rng) for _ in range(cluster_size - 1)]
+    return texts[:num_rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MinHash/LSH near-duplicate detection')
+    parser.add_argument('--csv', default='data/quiz_*.csv', help='Recorded quiz CSVs to draw the text from')
+    parser.add_argument('--sizes', default='1000,2000,4000,8000,16000', help='Comma-separated bank sizes (rows)')
+    parser.add_argument('--cluster-size', type=int, default=3, help='Variants of each distinct question')
+    parser.add_argument('--mutation', type=float, default=0.1, help='Fraction of characters replaced per variant')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Similarity threshold')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    base = load_texts(args.csv)
+    rng = random.Random(args.seed)
+    previous = None
+    for num_rows in (int(s) for s in args.sizes.split(',')):
+        texts = synthetic_bank(base, num_rows, args.cluster_size, args.mutation, rng)
+        start = time.perf_counter()
+        clusters = find_near_duplicates(texts, args.threshold)
+        wall = time.perf_counter() - start
+        merged = sum(len(c.duplicates) for c in clusters)
+        expected = len(texts) - -(-len(texts) // args.cluster_size)
+        line = (f"{len(texts):6d} rows: {wall:6.2f}s ({wall / len(texts) * 1000:.2f} ms/row), "
+                f"{len(clusters)} clusters, {merged}/{expected} variants merged")
+        if previous is not None:
+            exponent = math.log(wall / previous[1]) / math.log(len(texts) / previous[0])
+            line += f", scaling exponent {exponent:.2f}"
+        print(line)
+        previous = (len(texts), wall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the quiz generation pipeline against the mock LLM server.
+
+Starts `mock_llm_server.MockLLM` on a local port, points a `QuizGenerator`
+at it through a `ChatBackend`, runs `generate_quizzes_for_all_md_files`
+over data/ into a temporary directory and reports wall time, API calls,
+retries and valid rows per second. No API key or network access is needed,
+so generation changes (concurrency, streaming, chunking, retry policy) can
+be compared run against run.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from manifest_quiz.llm_backend import ChatBackend
+from manifest_quiz.grounding import GroundingIndex
+from manifest_quiz.quiz_generator import PROMPT_TEMPLATE_VERSION, QuizGenerator
+from mock_llm_server import add_mock_arguments, mock_from_args, start_server
+
+
+def count_rows(output_dir: Path) -> int:
+    rows = 0
+    for path in output_dir.glob("quiz_*.csv"):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows += sum(1 for _ in csv.reader(f)) - 1  # header
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark quiz generation against a local mock LLM')
+    parser.add_argument('--data-dir', default='data', help='Directory containing MD files (default: data)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Files generated in parallel (default: 4)')
+    parser.add_argument('--section-tokens', type=int, default=3000, help='Section size for chunking')
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv', help='Generation output format')
+    parser.add_argument('--stream', action='store_true', help='Use streaming responses')
+    parser.add_argument('--pack-tokens', type=int, default=0,
+                        help='Pack small files into shared requests of up to this many content tokens')
+    parser.add_argument('--prompt-version', type=int, choices=[1, 2], default=PROMPT_TEMPLATE_VERSION,
+                        help='Prompt template version')
+    parser.add_argument('--no-grounding', action='store_true', help='Skip the grounding check')
+    parser.add_argument('--rpm', type=int, help='Requests-per-minute limit')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries per call')
+    parser.add_argument('--backoff-base', type=float, default=0.05,
+                        help='Retry backoff base in seconds (default: 0.05, scaled down for the mock)')
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    if args.stream and args.format == 'json':
+        parser.error('--stream cannot be combined with --format json')
+
+    mock = mock_from_args(args)
+    server = start_server(mock)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    generator = QuizGenerator("mock", requests_per_minute=args.rpm, max_retries=args.max_retries,
+                              section_tokens=args.section_tokens, stream=args.stream,
+                              output_format=args.format, backend=ChatBackend(url),
+                              backoff_base=args.backoff_base, pack_tokens=args.pack_tokens,
+                              prompt_version=args.prompt_version,
+                              grounding=None if args.no_grounding else GroundingIndex.load_or_build(args.data_dir))
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        generator.generate_quizzes_for_all_md_files(args.data_dir, output_dir, concurrency=args.concurrency,
+                                                    skip_existing=False)
+        wall = time.perf_counter() - start
+        rows = count_rows(Path(output_dir))
+    server.shutdown()
+
+    stats = generator.http.stats.snapshot()
+    telemetry = generator.telemetry.totals()
+    results = {
+        "config": vars(args),
+        "wall_seconds": wall,
+        "calls": stats["calls"],
+        "retries": stats["retries"],
+        "api_stats": stats,
+        "valid_rows": rows,
+        "rejected_rows": generator.rejected_rows,
+        "repaired_rows": generator.repaired_rows,
+        "low_support_rows": generator.low_support_rows,
+        "rows_per_second": rows / wall if wall else 0.0,
+        "mock": mock.counts,
+        "telemetry": {key: value for key, value in telemetry.items() if key != "files"},
+    }
+
+    print("\n" + "=" * 50)
+    print(f"Wall time:       {wall:.2f}s")
+    print(f"API calls:       {stats['calls']} (retries: {stats['retries']}, failed: {stats['failed']})")
+    print(f"Valid rows:      {rows} ({results['rows_per_second']:.1f} rows/s)")
+    print(f"Rejected rows:   {generator.rejected_rows} (repaired: {generator.repaired_rows})")
+    print(f"Low support:     {generator.low_support_rows}")
+    print(f"Tokens:          prompt {telemetry['prompt_tokens']} (cached {telemetry['cached_prompt_tokens']}), "
+          f"completion {telemetry['completion_tokens']}")
+    print(f"Mock server:     {mock.counts}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-rerun cost of the question bank: st.cache_data copies vs. the shared bank.
+
+`st.cache_data` stores the pickled return value and unpickles a fresh copy on
+every cache hit, i.e. on every Streamlit rerun. The shared `QuestionBank` held
+in `st.cache_resource` is returned by reference. This script reproduces both
+paths without a Streamlit server, at several bank sizes, and reports the time
+and allocations of one rerun.
+"""
+
+import argparse
+import csv
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.question_bank import QuestionBank
+
+
+def load_rows(csv_path: str, scale: int):
+    """Combined CSV rows replicated `scale` times with distinct question text."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        rows = [row for row in reader if len(row) >= 8 and row[6] in ("1", "2", "3", "4")]
+    return [[row[0], f"{row[1]} #{i}", *row[2:]] for i in range(scale) for row in rows]
+
+
+def legacy_quiz_data(rows):
+    """The dict-of-dicts shape the app used to build in load_quiz_data."""
+    quiz_data = {}
+    for row in rows:
+        quiz_data.setdefault(row[0], []).append({
+            "question": row[1],
+            "options": [row[2], row[3], row[4], row[5]],
+            "correct": int(row[6]) - 1,
+            "explanation": row[7],
+        })
+    return quiz_data
+
+
+def legacy_rerun(pickled: bytes):
+    """One rerun on the old path: cache_data hit + the start-screen walk over every question."""
+    quiz_data = pickle.loads(pickled)
+    all_questions = []
+    for category, questions in quiz_data.items():
+        for q in questions:
+            q['category'] = category
+            all_questions.append(q)
+    return random.sample(all_questions, 10)
+
+
+def shared_rerun(bank: QuestionBank):
+    """One rerun on the new path: the cached bank by reference + indexed O(k) sampling."""
+    return bank.sample(10)
+
+
+def measure(fn, arg, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-rerun question bank cost')
+    parser.add_argument('--csv', default='quiz_all_combined.csv', help='Combined quiz CSV')
+    parser.add_argument('--scales', default='1,10,100', help='Comma-separated bank size multipliers')
+    parser.add_argument('--repeat', type=int, default=20, help='Reruns per measurement')
+    args = parser.parse_args()
+
+    print(f"{'questions':>10} {'cache_data ms':>14} {'cache_data KiB':>15} {'shared ms':>10} {'shared KiB':>11}")
+    for scale in (int(s) for s in args.scales.split(',')):
+        rows = load_rows(args.csv, scale)
+        pickled = pickle.dumps(legacy_quiz_data(rows))
+        bank = QuestionBank.from_rows(rows)
+        legacy_time, legacy_peak = measure(legacy_rerun, pickled, args.repeat)
+        shared_time, shared_peak = measure(shared_rerun, bank, args.repeat)
+        print(f"{len(bank):>10} {legacy_time * 1000:>14.3f} {legacy_peak / 1024:>15.1f} "
+              f"{shared_time * 1000:>10.3f} {shared_peak / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Query latency of the in-app question search (manifest_quiz.search).
+
+Grows the bank by repeating the combined CSV (--copies), builds the search
+index once and runs every query of a fixed list --repeat times. Reports the
+index build time and p50/p99 query latency, so the effect of bank size on
+query time can be read off runs with different --copies.
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.question_bank import QuestionBank
+
+QUERIES = ["AI家庭教師", "医療", "デジタル民主主義", "ブロードリスニング", "子育て支援", "オンライン診療",
+           "エネルギー", "政策", "チームみらい", "行政のデジタル化"]
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark question search latency')
+    parser.add_argument('--csv', default='quiz_all_combined.csv', help='Combined quiz CSV')
+    parser.add_argument('--copies', type=int, default=1, help='Repeat the CSV rows to grow the bank')
+    parser.add_argument('--repeat', type=int, default=50, help='Runs of each query')
+    parser.add_argument('--limit', type=int, default=50, help='Results per query')
+    args = parser.parse_args()
+
+    with open(args.csv, encoding='utf-8') as f:
+        rows = list(csv.reader(f))[1:]
+    bank = QuestionBank.from_rows(rows * args.copies)
+
+    start = time.perf_counter()
+    bank.search_index()
+    print(f"{len(bank)} questions, index built in {time.perf_counter() - start:.2f}s")
+
+    for query in QUERIES:
+        latencies = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits = bank.search(query, args.limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{query}: {len(hits)} hits, p50 {percentile(latencies, 0.5):.2f}ms, "
+              f"p99 {percentile(latencies, 0.99):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Per-session memory of the quiz state: full question dicts vs. IDs and answer indices.
+
+The app used to keep every drawn question dict (options and explanation
+included) and the chosen option strings in `st.session_state`. It now keeps
+an `array('I')` of question IDs, a `bytearray` of answer indices and the
+running per-category counters. This script builds both shapes for a
+finished quiz of each length and reports their deep size in bytes.
+"""
+
+import argparse
+import random
+import sys
+from array import array
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.question_bank import QuestionBank
+
+
+def deep_size(obj, seen=None) -> int:
+    """sys.getsizeof over the whole object graph, counting shared objects once."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def legacy_state(questions, answers):
+    """The old session shape: copied question dicts plus the chosen option strings."""
+    return {
+        "quiz_questions": [
+            {
+                "category": q.category,
+                "question": q.question,
+                "options": list(q.options),
+                "correct": q.correct,
+                "explanation": q.explanation,
+            }
+            for q in questions
+        ],
+        "user_answers": [q.options[a] for q, a in zip(questions, answers)],
+        "score": sum(a == q.correct for q, a in zip(questions, answers)),
+    }
+
+
+def compact_state(questions, answers):
+    """The current session shape: IDs, answer indices and running counters."""
+    category_correct, category_total = {}, {}
+    for q, a in zip(questions, answers):
+        category_total[q.category] = category_total.get(q.category, 0) + 1
+        category_correct[q.category] = category_correct.get(q.category, 0) + (a == q.correct)
+    return {
+        "quiz_ids": array('I', (q.id for q in questions)),
+        "answers": bytearray(answers),
+        "category_correct": category_correct,
+        "category_total": category_total,
+        "score": sum(category_correct.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-session quiz state size')
+    parser.add_argument('--csv', default='quiz_all_combined.csv', help='Combined quiz CSV')
+    parser.add_argument('--lengths', default='10,20,30,50', help='Comma-separated quiz lengths')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for question draws')
+    args = parser.parse_args()
+
+    bank = QuestionBank.from_csv(args.csv)
+    rng = random.Random(args.seed)
+
+    print(f"{'questions':>10} {'legacy bytes':>13} {'compact bytes':>14} {'ratio':>7}")
+    for length in (int(n) for n in args.lengths.split(',')):
+        questions = bank.sample(length, rng=rng)
+        answers = [rng.randrange(4) for _ in questions]
+        # The category strings live in the shared bank in both shapes; count them as shared
+        shared = {id(q.category) for q in questions}
+        legacy = deep_size(legacy_state(questions, answers), set(shared))
+        compact = deep_size(compact_state(questions, answers), set(shared))
+        print(f"{len(questions):>10} {legacy:>13} {compact:>14} {legacy / compact:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Concurrent-session load test for the Streamlit app.
+
+Drives `src/manifest_quiz/app.py` headlessly with Streamlit's app-testing
+harness (`streamlit.testing.v1.AppTest`). Each simulated user is its own
+AppTest session and plays a full quiz in random or field mode: pick the
+mode, start, then answer / next for every question until the results
+screen. All users run at once on a thread pool.
+
+Reported (and written as JSON to --output):
+  - p50 / p99 / max latency of one rerun, overall and per action
+  - RSS growth per session
+  - throughput in reruns and completed sessions per second
+  - direct timings of load_quiz_data, generate_quiz_questions and
+    calculate_category_scores, so a regression in one of them shows up even
+    when it is hidden in the rerun noise
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "src" / "manifest_quiz" / "app.py"
+sys.path.append(str(ROOT / "src"))
+
+from streamlit.testing.v1 import AppTest
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        # ru_maxrss is a peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": max(values, default=0.0) * 1000,
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+    }
+
+
+class Session:
+    """One simulated player; records the latency of every rerun it triggers."""
+
+    def __init__(self, mode: str, num_questions: int, rng: random.Random, timeout: float):
+        self.mode = mode
+        self.num_questions = num_questions
+        self.rng = rng
+        self.timings = []  # (action, seconds)
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+
+    def _run(self, action: str) -> None:
+        start = time.perf_counter()
+        self.at.run()
+        self.timings.append((action, time.perf_counter() - start))
+        if self.at.exception:
+            raise RuntimeError(f"{action}: {self.at.exception[0].message}")
+
+    def _click(self, label: str, action: str) -> None:
+        button = next((b for b in self.at.button if b.label == label or b.label.startswith(label)), None)
+        if button is None:
+            raise RuntimeError(f"{action}: button {label!r} not found")
+        button.click()
+        self._run(action)
+
+    def play(self) -> int:
+        """Play one full quiz; returns the final score."""
+        self._run("load")
+        if self.mode == "random":
+            self._click("ランダム出題を選択", "select_mode")
+            self.at.selectbox[0].set_value(self.num_questions)
+            self._click("ランダムクイズを始める", "start")
+        else:
+            self._click("分野別出題を選択", "select_mode")
+            fields = [b.label for b in self.at.button
+                      if b.label.endswith("問)") and not b.label.endswith("(0問)")]
+            self._click(self.rng.choice(fields), "select_field")
+            self._click("この設定でクイズを始める", "start")
+
+        while not self.at.session_state["quiz_completed"]:
+            self.at.radio[0].set_value(self.rng.randrange(4))
+            self._click("回答を確定", "answer")
+            self._click("次の問題へ" if self.at.button[0].label == "次の問題へ" else "結果を見る", "next")
+        return self.at.session_state["score"]
+
+
+def time_app_functions(repeat: int):
+    """Direct timings of the app functions the rerun path depends on."""
+    # Importing the app outside `streamlit run` executes only its definitions
+    from manifest_quiz import app
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def cold_load():
+        app.get_bank_reloader().stop()
+        app.get_bank_reloader.clear()
+        app.load_quiz_data()
+
+    bank = app.load_quiz_data()
+    questions = app.generate_quiz_questions(bank, 30)
+    category_correct, category_total = {}, {}
+    for q in questions:
+        category_total[q.category] = category_total.get(q.category, 0) + 1
+        category_correct[q.category] = category_correct.get(q.category, 0) + (q.correct == 0)
+
+    return {
+        "questions_in_bank": len(bank),
+        "load_quiz_data_cold_ms": timed(cold_load),
+        "load_quiz_data_cached_ms": timed(app.load_quiz_data),
+        "generate_quiz_questions_random_ms": timed(lambda: app.generate_quiz_questions(bank, 30)),
+        "generate_quiz_questions_field_ms": timed(lambda: app.generate_quiz_questions(bank, 10, "教育")),
+        "calculate_category_scores_ms": timed(lambda: app.calculate_category_scores(category_correct,
+                                                                                    category_total)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the quiz app with concurrent simulated sessions')
+    parser.add_argument('--users', type=int, default=20, help='Number of simulated users (default: 20)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Users playing at the same time (default: all of them)')
+    parser.add_argument('--questions', type=int, default=10, choices=[5, 10, 15, 20, 30],
+                        help='Questions per random-mode quiz (default: 10)')
+    parser.add_argument('--field-ratio', type=float, default=0.5,
+                        help='Fraction of users playing in field mode (default: 0.5)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-rerun timeout in seconds')
+    parser.add_argument('--repeat', type=int, default=50, help='Repetitions for the function timings')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', default='bench_sessions.json', help='JSON results file')
+    args = parser.parse_args()
+
+    # The app resolves its data files relative to the working directory
+    os.chdir(ROOT)
+    rng = random.Random(args.seed)
+
+    functions = time_app_functions(args.repeat)
+
+    # Warm the shared bank so the first user does not pay for loading it
+    warmup = Session("random", 5, random.Random(args.seed), args.timeout)
+    warmup.play()
+
+    baseline_rss = rss_bytes()
+    sessions = [
+        Session("field" if rng.random() < args.field_ratio else "random", args.questions,
+                random.Random(rng.random()), args.timeout)
+        for _ in range(args.users)
+    ]
+    errors = []
+    errors_lock = threading.Lock()
+
+    def play(session: Session):
+        try:
+            session.play()
+        except Exception as e:
+            with errors_lock:
+                errors.append(f"{session.mode}: {e}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency or args.users) as executor:
+        list(executor.map(play, sessions))
+    wall = time.perf_counter() - start
+    # Sessions are still referenced here, so their state is still resident
+    rss_per_session = (rss_bytes() - baseline_rss) / max(1, len(sessions))
+
+    all_timings = [seconds for s in sessions for _, seconds in s.timings]
+    by_action = {}
+    for s in sessions:
+        for action, seconds in s.timings:
+            by_action.setdefault(action, []).append(seconds)
+    completed = sum(1 for s in sessions if s.at.session_state["quiz_completed"]) if sessions else 0
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "users": args.users,
+        "completed_sessions": completed,
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput": {
+            "reruns_per_second": len(all_timings) / wall if wall else 0.0,
+            "sessions_per_second": completed / wall if wall else 0.0,
+        },
+        "rerun_latency": latency_summary(all_timings),
+        "rerun_latency_by_action": {action: latency_summary(v) for action, v in by_action.items()},
+        "rss_bytes": {"baseline": baseline_rss, "per_session": rss_per_session},
+        "functions": functions,
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    overall = results["rerun_latency"]
+    print(f"{completed}/{args.users} sessions completed in {wall:.1f}s "
+          f"({results['throughput']['reruns_per_second']:.1f} reruns/s)")
+    print(f"rerun latency: p50 {overall['p50_ms']:.1f}ms  p99 {overall['p99_ms']:.1f}ms  "
+          f"max {overall['max_ms']:.1f}ms")
+    print(f"RSS per session: {rss_per_session / 1024:.1f} KiB")
+    for action, summary in results["rerun_latency_by_action"].items():
+        print(f"  {action:<13} p50 {summary['p50_ms']:7.1f}ms  p99 {summary['p99_ms']:7.1f}ms  (n={summary['count']})")
+    if errors:
+        print(f"❌ {len(errors)} sessions failed, e.g. {errors[0]}")
+    print(f"Results written to {args.output}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
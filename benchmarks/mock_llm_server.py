@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenRouter chat-completions endpoint.
+
+Serves OpenAI-style chat completions, plain or streamed as server-sent
+events, so the generation pipeline can be exercised and benchmarked offline:
+
+    python benchmarks/mock_llm_server.py --port 8765 --latency 2 --error-rate-429 0.05
+    python -m manifest_quiz.quiz_generator --base-url http://127.0.0.1:8765/v1/chat/completions --no-cache
+
+Responses are replayed, in order of preference, from
+  1. a response cache directory (`--cache-dir`), on an exact request match;
+  2. recorded quiz rows (`--recorded-csv`, the per-file CSVs in data/ by
+     default) for the category named in the prompt, as CSV lines or as
+     structured JSON when the request asks for `response_format`; a
+     packed prompt gets rows for each of its documents' categories;
+  3. synthetic rows, for categories with no recording.
+
+Latency, jitter, 429/5xx injection and truncation are configurable.
+"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.response_cache import ResponseCache
+
+CATEGORY_RES = (re.compile(r'カテゴリ名は「(.+)」を使用'), re.compile(r'対象分野: (.+)）'))
+PACK_CATEGORY_RE = re.compile(r'^=== 文書\d+（カテゴリ名: (.+)）===$', re.MULTILINE)
+COUNT_RE = re.compile(r'4択クイズを(\d+)(?:-(\d+))?問')
+REPAIR_COUNT_RE = re.compile(r'同じJSON形式.*?で(\d+)問出力')
+
+
+class MockLLM:
+    """Response selection and fault injection, shared by all request handler threads."""
+
+    def __init__(self, recorded_csv: Optional[str] = "data/quiz_*.csv", cache_dir: Optional[str] = None,
+                 latency: float = 0.0, jitter: float = 0.0, chunk_delay: float = 0.0,
+                 error_rate_429: float = 0.0, error_rate_5xx: float = 0.0, retry_after: float = 0.1,
+                 truncate_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self.retry_after = retry_after
+        self.truncate_rate = truncate_rate
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.recorded = self._load_recorded(recorded_csv) if recorded_csv else {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seen_prefixes = set()
+        self.counts = dict.fromkeys(("requests", "replayed", "recorded", "synthetic", "rate_limited",
+                                     "server_errors", "truncated", "streamed"), 0)
+
+    @staticmethod
+    def _load_recorded(pattern: str) -> Dict[str, List[List[str]]]:
+        """Recorded rows keyed by the category the generator derives from each source filename."""
+        recorded: Dict[str, List[List[str]]] = {}
+        for path in sorted(glob.glob(pattern)):
+            category = re.sub(r'^\d+_', '', Path(path).stem.replace('quiz_', '', 1))
+            with open(path, 'r', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                rows = [row[1:8] for row in reader if len(row) >= 8 and row[6].strip() in ("1", "2", "3", "4")]
+            if rows:
+                recorded[category] = rows
+        return recorded
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def delay(self) -> float:
+        """Time to first byte for one request."""
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def fault(self) -> Optional[int]:
+        """Status code of an injected failure, or None to serve the request."""
+        roll = self.random()
+        if roll < self.error_rate_429:
+            self._count("rate_limited")
+            return 429
+        if roll < self.error_rate_429 + self.error_rate_5xx:
+            self._count("server_errors")
+            return 503
+        return None
+
+    def respond(self, body: Dict[str, Any]) -> str:
+        """Content of the assistant message for a chat-completions request body."""
+        self._count("requests")
+        messages = body.get("messages", [])
+        if self.cache is not None:
+            key = ResponseCache.make_key(body.get("model", ""), body.get("temperature", 0.0), messages)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("replayed")
+                return cached
+
+        prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") != "assistant")
+        last = messages[-1]["content"] if messages else ""
+        categories = PACK_CATEGORY_RE.findall(prompt) or [
+            next((m.group(1) for r in CATEGORY_RES for m in [r.search(prompt)] if m), "不明")
+        ]
+        repair = REPAIR_COUNT_RE.search(last) if len(messages) > 1 else None
+        match = COUNT_RE.search(prompt)
+        low, high = (int(match.group(1)), int(match.group(2) or match.group(1))) if match else (5, 8)
+
+        tagged = []
+        for category in categories:
+            if repair:
+                count = int(repair.group(1))
+            else:
+                with self._lock:
+                    count = self._rng.randint(low, high)
+            pool = self.recorded.get(category)
+            self._count("recorded" if pool else "synthetic")
+            with self._lock:
+                if pool:
+                    start = self._rng.randrange(len(pool))
+                    tagged += [[category, *pool[(start + i) % len(pool)]] for i in range(count)]
+                else:
+                    tagged += [[category, *self._synthetic_row(category, i)] for i in range(count)]
+
+        if "response_format" in body:
+            return json.dumps({"questions": [
+                {"question": row[1], "options": row[2:6], "correct_answer": int(row[6]), "explanation": row[7]}
+                for row in tagged
+            ]}, ensure_ascii=False)
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(tagged)
+        return buffer.getvalue().rstrip('\n')
+
+    def cached_prefix(self, messages: List[Dict[str, Any]]) -> int:
+        """Prompt "tokens" (characters) a provider prefix cache would serve: a system message seen before."""
+        if not messages or messages[0].get("role") != "system":
+            return 0
+        system = messages[0].get("content", "")
+        with self._lock:
+            if system in self._seen_prefixes:
+                return len(system)
+            self._seen_prefixes.add(system)
+        return 0
+
+    def _synthetic_row(self, category: str, i: int) -> List[str]:
+        answer = self._rng.randint(1, 4)
+        return [f"{category}に関する問題{i + 1}は？", *[f"選択肢{n}" for n in range(1, 5)], str(answer),
+                f"正解は選択肢{answer}です。"]
+
+    def maybe_truncate(self, content: str):
+        """(content, truncated): cut the response short at a random point."""
+        if content and self.random() < self.truncate_rate:
+            self._count("truncated")
+            with self._lock:
+                return content[:self._rng.randrange(len(content))], True
+        return content, False
+
+
+def make_handler(mock: MockLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(mock.delay())
+
+            status = mock.fault()
+            if status == 429:
+                self._send_json(429, {"error": {"message": "rate limited (mock)"}},
+                                {"Retry-After": f"{mock.retry_after:g}"})
+                return
+            if status is not None:
+                self._send_json(status, {"error": {"message": "upstream unavailable (mock)"}})
+                return
+
+            content, truncated = mock.maybe_truncate(mock.respond(body))
+            messages = body.get("messages", [])
+            usage = {"prompt_tokens": sum(len(m.get("content", "")) for m in messages),
+                     "prompt_tokens_details": {"cached_tokens": mock.cached_prefix(messages)},
+                     "completion_tokens": len(content)}
+            if body.get("stream"):
+                mock._count("streamed")
+                self._stream(content, truncated, usage)
+                return
+            self._send_json(200, {
+                "id": "mock", "object": "chat.completion", "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "length" if truncated else "stop"}],
+                "usage": usage,
+            })
+
+        def _stream(self, content: str, truncated: bool, usage: Dict[str, int]):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def event(payload: Any) -> None:
+                data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+                self.wfile.write(f"data: {data}\n\n".encode('utf-8'))
+                self.wfile.flush()
+
+            self.wfile.write(b": keep-alive\n\n")
+            step = 40
+            for i in range(0, len(content), step):
+                event({"choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}]})
+                if mock.chunk_delay:
+                    time.sleep(mock.chunk_delay)
+            if truncated:
+                # A dropped connection: no finish_reason and no [DONE]
+                return
+            event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+            event("[DONE]")
+
+    return Handler
+
+
+def start_server(mock: MockLLM, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve `mock` on a background thread; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--recorded-csv', default='data/quiz_*.csv',
+                        help='Glob of quiz CSVs to replay rows from (default: data/quiz_*.csv)')
+    parser.add_argument('--cache-dir', help='Response cache directory to replay exact matches from')
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds before each response (default: 0.5)')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Uniform +/- jitter on the latency')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='Seconds between streamed chunks')
+    parser.add_argument('--error-rate-429', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--error-rate-5xx', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--retry-after', type=float, default=0.1, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help='Fraction of responses cut short (finish_reason=length, or a dropped stream)')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible fault injection')
+
+
+def mock_from_args(args: argparse.Namespace) -> MockLLM:
+    return MockLLM(recorded_csv=args.recorded_csv, cache_dir=args.cache_dir, latency=args.latency,
+                   jitter=args.jitter, chunk_delay=args.chunk_delay, error_rate_429=args.error_rate_429,
+                   error_rate_5xx=args.error_rate_5xx, retry_after=args.retry_after,
+                   truncate_rate=args.truncate_rate, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a mock OpenAI-compatible chat-completions endpoint')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    mock = mock_from_args(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(mock))
+    server.daemon_threads = True
+    print(f"Mock LLM serving http://{args.host}:{args.port}/v1/chat/completions "
+          f"({len(mock.recorded)} recorded categories)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Requests: {mock.counts}")
+
+
+if __name__ == "__main__":
+    main()
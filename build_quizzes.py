@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Incremental build: data/*.md -> per-file quiz CSVs -> quiz_all_combined.csv.
+
+A build manifest records the content hash of every manifesto file and the
+fingerprint of every generated CSV. Only changed manifesto files are sent to
+the LLM; the combined question bank is then rebuilt from the per-file CSVs
+through the same grounding/dedupe pipeline as combine_quizzes.py.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add src to path to import our quiz generator
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from manifest_quiz.quiz_generator import PROMPT_TEMPLATE_VERSION, QuizGenerator
+from manifest_quiz.response_cache import ResponseCache
+from manifest_quiz.dedupe import DEFAULT_THRESHOLD
+from manifest_quiz.grounding import DEFAULT_MIN_SUPPORT, GroundingIndex
+from combine_quizzes import build_combined, read_quiz_csv
+
+MANIFEST_VERSION = 1
+
+
+def file_hash(path: Path) -> Optional[str]:
+    """sha256 of a file's bytes, or None if it does not exist."""
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_manifest(manifest_path: Path) -> Dict[str, Any]:
+    """Load the build manifest, starting fresh if it is missing or from another version."""
+    empty = {"version": MANIFEST_VERSION, "settings": None, "sources": {}, "combined": None}
+    if not manifest_path.exists():
+        return empty
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    return manifest if manifest.get("version") == MANIFEST_VERSION else empty
+
+
+def save_manifest(manifest_path: Path, manifest: Dict[str, Any]) -> None:
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def plan_generation(md_files: List[Path], csv_dir: Path, manifest: Dict[str, Any], settings: str,
+                    force: bool) -> Dict[str, List[Path]]:
+    """Sort manifesto files into regenerate / adopt / skip buckets.
+
+    Each source record carries the settings fingerprint its CSV was built
+    with, so a file whose regeneration failed is retried until it matches.
+    """
+    plan = {"regenerate": [], "adopt": [], "skip": []}
+
+    for md_file in md_files:
+        record = manifest["sources"].get(str(md_file))
+        csv_path = csv_dir / f"quiz_{md_file.stem}.csv"
+
+        if force or not csv_path.exists():
+            plan["regenerate"].append(md_file)
+        elif record is None:
+            # First build over a tree with existing CSVs: trust them instead of paying for a full rebuild
+            plan["adopt"].append(md_file)
+        elif (record.get("settings", manifest["settings"]) != settings
+              or record["source_hash"] != file_hash(md_file)):
+            # Records written before per-file fingerprints fall back to the manifest-wide one
+            plan["regenerate"].append(md_file)
+        else:
+            plan["skip"].append(md_file)
+    return plan
+
+
+def write_combined(combined_path: Path, csv_paths: List[Path], manifest: Dict[str, Any],
+                   pipeline: Dict[str, Any], compiled_file: Optional[str] = None) -> int:
+    """Rebuild the combined bank from the per-file CSVs; returns the number of questions.
+
+    Grounding, quarantine and dedupe look across files, so the rows go
+    through the same pipeline as combine_quizzes.py (build_combined) rather
+    than being patched in place; a full combine and an incremental build of
+    the same CSVs give the same bank. Reading the CSVs is cheap next to
+    generating them, which is what the incremental build saves.
+    """
+    sources = [(str(p), read_quiz_csv(str(p))[1]) for p in csv_paths]
+    rows = build_combined(sources, str(combined_path), compiled_file, **pipeline)
+    manifest["combined"] = {
+        "path": str(combined_path),
+        "hash": file_hash(combined_path),
+        "order": [str(p) for p in csv_paths],
+        "pipeline": pipeline_settings(pipeline),
+    }
+    return len(rows)
+
+
+def pipeline_settings(pipeline: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-serializable summary of the combine settings, recorded to detect when they change."""
+    grounding = pipeline.get("grounding")
+    return {
+        "grounding": list(map(list, grounding.signature)) if grounding is not None else None,
+        "min_support": pipeline.get("min_support"),
+        "quarantine_file": pipeline.get("quarantine_file"),
+        "dedupe_threshold": pipeline.get("dedupe_threshold"),
+    }
+
+
+def build(data_dir: str = "data", csv_dir: str = "data", combined_file: str = "quiz_all_combined.csv",
+          manifest_file: str = ".quiz_build_manifest.json", generator: Optional[QuizGenerator] = None,
+          concurrency: int = 4, force: bool = False, dry_run: bool = False,
+          compiled_file: Optional[str] = None, grounding: Optional[GroundingIndex] = None,
+          min_support: float = DEFAULT_MIN_SUPPORT, quarantine_file: Optional[str] = None,
+          dedupe_threshold: Optional[float] = None, dedupe_report: Optional[str] = None,
+          generation: Optional[Dict[str, Any]] = None) -> bool:
+    """Run one incremental build; returns False if any manifesto file failed to generate.
+
+    `generation` holds the QuizGenerator arguments that shape the output
+    (pack_tokens, section_tokens, output_format, prompt_version); the
+    settings fingerprint is taken from them, so builds with and without an
+    API key agree on it. The combine options are those of
+    combine_quizzes.build_combined.
+    """
+    manifest_path = Path(manifest_file)
+    combined_path = Path(combined_file)
+    csv_dir_path = Path(csv_dir)
+    manifest = load_manifest(manifest_path)
+
+    # A keyless generator with the same arguments: fingerprinting needs no API key
+    finder = QuizGenerator("", **(generation or {}))
+    settings = finder.settings_fingerprint()
+    md_files = finder.find_md_files(data_dir)
+    plan = plan_generation(md_files, csv_dir_path, manifest, settings, force)
+
+    print(f"Found {len(md_files)} MD files")
+    print(f"  ♻️  regenerate: {len(plan['regenerate'])}")
+    for md_file in plan["regenerate"]:
+        print(f"     - {md_file.name}")
+    print(f"  📥 adopt existing CSV: {len(plan['adopt'])}")
+    print(f"  ⏭️  skip (unchanged): {len(plan['skip'])}")
+
+    if dry_run:
+        return True
+
+    results = {}
+    if plan["regenerate"]:
+        if generator is None:
+            print("❌ Manifesto files changed but no API key was given")
+            return False
+        jobs = [(str(md), str(csv_dir_path / f"quiz_{md.stem}.csv")) for md in plan["regenerate"]]
+        results = generator.generate_quizzes(jobs, concurrency)
+
+    # Record what each CSV was built from; failed files are marked stale so they retry next time
+    changed = set()
+    for md_file in plan["regenerate"] + plan["adopt"]:
+        csv_path = csv_dir_path / f"quiz_{md_file.stem}.csv"
+        if results.get(str(md_file), md_file in plan["adopt"]):
+            manifest["sources"][str(md_file)] = {
+                "source_hash": file_hash(md_file),
+                "csv": str(csv_path),
+                "csv_hash": file_hash(csv_path),
+                "settings": settings,
+            }
+        else:
+            record = manifest["sources"].setdefault(str(md_file), {
+                "source_hash": None,
+                "csv": str(csv_path),
+                "csv_hash": None,
+            })
+            record["settings"] = None
+
+    # A CSV also counts as changed when its bytes differ from what the combined bank was built from
+    csv_paths = []
+    for md_file in md_files:
+        record = manifest["sources"].get(str(md_file))
+        csv_path = csv_dir_path / f"quiz_{md_file.stem}.csv"
+        if not csv_path.exists():
+            continue
+        csv_paths.append(csv_path)
+        if record is None or record["csv_hash"] != file_hash(csv_path) or str(md_file) in results:
+            changed.add(str(csv_path))
+            if record is not None:
+                record["csv_hash"] = file_hash(csv_path)
+
+    manifest["settings"] = settings
+    pipeline = {"grounding": grounding, "min_support": min_support, "quarantine_file": quarantine_file,
+                "dedupe_threshold": dedupe_threshold, "dedupe_report": dedupe_report}
+    combined_up_to_date = (
+        not changed and manifest["combined"] is not None
+        and manifest["combined"]["order"] == [str(p) for p in csv_paths]
+        and manifest["combined"]["hash"] == file_hash(combined_path)
+        and manifest["combined"].get("pipeline") == pipeline_settings(pipeline)
+        and (compiled_file is None or Path(compiled_file).exists())
+    )
+    if combined_up_to_date:
+        print(f"\n✅ {combined_path} is up to date")
+    else:
+        count = write_combined(combined_path, csv_paths, manifest, pipeline, compiled_file)
+        print(f"\n🎉 Rebuilt {combined_path}: {count} questions from {len(csv_paths)} CSVs "
+              f"({len(changed)} changed)")
+
+    save_manifest(manifest_path, manifest)
+    return list(results.values()).count(False) == 0
+
+
+def main():
+    """Main function with command line argument parsing."""
+    parser = argparse.ArgumentParser(description='Incrementally build quiz CSVs and the combined question bank')
+    parser.add_argument('--data-dir', default='data', help='Directory containing MD files (default: data)')
+    parser.add_argument('--csv-dir', default='data', help='Directory of per-file quiz CSVs (default: data)')
+    parser.add_argument('--output', default='quiz_all_combined.csv',
+                       help='Combined output filename (default: quiz_all_combined.csv)')
+    parser.add_argument('--manifest', default='.quiz_build_manifest.json',
+                       help='Build manifest path (default: .quiz_build_manifest.json)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of files to generate in parallel')
+    parser.add_argument('--rpm', type=int, default=20, help='Requests-per-minute limit (default: 20)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the response cache in .quiz_cache/')
+    parser.add_argument('--pack-tokens', type=int, default=0,
+                       help='Pack small files into shared requests of up to this many content tokens (default: off)')
+    parser.add_argument('--section-tokens', type=int, default=3000,
+                       help='Split documents larger than this many tokens into sections')
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv',
+                       help='Ask for CSV lines or schema-constrained JSON output')
+    parser.add_argument('--prompt-version', type=int, choices=[1, 2], default=PROMPT_TEMPLATE_VERSION,
+                       help=f'Prompt template version (default: {PROMPT_TEMPLATE_VERSION})')
+    parser.add_argument('--compiled', nargs='?', const='quiz_all_combined.qbank',
+                       help='Also write a compiled binary bank (default path: quiz_all_combined.qbank)')
+    parser.add_argument('--min-support', type=float, default=DEFAULT_MIN_SUPPORT,
+                       help=f'Flag questions whose grounding support is below this (default: {DEFAULT_MIN_SUPPORT})')
+    parser.add_argument('--quarantine', nargs='?', const='quarantined_questions.csv',
+                       help='Move flagged questions to this file instead of the combined output '
+                            '(default path: quarantined_questions.csv)')
+    parser.add_argument('--no-grounding', action='store_true', help='Skip the grounding check')
+    parser.add_argument('--dedupe-threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f'Drop questions whose character-bigram similarity to an earlier one is at least this '
+                            f'(default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--dedupe-report', help='Write the merged duplicate clusters as JSON to this file')
+    parser.add_argument('--no-dedupe', action='store_true', help='Keep near-duplicate questions')
+    parser.add_argument('--force', action='store_true', help='Regenerate every manifesto file')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be rebuilt')
+
+    args = parser.parse_args()
+
+    print("Incremental Quiz Build")
+    print("=" * 50)
+
+    generation = {"pack_tokens": args.pack_tokens, "section_tokens": args.section_tokens,
+                  "output_format": args.format, "prompt_version": args.prompt_version}
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    generator = None
+    if api_key:
+        cache = None if args.no_cache else ResponseCache(".quiz_cache")
+        generator = QuizGenerator(api_key, requests_per_minute=args.rpm, cache=cache, **generation)
+
+    grounding = None
+    if not args.no_grounding and os.path.isdir(args.data_dir):
+        grounding = GroundingIndex.load_or_build(args.data_dir)
+
+    ok = build(
+        data_dir=args.data_dir,
+        csv_dir=args.csv_dir,
+        combined_file=args.output,
+        manifest_file=args.manifest,
+        generator=generator,
+        concurrency=args.concurrency,
+        force=args.force,
+        dry_run=args.dry_run,
+        compiled_file=args.compiled,
+        grounding=grounding,
+        min_support=args.min_support,
+        quarantine_file=args.quarantine,
+        dedupe_threshold=None if args.no_dedupe else args.dedupe_threshold,
+        dedupe_report=args.dedupe_report,
+        generation=generation,
+    )
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
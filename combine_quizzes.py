@@ -5,11 +5,30 @@ Script to concatenate all quiz CSV files into one combined file.
 
 import csv
 import glob
+import json
+import os
+import sys
 from pathlib import Path
+from typing import List, Optional, Tuple
 import argparse
 
+# Add src to path to import the compiled bank writer
+sys.path.append(str(Path(__file__).parent / "src"))
 
-def combine_quiz_csvs(input_pattern: str = "quiz_*.csv", output_file: str = "quiz_all_combined.csv", exclude_existing: bool = True):
+from manifest_quiz.bank_format import MappedBank, compile_bank
+from manifest_quiz.dedupe import DEFAULT_THRESHOLD, find_near_duplicates, question_text
+from manifest_quiz.grounding import DEFAULT_MIN_SUPPORT, GroundingIndex, document_for_csv
+
+# source_section is optional: older CSVs without it get an empty value
+QUIZ_HEADER = ['category', 'question', 'option1', 'option2', 'option3', 'option4', 'correct_answer', 'explanation',
+               'source_section']
+QUARANTINE_HEADER = QUIZ_HEADER + ['support', 'source_file']
+
+
+def combine_quiz_csvs(input_pattern: str = "quiz_*.csv", output_file: str = "quiz_all_combined.csv", exclude_existing: bool = True,
+                      compiled_file: Optional[str] = None, grounding: Optional[GroundingIndex] = None,
+                      min_support: float = DEFAULT_MIN_SUPPORT, quarantine_file: Optional[str] = None,
+                      dedupe_threshold: Optional[float] = None, dedupe_report: Optional[str] = None):
     """
     Combine all quiz CSV files matching the pattern into one file.
     
@@ -17,6 +36,12 @@ def combine_quiz_csvs(input_pattern: str = "quiz_*.csv", output_file: str = "qui
         input_pattern: Glob pattern to match quiz CSV files
         output_file: Output filename for the combined CSV
         exclude_existing: Whether to exclude the existing combined file from input
+        compiled_file: Also write a compiled, memory-mappable bank to this path
+        grounding: Score every row against its source document (quiz_<stem>.csv <- <stem>.md)
+        min_support: Rows scoring below this are flagged
+        quarantine_file: Move flagged rows to this file instead of the combined output
+        dedupe_threshold: Drop near-duplicate questions at or above this similarity (MinHash/LSH)
+        dedupe_report: Also write the merged duplicate clusters as JSON to this path
     """
     
     # Find all quiz CSV files
@@ -37,52 +62,148 @@ def combine_quiz_csvs(input_pattern: str = "quiz_*.csv", output_file: str = "qui
     for file in csv_files:
         print(f"  - {file}")
     
-    # Combine all CSV files
-    total_rows = 0
-    header_written = False
+    # Read all CSV files
+    sources = []
+    print(f"Header: {', '.join(QUIZ_HEADER)}")
     
-    with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.writer(outfile)
-        
-        for csv_file in csv_files:
-            try:
-                with open(csv_file, 'r', encoding='utf-8') as infile:
-                    reader = csv.reader(infile)
-                    
-                    # Read and process each row
-                    for row_num, row in enumerate(reader):
-                        if row_num == 0:  # Header row
-                            if not header_written:
-                                # Write header only once
-                                writer.writerow(row)
-                                header_written = True
-                                print(f"Header: {', '.join(row)}")
-                        else:
-                            # Data row
-                            if row and len(row) >= 8:  # Ensure row has enough columns
-                                writer.writerow(row)
-                                total_rows += 1
-                
-                print(f"✅ Processed {csv_file}")
-                
-            except Exception as e:
-                print(f"❌ Error processing {csv_file}: {e}")
+    for csv_file in csv_files:
+        try:
+            _, rows = read_quiz_csv(csv_file)
+            sources.append((csv_file, rows))
+            print(f"✅ Processed {csv_file}")
+            
+        except Exception as e:
+            print(f"❌ Error processing {csv_file}: {e}")
     
+    build_combined(sources, output_file, compiled_file, grounding, min_support, quarantine_file,
+                   dedupe_threshold, dedupe_report)
     print(f"\n🎉 Combined {len(csv_files)} files into {output_file}")
-    print(f"📊 Total quiz questions: {total_rows}")
+
+
+def build_combined(sources: List[Tuple[str, List[List[str]]]], output_file: str, compiled_file: Optional[str] = None,
+                   grounding: Optional[GroundingIndex] = None, min_support: float = DEFAULT_MIN_SUPPORT,
+                   quarantine_file: Optional[str] = None, dedupe_threshold: Optional[float] = None,
+                   dedupe_report: Optional[str] = None) -> List[List[str]]:
+    """
+    Turn per-file quiz rows into the combined bank; shared by this script and build_quizzes.py.
+    
+    The rows of each (csv_file, rows) pair are checked against the file's source
+    document, then near-duplicates are dropped across all files, then the result
+    is written to `output_file` (and compiled). Returns the rows written.
+    """
+    all_rows = []
+    row_sources = []
+    quarantined = []
+    for csv_file, rows in sources:
+        flagged = check_grounding(csv_file, rows, grounding, min_support)
+        if quarantine_file:
+            quarantined.extend(row + [f"{support:.3f}", csv_file] for row, support in flagged)
+            flagged_ids = {id(row) for row, _ in flagged}
+            rows = [row for row in rows if id(row) not in flagged_ids]
+        all_rows.extend(rows)
+        row_sources.extend([csv_file] * len(rows))
+    
+    if dedupe_threshold:
+        all_rows = remove_near_duplicates(all_rows, row_sources, dedupe_threshold, dedupe_report)
+    
+    write_quiz_csv(output_file, QUIZ_HEADER, all_rows)
+    
+    print(f"📊 Total quiz questions: {len(all_rows)}")
+    if quarantine_file:
+        write_quiz_csv(quarantine_file, QUARANTINE_HEADER, quarantined)
+        print(f"🚧 Quarantined {len(quarantined)} low-support questions into {quarantine_file}")
+    print_preview(output_file, QUIZ_HEADER, all_rows)
+    
+    if compiled_file:
+        write_compiled_bank(compiled_file, all_rows, output_file)
+    return all_rows
+
+
+def check_grounding(csv_file: str, rows: List[List[str]], grounding: Optional[GroundingIndex],
+                    min_support: float) -> List[Tuple[List[str], float]]:
+    """Score rows against the source document of `csv_file`; returns the (row, support) pairs below `min_support`."""
+    document = document_for_csv(csv_file)
+    if grounding is None or document not in grounding:
+        return []
+    flagged = []
+    for row in rows:
+        score = grounding.score_row(document, row)
+        if score is not None and score.support < min_support:
+            flagged.append((row, score.support))
+            print(f"⚠️  Low grounding support ({score.support:.2f}) in {csv_file}: {row[1][:40]}")
+    return flagged
+
+
+def remove_near_duplicates(rows: List[List[str]], sources: List[str], threshold: float,
+                           report_file: Optional[str] = None) -> List[List[str]]:
+    """Keep the first row of every near-duplicate cluster and report what was merged."""
+    clusters = find_near_duplicates([question_text(row) for row in rows], threshold)
+    if not clusters:
+        print(f"🔁 No near-duplicate questions (similarity >= {threshold:g})")
+        return rows
+    
+    dropped = {i for cluster in clusters for i, _ in cluster.duplicates}
+    print(f"🔁 Merged {len(dropped)} near-duplicate questions in {len(clusters)} clusters "
+          f"(similarity >= {threshold:g}):")
+    for cluster in clusters:
+        print(f"  ✔ {sources[cluster.keep]}: {rows[cluster.keep][1][:50]}")
+        for i, similarity in cluster.duplicates:
+            print(f"    ✖ {similarity:.2f} {sources[i]}: {rows[i][1][:50]}")
     
-    # Show sample of combined data
+    if report_file:
+        report = {
+            "threshold": threshold,
+            "clusters": [
+                {
+                    "kept": {"source": sources[cluster.keep], "question": rows[cluster.keep][1]},
+                    "merged": [{"source": sources[i], "question": rows[i][1], "similarity": round(similarity, 3)}
+                               for i, similarity in cluster.duplicates],
+                }
+                for cluster in clusters
+            ],
+        }
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📝 Duplicate report written to {report_file}")
+    return [row for i, row in enumerate(rows) if i not in dropped]
+
+
+def read_quiz_csv(csv_file: str) -> Tuple[List[str], List[List[str]]]:
+    """Read a quiz CSV and return its header and the data rows, normalized to QUIZ_HEADER columns."""
+    width = len(QUIZ_HEADER)
+    with open(csv_file, 'r', encoding='utf-8') as infile:
+        reader = csv.reader(infile)
+        header = next(reader, [])
+        # Ensure row has enough columns
+        rows = [(row + [''] * width)[:width] for row in reader if row and len(row) >= 8]
+    return header, rows
+
+
+def write_quiz_csv(output_file: str, header: List[str], rows: List[List[str]]) -> None:
+    """Write quiz rows atomically so readers never see a half-written file."""
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_file, output_file)
+
+
+def write_compiled_bank(compiled_file: str, rows: List[List[str]], source_csv: Optional[str] = None) -> None:
+    """Compile the combined rows (already written to `source_csv`) into the binary bank format read by the app."""
+    count = compile_bank(rows, compiled_file, source_path=source_csv)
+    # Readers skip the checksum to open in constant time, so check the whole file once here
+    MappedBank(compiled_file, verify=True)
+    print(f"📦 Compiled {count} questions into {compiled_file} ({os.path.getsize(compiled_file)} bytes)")
+    if count < len(rows):
+        print(f"⚠️  Skipped {len(rows) - count} rows with an invalid correct_answer")
+
+
+def print_preview(output_file: str, header: List[str], rows: List[List[str]]) -> None:
+    """Show the first rows of the combined data without re-reading the file."""
     print(f"\nFirst few rows of {output_file}:")
-    try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for i, row in enumerate(reader):
-                if i < 3:  # Show first 3 rows (header + 2 data rows)
-                    print(f"  {i+1}: {', '.join(row[:3])}...")  # Show first 3 columns
-                else:
-                    break
-    except Exception as e:
-        print(f"Error reading combined file: {e}")
+    for i, row in enumerate([header] + rows[:2]):  # header + 2 data rows
+        print(f"  {i+1}: {', '.join(row[:3])}...")  # Show first 3 columns
 
 
 def main():
@@ -94,16 +215,41 @@ def main():
                        help='Output filename (default: quiz_all_combined.csv)')
     parser.add_argument('--include-existing', action='store_true',
                        help='Include existing combined file in input (default: exclude)')
+    parser.add_argument('--compiled', nargs='?', const='quiz_all_combined.qbank',
+                       help='Also write a compiled binary bank (default path: quiz_all_combined.qbank)')
+    parser.add_argument('--data-dir', default='data',
+                       help='Manifesto MD files to check the questions against (default: data)')
+    parser.add_argument('--min-support', type=float, default=DEFAULT_MIN_SUPPORT,
+                       help=f'Flag questions whose grounding support is below this (default: {DEFAULT_MIN_SUPPORT})')
+    parser.add_argument('--quarantine', nargs='?', const='quarantined_questions.csv',
+                       help='Move flagged questions to this file instead of the combined output '
+                            '(default path: quarantined_questions.csv)')
+    parser.add_argument('--no-grounding', action='store_true', help='Skip the grounding check')
+    parser.add_argument('--dedupe-threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f'Drop questions whose character-bigram similarity to an earlier one is at least this '
+                            f'(default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--dedupe-report', help='Write the merged duplicate clusters as JSON to this file')
+    parser.add_argument('--no-dedupe', action='store_true', help='Keep near-duplicate questions')
     
     args = parser.parse_args()
     
     print("Quiz CSV Combiner")
     print("=" * 50)
     
+    grounding = None
+    if not args.no_grounding and os.path.isdir(args.data_dir):
+        grounding = GroundingIndex.load_or_build(args.data_dir)
+    
     combine_quiz_csvs(
         input_pattern=args.pattern,
         output_file=args.output,
-        exclude_existing=not args.include_existing
+        exclude_existing=not args.include_existing,
+        compiled_file=args.compiled,
+        grounding=grounding,
+        min_support=args.min_support,
+        quarantine_file=args.quarantine,
+        dedupe_threshold=None if args.no_dedupe else args.dedupe_threshold,
+        dedupe_report=args.dedupe_report
     )
 
 
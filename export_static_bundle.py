@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Export the question bank as a static bundle that a CDN can serve without Python.
+
+    static_bundle/
+      index.json                          fields, counts, shard and quiz-set file names
+      fields/field-00.<hash>.json         every question of one FIELD_MAPPING field
+      quizzes/random-10-00.<hash>.json    precomputed random quiz sets
+
+Shard and quiz-set names carry a hash of their content, so they can be
+served with a long `Cache-Control: immutable` lifetime; only index.json
+needs a short one. Output is deterministic for a given bank and --seed, so
+re-exporting an unchanged bank produces the same file names.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add src to path to import the question bank
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from manifest_quiz.question_bank import FIELD_MAPPING, Question, QuestionBank
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+def question_json(question: Question) -> Dict[str, Any]:
+    """Bundle form of a question; `correct` is the 0-based option index."""
+    return {
+        "id": question.id,
+        "category": question.category,
+        "question": question.question,
+        "options": list(question.options),
+        "correct": question.correct,
+        "explanation": question.explanation,
+    }
+
+
+def write_hashed(bundle_dir: Path, subdir: str, stem: str, payload: Any) -> str:
+    """Write `payload` as `<subdir>/<stem>.<content hash>.json`; returns the path relative to the bundle."""
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    relative = f"{subdir}/{stem}.{digest}.json"
+    path = bundle_dir / relative
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    return relative
+
+
+def export_bundle(bank: QuestionBank, bundle_dir: str = "static_bundle", quiz_sizes: Optional[List[int]] = None,
+                  sets_per_size: int = 200, sets_per_file: int = 50, seed: int = 0,
+                  prune: bool = False) -> Dict[str, Any]:
+    """Write field shards and quiz sets, then the index; returns the index.
+
+    `quiz_sizes` defaults to [10].
+    """
+    if quiz_sizes is None:
+        quiz_sizes = [10]
+    if sets_per_file < 1 or any(size < 1 for size in quiz_sizes):
+        raise ValueError("quiz sizes and sets_per_file must be positive")
+    out = Path(bundle_dir)
+    rng = random.Random(seed)
+
+    fields = []
+    for i, (field, categories) in enumerate(FIELD_MAPPING.items()):
+        ids = bank.field_ids(field)
+        shard = {"field": field, "questions": [question_json(bank[qid]) for qid in ids]}
+        fields.append({
+            "name": field,
+            "count": len(ids),
+            "categories": categories,
+            "shard": write_hashed(out, "fields", f"field-{i:02d}", shard),
+        })
+
+    quiz_sets = {}
+    for size in quiz_sizes:
+        files = []
+        for start in range(0, sets_per_size, sets_per_file):
+            sets = [[question_json(q) for q in bank.sample(size, rng=rng)]
+                    for _ in range(min(sets_per_file, sets_per_size - start))]
+            files.append(write_hashed(out, "quizzes", f"random-{size}-{start // sets_per_file:02d}",
+                                      {"size": size, "sets": sets}))
+        quiz_sets[str(size)] = files
+
+    index = {
+        "format": BUNDLE_FORMAT_VERSION,
+        "bank_version": bank.version,
+        "generated": int(time.time()),
+        "total": len(bank),
+        "fields": fields,
+        "quiz_sets": quiz_sets,
+    }
+    # The index goes last, so a reader never sees it before the files it names
+    tmp_index = out / "index.json.tmp"
+    tmp_index.write_text(json.dumps(index, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp_index, out / "index.json")
+
+    if prune:
+        referenced = {f["shard"] for f in fields} | {name for files in quiz_sets.values() for name in files}
+        for subdir in ("fields", "quizzes"):
+            for path in (out / subdir).glob("*.json"):
+                if f"{subdir}/{path.name}" not in referenced:
+                    path.unlink()
+    return index
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not an integer")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def positive_int_list(value: str) -> List[int]:
+    """argparse type for a comma-separated list of positive integers."""
+    return [positive_int(part.strip()) for part in value.split(',')]
+
+
+def main():
+    """Main function with command line argument parsing."""
+    parser = argparse.ArgumentParser(description='Export the question bank as a static, CDN-cacheable bundle')
+    parser.add_argument('--input', default='quiz_all_combined.csv',
+                       help='Combined quiz CSV (default: quiz_all_combined.csv)')
+    parser.add_argument('--compiled', default='quiz_all_combined.qbank',
+                       help='Compiled bank, used instead of the CSV when it exists')
+    parser.add_argument('--output-dir', default='static_bundle', help='Bundle directory (default: static_bundle)')
+    parser.add_argument('--sizes', type=positive_int_list, default=[10],
+                       help='Comma-separated quiz sizes to precompute (default: 10)')
+    parser.add_argument('--sets', type=positive_int, default=200, help='Precomputed quiz sets per size (default: 200)')
+    parser.add_argument('--sets-per-file', type=positive_int, default=50, help='Quiz sets per file (default: 50)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the quiz sets (default: 0)')
+    parser.add_argument('--prune', action='store_true',
+                       help='Delete shard files no longer referenced by the new index')
+
+    args = parser.parse_args()
+
+    print("Static Quiz Bundle Export")
+    print("=" * 50)
+
+    bank = QuestionBank.load(args.input, args.compiled)
+    index = export_bundle(bank, args.output_dir, args.sizes, args.sets,
+                          args.sets_per_file, args.seed, args.prune)
+
+    print(f"📦 {index['total']} questions -> {args.output_dir}/")
+    for field in index["fields"]:
+        print(f"  - {field['name']}: {field['count']}問 -> {field['shard']}")
+    for size, files in index["quiz_sets"].items():
+        print(f"  - {size}-question sets: {args.sets} in {len(files)} files")
+    print(f"🎉 Wrote {args.output_dir}/index.json")
+
+
+if __name__ == "__main__":
+    main()
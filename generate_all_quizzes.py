@@ -5,6 +5,7 @@ Convenience script to generate all quiz files from MD files using OpenRouter Gem
 
 import os
 import sys
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
@@ -12,11 +13,29 @@ load_dotenv()
 # Add src to path to import our quiz generator
 sys.path.append(str(Path(__file__).parent / "src"))
 
+from manifest_quiz.grounding import GroundingIndex
 from manifest_quiz.quiz_generator import QuizGenerator
+from manifest_quiz.response_cache import ResponseCache
 
 
 def main():
     """Generate quiz files for all MD files in the data directory."""
+    parser = argparse.ArgumentParser(description='Generate quiz files for all manifesto MD files')
+    parser.add_argument('--concurrency', type=int, default=4,
+                       help='Number of files to generate in parallel (default: 4)')
+    parser.add_argument('--rpm', type=int, default=20,
+                       help='Requests-per-minute limit (default: 20)')
+    parser.add_argument('--tpm', type=int,
+                       help='Tokens-per-minute limit (default: unlimited)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Disable the response cache in .quiz_cache/')
+    parser.add_argument('--pack-tokens', type=int, default=0,
+                       help='Pack small files into shared requests of up to this many content tokens '
+                            '(e.g. 6000; default: off)')
+    parser.add_argument('--no-grounding', action='store_true',
+                       help='Skip checking generated questions against the manifesto text')
+    args = parser.parse_args()
+    
     # Get API key from environment or prompt user
     api_key = os.getenv('OPENROUTER_API_KEY')
     if not api_key:
@@ -25,19 +44,23 @@ def main():
             print("API key is required. Set OPENROUTER_API_KEY environment variable or provide it when prompted.")
             sys.exit(1)
     
-    # Initialize generator
-    generator = QuizGenerator(api_key)
-    
-    # Generate quizzes for all MD files
     data_dir = "data"
     output_dir = "."
     
+    # Initialize generator
+    cache = None if args.no_cache else ResponseCache(".quiz_cache")
+    grounding = None if args.no_grounding else GroundingIndex.load_or_build(data_dir)
+    generator = QuizGenerator(api_key, requests_per_minute=args.rpm, tokens_per_minute=args.tpm, cache=cache,
+                              pack_tokens=args.pack_tokens, grounding=grounding)
+    
+    # Generate quizzes for all MD files
     print(f"Generating quiz files from MD files in {data_dir}/")
     print(f"Output directory: {output_dir}")
+    print(f"Concurrency: {args.concurrency}")
     print("=" * 50)
     
     try:
-        generator.generate_quizzes_for_all_md_files(data_dir, output_dir)
+        generator.generate_quizzes_for_all_md_files(data_dir, output_dir, concurrency=args.concurrency)
         print("=" * 50)
         print("Quiz generation completed!")
     except Exception as e:
@@ -0,0 +1,67 @@
+"""
+Adaptive question weights: prefer questions that are often missed and not seen recently.
+"""
+
+import math
+import time
+from typing import Dict, List, Optional
+
+from manifest_quiz.answer_stats import EMPTY_SNAPSHOT, StatsSnapshot, question_key
+from manifest_quiz.question_bank import Question, QuestionBank
+
+# A user's history entry per question key: [last seen (epoch seconds), attempts, correct].
+# Keyed like the answer statistics, so it stays valid when the bank is reloaded and IDs shift.
+History = Dict[str, List[float]]
+
+
+def update_history(history: History, question: Question, is_correct: bool, now: Optional[float] = None) -> None:
+    """Record one answer in a user's history; O(1)."""
+    entry = history.setdefault(question_key(question.category, question.question), [0.0, 0, 0])
+    entry[0] = time.time() if now is None else now
+    entry[1] += 1
+    entry[2] += is_correct
+
+
+class AdaptiveWeights:
+    """Selection weight of a question, computed on demand when the sampler draws it.
+
+    The weight is an error-rate estimate times a recency factor:
+
+    - error rate: everyone's misses from the answer statistics snapshot,
+      blended with the user's own misses when a `history` is given and has
+      the question (without one, weights are global); both are smoothed
+      towards 0.5 so unseen questions sit in the middle.
+    - recency: 1 - exp(-age / half_life), so a question answered moments ago
+      is rarely repeated and recovers over `half_life` seconds.
+
+    Updates are free: answering only changes `history`, and the global part
+    comes from whatever snapshot is current, both read on the next draw.
+    """
+
+    def __init__(self, bank: QuestionBank, snapshot: StatsSnapshot = EMPTY_SNAPSHOT,
+                 history: Optional[History] = None, half_life: float = 3600.0, now: Optional[float] = None):
+        self.bank = bank
+        self.snapshot = snapshot
+        self.history = history or {}
+        self.half_life = half_life
+        self.now = time.time() if now is None else now
+
+    @staticmethod
+    def _error_rate(attempts: float, correct: float) -> float:
+        return (attempts - correct + 1) / (attempts + 2)
+
+    def __call__(self, question_id: int) -> float:
+        question = self.bank[question_id]
+        key = question_key(question.category, question.question)
+        global_error = 0.5
+        stats = self.snapshot.questions.get(key)
+        if stats is not None:
+            global_error = self._error_rate(stats.attempts, stats.correct)
+
+        entry = self.history.get(key)
+        if entry is None:
+            return global_error
+        last_seen, attempts, correct = entry
+        user_error = self._error_rate(attempts, correct)
+        recency = 1.0 - math.exp(-max(0.0, self.now - last_seen) / self.half_life)
+        return (user_error + global_error) / 2 * recency
@@ -0,0 +1,239 @@
+"""
+Persistent answer statistics in an embedded SQLite database (WAL mode).
+
+Answers are queued in memory by the app and written in batches by a
+background thread, so a request never waits on disk. Reads are served from
+an immutable snapshot of the aggregate tables that the same thread refreshes
+periodically.
+"""
+
+import atexit
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS question_stats (
+    question_key TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    chose1 INTEGER NOT NULL DEFAULT 0,
+    chose2 INTEGER NOT NULL DEFAULT 0,
+    chose3 INTEGER NOT NULL DEFAULT 0,
+    chose4 INTEGER NOT NULL DEFAULT 0,
+    last_answered REAL
+);
+CREATE TABLE IF NOT EXISTS category_stats (
+    category TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_UPSERT_QUESTION = """
+INSERT INTO question_stats (question_key, category, attempts, correct, chose1, chose2, chose3, chose4, last_answered)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(question_key) DO UPDATE SET
+    attempts = attempts + excluded.attempts,
+    correct = correct + excluded.correct,
+    chose1 = chose1 + excluded.chose1,
+    chose2 = chose2 + excluded.chose2,
+    chose3 = chose3 + excluded.chose3,
+    chose4 = chose4 + excluded.chose4,
+    last_answered = excluded.last_answered
+"""
+
+_UPSERT_CATEGORY = """
+INSERT INTO category_stats (category, attempts, correct) VALUES (?, ?, ?)
+ON CONFLICT(category) DO UPDATE SET
+    attempts = attempts + excluded.attempts,
+    correct = correct + excluded.correct
+"""
+
+
+def question_key(category: str, question: str) -> str:
+    """Stable key of a question across bank rebuilds (IDs are positions and may change)."""
+    return hashlib.sha1(f"{category}\x1f{question}".encode('utf-8')).hexdigest()[:16]
+
+
+class QuestionStats(NamedTuple):
+    attempts: int
+    correct: int
+    choices: Tuple[int, int, int, int]  # how often each option was chosen
+    last_answered: Optional[float]
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        return self.correct / self.attempts if self.attempts else None
+
+
+class StatsSnapshot(NamedTuple):
+    """Read-only aggregate view; replaced as a whole on every refresh."""
+    questions: Dict[str, QuestionStats]
+    categories: Dict[str, Tuple[int, int]]  # category -> (attempts, correct)
+    taken_at: float
+
+    def question(self, category: str, question: str) -> Optional[QuestionStats]:
+        return self.questions.get(question_key(category, question))
+
+    def category_accuracy(self, category: str) -> Optional[float]:
+        attempts, correct = self.categories.get(category, (0, 0))
+        return correct / attempts if attempts else None
+
+
+EMPTY_SNAPSHOT = StatsSnapshot({}, {}, 0.0)
+
+
+class AnswerStatsStore:
+    """Batched, write-behind answer statistics with snapshot reads.
+
+    `record` only appends to an in-memory queue. A daemon thread drains it
+    every `flush_interval` seconds (or once `batch_size` answers are
+    waiting), folds the batch into per-question and per-category deltas and
+    applies them in one transaction. `snapshot` returns the last aggregate
+    view, refreshed every `snapshot_interval` seconds.
+
+    A failed write or refresh is reported and retried on the next round; at
+    most `max_pending` answers are held back meanwhile, and answers beyond
+    that are counted in `dropped` instead of growing memory without bound.
+    """
+
+    def __init__(self, db_path: str = ".quiz_stats.sqlite3", flush_interval: float = 1.0,
+                 batch_size: int = 500, snapshot_interval: float = 10.0, max_pending: int = 100_000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.snapshot_interval = snapshot_interval
+        self.max_pending = max_pending
+        self._queue: "queue.Queue[Tuple[str, str, int, bool, float]]" = queue.Queue(maxsize=max_pending)
+        self._snapshot = EMPTY_SNAPSHOT
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        # Guards the counters, which request threads and the writer thread update concurrently
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.batches = 0
+
+        # Create the schema up front so errors surface in the caller, not the writer thread
+        connection = self._connect()
+        self._refresh_snapshot(connection)
+        connection.close()
+
+        self._thread = threading.Thread(target=self._run, name="answer-stats-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def record(self, category: str, question: str, answer_index: int, correct_index: int) -> None:
+        """Queue one answer; never touches the database. Drops it if `max_pending` answers are queued."""
+        try:
+            self._queue.put_nowait((category, question, answer_index, answer_index == correct_index, time.time()))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            self._wake.set()
+            return
+        with self._lock:
+            self.recorded += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def snapshot(self) -> StatsSnapshot:
+        return self._snapshot
+
+    def _drain(self, batch):
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write(self, connection: sqlite3.Connection, batch) -> None:
+        questions: Dict[str, list] = {}
+        categories: Dict[str, list] = {}
+        for category, question, answer_index, is_correct, answered_at in batch:
+            key = question_key(category, question)
+            row = questions.setdefault(key, [key, category, 0, 0, 0, 0, 0, 0, answered_at])
+            row[2] += 1
+            row[3] += is_correct
+            if 0 <= answer_index < 4:
+                row[4 + answer_index] += 1
+            row[8] = max(row[8], answered_at)
+            totals = categories.setdefault(category, [category, 0, 0])
+            totals[1] += 1
+            totals[2] += is_correct
+        with connection:
+            connection.executemany(_UPSERT_QUESTION, questions.values())
+            connection.executemany(_UPSERT_CATEGORY, categories.values())
+        with self._lock:
+            self.flushed += len(batch)
+            self.batches += 1
+
+    def _refresh_snapshot(self, connection: sqlite3.Connection) -> None:
+        questions = {
+            key: QuestionStats(attempts, correct, (c1, c2, c3, c4), last_answered)
+            for key, attempts, correct, c1, c2, c3, c4, last_answered in connection.execute(
+                "SELECT question_key, attempts, correct, chose1, chose2, chose3, chose4, last_answered "
+                "FROM question_stats")
+        }
+        categories = {
+            category: (attempts, correct)
+            for category, attempts, correct in connection.execute(
+                "SELECT category, attempts, correct FROM category_stats")
+        }
+        self._snapshot = StatsSnapshot(questions, categories, time.time())
+
+    def _run(self) -> None:
+        connection = self._connect()
+        last_refresh = time.monotonic()
+        # Answers of failed writes, retried with the next batch
+        pending = []
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                # Read before draining, so the last round sees every answer queued before close()
+                closing = self._closed.is_set()
+                batch = self._drain(pending)
+                pending = []
+                if batch:
+                    try:
+                        self._write(connection, batch)
+                    except Exception as e:
+                        pending = batch[-self.max_pending:]
+                        with self._lock:
+                            self.dropped += len(batch) - len(pending)
+                        print(f"Failed to write {len(batch)} answer statistics, retrying: {e}")
+                if closing:
+                    if pending:
+                        print(f"Lost {len(pending)} answer statistics on shutdown")
+                    break
+                if time.monotonic() - last_refresh >= self.snapshot_interval:
+                    try:
+                        self._refresh_snapshot(connection)
+                        last_refresh = time.monotonic()
+                    except Exception as e:
+                        # Keep serving the previous snapshot and try again next round
+                        print(f"Failed to refresh answer statistics: {e}")
+        finally:
+            connection.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush queued answers and stop the writer thread."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._thread.join(timeout)
@@ -0,0 +1,15 @@
+"""
+Stateless JSON API serving quizzes from the shared question bank.
+
+    GET  /fields               fields with question counts
+    GET  /quiz?n=10&field=教育  draw a quiz (no answers included)
+    POST /score                {"version": ..., "answers": [{"id": 12, "answer": 0}, ...]}
+    GET  /health
+
+Run with `python -m manifest_quiz.api`.
+"""
+
+from manifest_quiz.api.server import serve, start_in_thread
+from manifest_quiz.api.service import QuizService
+
+__all__ = ["QuizService", "serve", "start_in_thread"]
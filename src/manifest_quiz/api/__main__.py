@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Run the quiz API server.
+"""
+
+import argparse
+import asyncio
+
+from manifest_quiz.api.server import MAX_BODY_BYTES, serve
+from manifest_quiz.api.service import QuizService
+from manifest_quiz.question_bank import QuestionBank
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve quizzes over a JSON HTTP API')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port (default: 8000)')
+    parser.add_argument('--csv', default='quiz_all_combined.csv', help='Combined quiz CSV')
+    parser.add_argument('--compiled', default='quiz_all_combined.qbank',
+                        help='Compiled bank, used instead of the CSV when it exists')
+    parser.add_argument('--max-body-bytes', type=int, default=MAX_BODY_BYTES,
+                        help=f'Reject request bodies larger than this (default: {MAX_BODY_BYTES})')
+    args = parser.parse_args()
+
+    bank = QuestionBank.load(args.csv, args.compiled)
+    print(f"Serving {len(bank)} questions (bank version {bank.version}) on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(QuizService(bank), args.host, args.port, max_body_bytes=args.max_body_bytes))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Minimal asyncio HTTP/1.1 server for the quiz API (standard library only).
+"""
+
+import asyncio
+import threading
+import traceback
+from http import HTTPStatus
+from typing import Optional, Tuple
+
+from manifest_quiz.api.service import QuizService
+
+MAX_BODY_BYTES = 64 * 1024
+# Methods whose requests carry a body and so must state its length
+_BODY_METHODS = {"POST", "PUT", "PATCH"}
+
+
+def _response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+def _content_length(method: str, headers: dict, max_body_bytes: int) -> Tuple[int, Optional[bytes]]:
+    """Body length of a request, or an error (status, JSON body) to reply with instead."""
+    value = headers.get("content-length")
+    if value is None:
+        if method in _BODY_METHODS:
+            return 400, b'{"error":"Content-Length required"}'
+        return 0, None
+    # int() would also accept signs, spaces, underscores and non-ASCII digits
+    if not (value.isascii() and value.isdigit()):
+        return 400, b'{"error":"invalid Content-Length"}'
+    length = int(value)
+    if length > max_body_bytes:
+        return 413, b'{"error":"request body too large"}'
+    return length, None
+
+
+async def _handle_connection(service: QuizService, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter, max_body_bytes: int = MAX_BODY_BYTES) -> None:
+    """Serve requests on one keep-alive connection until the client closes it."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head.decode('latin-1').split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(_response(400, b'{"error":"bad request"}', False))
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+
+            length, error = _content_length(method, headers, max_body_bytes)
+            if error is not None:
+                # The body cannot be skipped reliably, so the connection is closed
+                writer.write(_response(length, error, False))
+                return
+            body = await reader.readexactly(length) if length else b""
+
+            path, _, query = target.partition("?")
+            try:
+                status, payload = service.handle(method, path, query, body)
+            except Exception as e:
+                print(f"Error handling {method} {path}: {e}")
+                traceback.print_exc()
+                status, payload = 500, b'{"error":"internal server error"}'
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service: QuizService, host: str = "127.0.0.1", port: int = 8000,
+                ready: Optional[threading.Event] = None, bound: Optional[list] = None,
+                max_body_bytes: int = MAX_BODY_BYTES) -> None:
+    """Serve `service` forever. `bound`, if given, receives the (host, port) actually bound.
+
+    Request bodies over `max_body_bytes` are rejected with 413.
+    """
+    server = await asyncio.start_server(lambda r, w: _handle_connection(service, r, w, max_body_bytes),
+                                        host, port, reuse_address=True)
+    if bound is not None:
+        bound.append(server.sockets[0].getsockname()[:2])
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def start_in_thread(service: QuizService, host: str = "127.0.0.1", port: int = 0,
+                    max_body_bytes: int = MAX_BODY_BYTES) -> Tuple[str, int]:
+    """Run the server on a daemon thread (port 0 picks a free one); returns the bound address."""
+    ready = threading.Event()
+    bound: list = []
+    thread = threading.Thread(target=lambda: asyncio.run(serve(service, host, port, ready, bound, max_body_bytes)),
+                              daemon=True)
+    thread.start()
+    ready.wait()
+    return bound[0]
@@ -0,0 +1,144 @@
+"""
+Request handling for the quiz API, independent of the transport.
+
+`QuizService.handle` maps (method, path, query, body) to (status, JSON
+bytes), so it can be exercised directly without a socket.
+"""
+
+import json
+import random
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from manifest_quiz.question_bank import FIELD_MAPPING, QuestionBank
+
+MAX_QUESTIONS = 50
+
+Response = Tuple[int, bytes]
+
+
+def _json(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class APIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class QuizService:
+    """Stateless quiz endpoints over one shared, read-only QuestionBank.
+
+    The server keeps no sessions: /quiz returns question IDs and the bank
+    version, and /score looks the correct answers up by ID. A submission
+    against another bank version is rejected (409), since IDs are positions
+    and change when the bank is rebuilt.
+
+    Responses that do not depend on the request are serialized once: the
+    /fields body up front, and each question's public JSON the first time
+    it is drawn, so /quiz only joins cached fragments.
+    """
+
+    def __init__(self, bank: QuestionBank, rng: Optional[random.Random] = None):
+        self.bank = bank
+        self.rng = rng or random.Random()
+        self._question_json: Dict[int, bytes] = {}
+        self._fields_body = _json({
+            "version": bank.version,
+            "total": len(bank),
+            "fields": [
+                {"name": field, "count": bank.field_count(field), "categories": categories}
+                for field, categories in FIELD_MAPPING.items()
+            ],
+        })
+        self._version_json = _json(bank.version)
+        self._routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/fields"): self.fields,
+            ("GET", "/quiz"): self.quiz,
+            ("POST", "/score"): self.score,
+        }
+
+    def handle(self, method: str, path: str, query: str = "", body: bytes = b"") -> Response:
+        route = self._routes.get((method, path))
+        if route is None:
+            known_path = any(p == path for _, p in self._routes)
+            return (405 if known_path else 404), _json({"error": "method not allowed" if known_path else "not found"})
+        try:
+            return 200, route(query, body)
+        except APIError as e:
+            return e.status, _json({"error": str(e)})
+
+    def health(self, query: str, body: bytes) -> bytes:
+        return b'{"status":"ok"}'
+
+    def fields(self, query: str, body: bytes) -> bytes:
+        return self._fields_body
+
+    def _public_question(self, question_id: int) -> bytes:
+        cached = self._question_json.get(question_id)
+        if cached is None:
+            question = self.bank[question_id]
+            cached = _json({
+                "id": question.id,
+                "category": question.category,
+                "question": question.question,
+                "options": list(question.options),
+            })
+            # Racing threads may both serialize; the result is identical
+            self._question_json[question_id] = cached
+        return cached
+
+    def quiz(self, query: str, body: bytes) -> bytes:
+        params = parse_qs(query)
+        try:
+            num_questions = int(params.get("n", ["10"])[0])
+        except ValueError:
+            raise APIError(400, "n must be an integer")
+        if not 1 <= num_questions <= MAX_QUESTIONS:
+            raise APIError(400, f"n must be between 1 and {MAX_QUESTIONS}")
+        field = params.get("field", [None])[0]
+        if field is not None and field not in FIELD_MAPPING:
+            raise APIError(404, f"unknown field: {field}")
+
+        questions = self.bank.sample(num_questions, field, rng=self.rng)
+        return b''.join((
+            b'{"version":', self._version_json,
+            b',"questions":[', b','.join(self._public_question(q.id) for q in questions), b']}',
+        ))
+
+    def score(self, query: str, body: bytes) -> bytes:
+        try:
+            submission = json.loads(body or b"{}")
+            answers = submission["answers"]
+            pairs = [(int(a["id"]), int(a["answer"])) for a in answers]
+        except (ValueError, KeyError, TypeError):
+            raise APIError(400, 'body must be {"version": ..., "answers": [{"id": int, "answer": 0-3}, ...]}')
+        if submission.get("version") != self.bank.version:
+            raise APIError(409, "question bank has changed; draw a new quiz")
+
+        results: List[Dict[str, Any]] = []
+        category_correct: Dict[str, int] = {}
+        category_total: Dict[str, int] = {}
+        for question_id, answer in pairs:
+            if not 0 <= question_id < len(self.bank):
+                raise APIError(400, f"unknown question id: {question_id}")
+            question = self.bank[question_id]
+            is_correct = answer == question.correct
+            category_total[question.category] = category_total.get(question.category, 0) + 1
+            category_correct[question.category] = category_correct.get(question.category, 0) + is_correct
+            results.append({"id": question_id, "correct": is_correct, "correct_answer": question.correct,
+                            "explanation": question.explanation})
+
+        score = sum(category_correct.values())
+        return _json({
+            "score": score,
+            "total": len(pairs),
+            "categories": {
+                category: {"correct": category_correct[category], "total": total,
+                           "percentage": category_correct[category] / total * 100}
+                for category, total in category_total.items()
+            },
+            "results": results,
+        })
@@ -1,8 +1,18 @@
 import streamlit as st
 import random
-import pandas as pd
 import os
+import time
+from array import array
+from contextlib import contextmanager
 from pathlib import Path
+
+from streamlit.errors import StreamlitAPIException
+
+from manifest_quiz.adaptive import AdaptiveWeights, update_history
+from manifest_quiz.answer_stats import EMPTY_SNAPSHOT, AnswerStatsStore
+from manifest_quiz.bank_reloader import BankReloader
+from manifest_quiz.question_bank import FIELD_MAPPING, QuestionBank
+
 # ページ設定
 st.set_page_config(
     page_title="チームみらいマニフェスト クイズ（2025年5月30日時点版）",
@@ -10,60 +20,97 @@ st.set_page_config(
     layout="centered"
 )
 
-# 分野マッピング（ステップを統合）
-FIELD_MAPPING = {
-    "教育": ["ステップ１教育", "ステップ２教育", "ステップ３教育"],
-    "子育て": ["ステップ１子育て", "ステップ３子育て"],
-    "行政改革": ["ステップ１行政改革", "ステップ２行政改革"],
-    "産業": ["ステップ１産業", "ステップ３産業"],
-    "科学技術": ["ステップ１科学技術", "ステップ３科学技術"],
-    "医療": ["ステップ１医療", "ステップ２医療", "ステップ３医療"],
-    "経済財政": ["ステップ２経済財政", "ステップ３経済財政"],
-    "エネルギー": ["ステップ３エネルギー"],
-    "デジタル民主主義": ["ステップ１デジタル民主主義"],
-    "基本理念・政策": ["チームみらいのビジョン", "政策インデックス"],
-    "ステップ概要": ["ステップ１", "ステップ２", "ステップ３"],
-    "特別プラン・その他": ["100日プラン", "その他重要分野", "改善提案の反映方針"]
-}
-
 # クイズデータ
-@st.cache_data
+QUIZ_CSV_PATH = "quiz_all_combined.csv"
+COMPILED_BANK_PATH = "quiz_all_combined.qbank"
+# キーワード検索で返す最大件数
+SEARCH_RESULT_LIMIT = 50
+# 回答統計のSQLiteファイル（空文字で無効化）
+STATS_DB_PATH = os.getenv("QUIZ_STATS_DB", ".quiz_stats.sqlite3")
+
+@st.cache_resource
+def get_bank_reloader():
+    """問題バンクの監視役（プロセス全体で1つ）
+
+    コンパイル済みバンクがあればメモリマップで、なければCSVから読み込む。
+    ファイルの更新はバックグラウンドで検知・検証され、新しいバンクに差し替えられる。
+    """
+    return BankReloader(QUIZ_CSV_PATH, COMPILED_BANK_PATH)
+
 def load_quiz_data():
-    """CSVファイルからクイズ問題データを読み込む"""
+    """現在の問題バンク（プロセス全体で1つの読み取り専用オブジェクトを共有）
+
+    参照を読むだけなので、再読み込み中でも待たされない。
+    """
+    return get_bank_reloader().current()
+
+def get_quiz_data():
+    """問題バンクを取得（失敗時はキャッシュせずにフォールバックを返す）"""
     try:
-        csv_path = "quiz_all_combined.csv"
-        
-        # CSVファイルを読み込み
-        df = pd.read_csv(csv_path)
-        
-        # データを辞書形式に変換
-        quiz_data = {}
-        for _, row in df.iterrows():
-            category = row['category']
-            if category not in quiz_data:
-                quiz_data[category] = []
-            
-            question_dict = {
-                "question": row['question'],
-                "options": [row['option1'], row['option2'], row['option3'], row['option4']],
-                "correct": int(row['correct_answer']) - 1,  # CSVでは1-4、内部では0-3
-                "explanation": row['explanation']
-            }
-            quiz_data[category].append(question_dict)
-        
-        return quiz_data
-    
+        return load_quiz_data()
     except Exception as e:
         st.error(f"クイズデータの読み込みに失敗しました: {e}")
         # フォールバック: 最小限のデータを返す
-        return {
-            "エラー": [{
-                "question": "クイズデータの読み込みに失敗しました",
-                "options": ["再読み込みしてください", "", "", ""],
-                "correct": 0,
-                "explanation": "CSVファイルを確認してください"
-            }]
-        }
+        return QuestionBank.from_rows([
+            ["エラー", "クイズデータの読み込みに失敗しました", "再読み込みしてください", "", "", "", "1",
+             "CSVファイルを確認してください"]
+        ])
+
+@st.cache_resource
+def get_stats_store():
+    """回答統計ストア（プロセス全体で1つ。書き込みはバックグラウンドでまとめて行う）"""
+    if not STATS_DB_PATH:
+        return None
+    try:
+        return AnswerStatsStore(STATS_DB_PATH)
+    except Exception as e:
+        st.warning(f"回答統計を記録できません: {e}")
+        return None
+
+def get_stats_snapshot():
+    """回答統計の集計スナップショット（定期的に更新されるメモリ上のコピー）"""
+    store = get_stats_store()
+    return store.snapshot() if store is not None else EMPTY_SNAPSHOT
+
+def is_debug_mode():
+    """デバッグ表示の有無（環境変数 QUIZ_DEBUG=1 または URL の ?debug=1）"""
+    return os.getenv("QUIZ_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+@contextmanager
+def rerun_timer(scope):
+    """デバッグモードで、スクリプト全体またはフラグメントの再実行時間を計測して表示"""
+    if not is_debug_mode():
+        yield
+        return
+    
+    start = time.perf_counter()
+    timings = st.session_state.setdefault('rerun_timings', {})
+    
+    def record():
+        count, _ = timings.get(scope, (0, 0.0))
+        timings[scope] = (count + 1, (time.perf_counter() - start) * 1000)
+    
+    try:
+        yield
+    except BaseException:
+        # st.rerun() による中断も1回の実行として記録する
+        record()
+        raise
+    record()
+    st.caption("⏱️ " + " / ".join(
+        f"{name}: {elapsed:.1f}ms (#{count})" for name, (count, elapsed) in timings.items()
+    ))
+
+def rerun_fragment():
+    """呼び出し元のフラグメントだけを再実行
+
+    フラグメントはアプリ全体の実行中にも描画される。その場合（テストハーネス経由など）は
+    フラグメント単位の再実行が使えないため、アプリ全体を再実行する。
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
 
 def initialize_session_state():
     """セッション状態を初期化"""
@@ -73,10 +120,16 @@ def initialize_session_state():
         st.session_state.current_question = 0
     if 'score' not in st.session_state:
         st.session_state.score = 0
-    if 'quiz_questions' not in st.session_state:
-        st.session_state.quiz_questions = []
-    if 'user_answers' not in st.session_state:
-        st.session_state.user_answers = []
+    if 'quiz_ids' not in st.session_state:
+        # 出題する問題のID（問題本体は共有バンクから参照する）
+        st.session_state.quiz_ids = array('I')
+    if 'answers' not in st.session_state:
+        # 回答した選択肢の番号（0-3）
+        st.session_state.answers = bytearray()
+    if 'category_correct' not in st.session_state:
+        st.session_state.category_correct = {}
+    if 'category_total' not in st.session_state:
+        st.session_state.category_total = {}
     if 'quiz_completed' not in st.session_state:
         st.session_state.quiz_completed = False
     if 'selected_mode' not in st.session_state:
@@ -85,52 +138,129 @@ def initialize_session_state():
         st.session_state.selected_field = None
     if 'answer_shown' not in st.session_state:
         st.session_state.answer_shown = False
+    if 'question_history' not in st.session_state:
+        # アダプティブ出題用の回答履歴（問題キー -> [最終回答時刻, 回答数, 正解数]）
+        st.session_state.question_history = {}
 
-def generate_quiz_questions(quiz_data, num_questions=10, selected_field=None):
-    """クイズ問題を生成（全問題またはフィールド別）"""
-    all_questions = []
-    
-    if selected_field and selected_field in FIELD_MAPPING:
-        # 特定分野の問題のみ
-        target_categories = FIELD_MAPPING[selected_field]
-        for category in target_categories:
-            if category in quiz_data:
-                for q in quiz_data[category]:
-                    q['category'] = category
-                    all_questions.append(q)
-    else:
+def generate_quiz_questions(quiz_data, num_questions=10, selected_field=None, adaptive=False):
+    """クイズ問題を生成（全問題またはフィールド別）
+
+    読み込み時に作った分野インデックスから、出題数に比例するコストで抽出する。
+    adaptive=True の場合は、間違えやすく最近出題されていない問題ほど選ばれやすくする。
+    """
+    if selected_field not in FIELD_MAPPING:
         # 全問題からランダム
-        for category, questions in quiz_data.items():
-            for q in questions:
-                q['category'] = category
-                all_questions.append(q)
+        selected_field = None
+    weight = None
+    if adaptive:
+        weight = AdaptiveWeights(quiz_data, get_stats_snapshot(), st.session_state.question_history)
+    return quiz_data.sample(num_questions, selected_field, weight=weight)
+
+def start_quiz(questions, quiz_data):
+    """出題する問題IDと問題バンクのバージョンをセッションに保存してクイズを開始"""
+    st.session_state.quiz_ids = array('I', (q.id for q in questions))
+    st.session_state.bank_version = quiz_data.version
+    st.session_state.quiz_started = True
+
+def get_session_bank(quiz_data):
+    """クイズ開始時の問題バンク（出題中に再読み込みされても同じ内容を参照し続ける）
+
+    開始時のバージョンがすでに保持されていなければ None を返す。
+    """
+    version = st.session_state.get('bank_version')
+    if version is None or version == quiz_data.version:
+        return quiz_data
+    try:
+        return get_bank_reloader().get(version)
+    except Exception:
+        return None
+
+def search_questions(quiz_data, query, limit=SEARCH_RESULT_LIMIT):
+    """問題文・選択肢・解説をキーワード検索（転置インデックスはバックグラウンドで作成済み。起動直後で未完成ならその場で作る）"""
+    start = time.perf_counter()
+    hits = quiz_data.search(query, limit)
+    if is_debug_mode():
+        st.caption(f"⏱️ 検索: {(time.perf_counter() - start) * 1000:.2f}ms")
+    return hits
+
+def search_section(quiz_data):
+    """キーワード検索と、検索結果からのクイズ開始"""
+    st.write("### 🔍 キーワードで問題を探す")
+    query = st.text_input("キーワード", key="search_query", placeholder="例: AI家庭教師",
+                          help="問題文・選択肢・解説から検索します（2文字以上）")
+    if not query or not query.strip():
+        return
+    
+    hits = search_questions(quiz_data, query)
+    if not hits:
+        st.write("該当する問題が見つかりませんでした。")
+        return
+    
+    more = "（関連度の高い上位のみ）" if len(hits) == SEARCH_RESULT_LIMIT else ""
+    st.write(f"**{len(hits)}件**の問題が見つかりました{more}")
+    for rank, hit in enumerate(hits[:10], 1):
+        question = quiz_data[hit.id]
+        st.write(f"{rank}. {question.question}（{question.category}）")
+    if len(hits) > 10:
+        with st.expander(f"残りの{len(hits) - 10}件を見る"):
+            for rank, hit in enumerate(hits[10:], 11):
+                question = quiz_data[hit.id]
+                st.write(f"{rank}. {question.question}（{question.category}）")
+    
+    # 関連度の高い順に出題数ぶん選び、出題順はシャッフルする
+    options = sorted({n for n in (5, 10, 20) if n < len(hits)} | {min(len(hits), 20)})
+    num_questions = st.selectbox("出題数を選択してください", options=options, index=len(options) - 1,
+                                 key="search_num_questions")
+    if st.button("検索結果からクイズを始める", type="primary"):
+        questions = [quiz_data[hit.id] for hit in hits[:num_questions]]
+        random.shuffle(questions)
+        start_quiz(questions, quiz_data)
+        st.rerun()
+
+def reset_quiz():
+    """クイズの進行状態を消去してスタート画面に戻す"""
+    for key in ['quiz_started', 'current_question', 'score', 'quiz_ids', 'answers', 'category_correct', 'category_total', 'quiz_completed', 'selected_mode', 'selected_field', 'answer_shown', 'bank_version']:
+        if key in st.session_state:
+            del st.session_state[key]
+
+def record_answer(question_data, answer_index):
+    """回答を保存し、総合スコアとカテゴリ別スコアをその場で更新"""
+    st.session_state.answers.append(answer_index)
+    category = question_data.category
+    is_correct = answer_index == question_data.correct
     
-    # 問題数が足りない場合は全問題を使用
-    if len(all_questions) <= num_questions:
-        return random.shuffle(all_questions) or all_questions
+    st.session_state.category_total[category] = st.session_state.category_total.get(category, 0) + 1
+    st.session_state.category_correct[category] = st.session_state.category_correct.get(category, 0) + is_correct
+    if is_correct:
+        st.session_state.score += 1
+    update_history(st.session_state.question_history, question_data, is_correct)
     
-    return random.sample(all_questions, num_questions)
+    # 全体の回答統計に記録（キューに積むだけでディスクには触れない）
+    store = get_stats_store()
+    if store is not None:
+        store.record(category, question_data.question, answer_index, question_data.correct)
 
 def display_question(question_data, question_num, total_questions):
     """問題を表示"""
     st.subheader(f"問題 {question_num + 1} / {total_questions}")
-    st.write(f"**カテゴリ**: {question_data['category']}")
+    st.write(f"**カテゴリ**: {question_data.category}")
     st.write("---")
     
-    st.write(f"### {question_data['question']}")
+    st.write(f"### {question_data.question}")
     
-    # 選択肢を表示
+    # 選択肢を表示（戻り値は選択肢の番号）
     user_answer = st.radio(
         "選択してください:",
-        question_data['options'],
+        range(len(question_data.options)),
+        format_func=lambda i: question_data.options[i],
         key=f"q_{question_num}",
         disabled=st.session_state.answer_shown
     )
     
     # 答えが表示されている場合は正解と解説を表示
     if st.session_state.answer_shown:
-        correct_answer = question_data['options'][question_data['correct']]
-        is_correct = user_answer == correct_answer
+        correct_answer = question_data.options[question_data.correct]
+        is_correct = user_answer == question_data.correct
         
         st.write("---")
         
@@ -140,32 +270,20 @@ def display_question(question_data, question_num, total_questions):
             st.error(f"❌ 不正解")
             st.info(f"正解は: **{correct_answer}**")
         
-        st.write(f"**解説**: {question_data['explanation']}")
+        st.write(f"**解説**: {question_data.explanation}")
     
     return user_answer
 
-def calculate_category_scores(user_answers, quiz_questions):
-    """カテゴリ別のスコアを計算"""
-    category_scores = {}
-    category_totals = {}
-    
-    for i, (answer, question) in enumerate(zip(user_answers, quiz_questions)):
-        category = question['category']
-        
-        if category not in category_scores:
-            category_scores[category] = 0
-            category_totals[category] = 0
-        
-        category_totals[category] += 1
-        if answer == question['options'][question['correct']]:
-            category_scores[category] += 1
+def calculate_category_scores(category_correct, category_totals):
+    """カテゴリ別のスコアを計算（回答ごとに更新済みの集計から）"""
+    category_scores = dict(category_correct)
     
     # パーセンテージに変換
     category_percentages = {}
-    for category in category_scores:
-        category_percentages[category] = (category_scores[category] / category_totals[category]) * 100
+    for category, total in category_totals.items():
+        category_percentages[category] = (category_scores.get(category, 0) / total) * 100
     
-    return category_percentages, category_scores, category_totals
+    return category_percentages, category_scores, dict(category_totals)
 
 def get_recommendation_message(category_percentages):
     """スコアに基づいておすすめメッセージを生成"""
@@ -195,14 +313,108 @@ def get_recommendation_message(category_percentages):
     
     return recommendations
 
+@st.fragment
+def quiz_fragment(quiz_data):
+    """出題・回答のフラグメント（ボタン操作ではヘッダーやデータ読み込みを再実行しない）"""
+    with rerun_timer("quiz"):
+        current_q = st.session_state.current_question
+        total_q = len(st.session_state.quiz_ids)
+        
+        if current_q < total_q:
+            question_data = quiz_data[st.session_state.quiz_ids[current_q]]
+            user_answer = display_question(question_data, current_q, total_q)
+            
+            col1, col2, col3 = st.columns([1, 2, 1])
+            
+            with col2:
+                if not st.session_state.answer_shown:
+                    # 回答確定ボタン
+                    if st.button("回答を確定", type="primary", use_container_width=True):
+                        st.session_state.answer_shown = True
+                        rerun_fragment()
+                else:
+                    # 次の問題へボタン
+                    next_button_text = "次の問題へ" if current_q < total_q - 1 else "結果を見る"
+                    if st.button(next_button_text, type="primary", use_container_width=True):
+                        # 回答を保存し、スコアを更新
+                        record_answer(question_data, user_answer)
+                        
+                        st.session_state.current_question += 1
+                        st.session_state.answer_shown = False  # 次の問題用にリセット
+                        
+                        # 最後の問題の場合は結果画面へ（アプリ全体を再実行）
+                        if st.session_state.current_question >= total_q:
+                            st.session_state.quiz_completed = True
+                            st.rerun()
+                        
+                        rerun_fragment()
+
+@st.fragment
+def results_fragment(quiz_data):
+    """結果画面のフラグメント"""
+    with rerun_timer("results"):
+        st.write("## 🎉 クイズ完了！")
+        
+        total_score = st.session_state.score
+        total_questions = len(st.session_state.quiz_ids)
+        percentage = (total_score / total_questions) * 100
+        
+        # 総合スコア表示
+        st.metric("総合スコア", f"{total_score}/{total_questions} ({percentage:.1f}%)")
+        
+        # カテゴリ別スコア
+        category_percentages, category_scores, category_totals = calculate_category_scores(
+            st.session_state.category_correct, st.session_state.category_total
+        )
+        
+        st.write("### 📊 カテゴリ別スコア")
+        stats = get_stats_snapshot()
+        for category, percentage in category_percentages.items():
+            score = category_scores[category]
+            total = category_totals[category]
+            overall = stats.category_accuracy(category)
+            overall_text = f"（全体の正答率: {overall * 100:.1f}%）" if overall is not None else ""
+            st.write(f"**{category}**: {score}/{total} ({percentage:.1f}%){overall_text}")
+        
+        # おすすめメッセージ
+        st.write("### 💡 おすすめの学習ポイント")
+        recommendations = get_recommendation_message(category_percentages)
+        for rec in recommendations:
+            st.write(rec)
+        
+        # 詳細結果（オプション）
+        with st.expander("📝 詳細な解答結果を見る"):
+            for i, (question_id, answer_index) in enumerate(zip(st.session_state.quiz_ids, st.session_state.answers)):
+                question = quiz_data[question_id]
+                correct_answer = question.options[question.correct]
+                is_correct = answer_index == question.correct
+                
+                st.write(f"**問題 {i+1}**: {question.question}")
+                st.write(f"あなたの回答: {question.options[answer_index]} {'✅' if is_correct else '❌'}")
+                if not is_correct:
+                    st.write(f"正解: {correct_answer}")
+                question_stats = stats.question(question.category, question.question)
+                if question_stats is not None and question_stats.attempts:
+                    st.write(f"全体の正答率: {question_stats.accuracy * 100:.1f}%（{question_stats.attempts}回回答）")
+                st.write(f"解説: {question.explanation}")
+                st.write("---")
+        
+        # リセットボタン
+        if st.button("もう一度挑戦する", type="secondary"):
+            reset_quiz()
+            st.rerun()
+
 def main():
     initialize_session_state()
-    quiz_data = load_quiz_data()
+    quiz_data = get_quiz_data()
     
     # ヘッダー
     st.title("🚀 マニフェスト クイズ")
     st.markdown("---")
     
+    # 出題中のクイズは開始時のバージョンの問題バンクを使う
+    session_bank = get_session_bank(quiz_data)
+    
     if not st.session_state.quiz_started:
         # スタート画面
         st.write("### クイズについて")
@@ -238,7 +450,7 @@ def main():
                 col = cols[i % 2]
                 with col:
                     # 各分野の問題数を表示
-                    question_count = sum(len(quiz_data.get(cat, [])) for cat in FIELD_MAPPING[field])
+                    question_count = quiz_data.field_count(field)
                     if st.button(f"{field} ({question_count}問)", use_container_width=True):
                         st.session_state.selected_field = field
                         st.rerun()
@@ -247,7 +459,7 @@ def main():
                 st.write(f"**選択された分野**: {st.session_state.selected_field}")
                 
                 # 問題数選択
-                question_count = sum(len(quiz_data.get(cat, [])) for cat in FIELD_MAPPING[st.session_state.selected_field])
+                question_count = quiz_data.field_count(st.session_state.selected_field)
                 max_questions = min(question_count, 20)
                 
                 num_questions = st.selectbox(
@@ -256,9 +468,12 @@ def main():
                     index=1 if max_questions > 10 else 0
                 )
                 
+                adaptive = st.checkbox("苦手な問題を優先して出題する", key="adaptive_field",
+                                       help="間違えやすい問題・しばらく出題されていない問題が選ばれやすくなります")
+                
                 if st.button("この設定でクイズを始める", type="primary"):
-                    st.session_state.quiz_started = True
-                    st.session_state.quiz_questions = generate_quiz_questions(quiz_data, num_questions, st.session_state.selected_field)
+                    start_quiz(generate_quiz_questions(quiz_data, num_questions, st.session_state.selected_field,
+                                                       adaptive), quiz_data)
                     st.rerun()
         
         # ランダム出題の場合
@@ -271,102 +486,37 @@ def main():
                 index=0
             )
             
+            adaptive = st.checkbox("苦手な問題を優先して出題する", key="adaptive_random",
+                                   help="間違えやすい問題・しばらく出題されていない問題が選ばれやすくなります")
+            
             if st.button("ランダムクイズを始める", type="primary"):
-                st.session_state.quiz_started = True
-                st.session_state.quiz_questions = generate_quiz_questions(quiz_data, num_questions)
+                start_quiz(generate_quiz_questions(quiz_data, num_questions, adaptive=adaptive), quiz_data)
                 st.rerun()
         
         # 利用可能な分野一覧を表示
         if st.session_state.selected_mode is None:
             st.write("### 📖 利用可能な分野")
             for field, categories in FIELD_MAPPING.items():
-                question_count = sum(len(quiz_data.get(cat, [])) for cat in categories)
+                question_count = quiz_data.field_count(field)
                 st.write(f"• **{field}**: {question_count}問 ({', '.join(categories)})")
+        
+        # キーワード検索
+        search_section(quiz_data)
+    
+    elif session_bank is None:
+        # 開始時の問題バンクが破棄されている（長時間放置中に複数回更新された場合など）
+        st.warning("問題データが更新されたため、クイズをリセットしました。もう一度始めてください。")
+        reset_quiz()
+        if st.button("スタート画面に戻る", type="primary"):
+            st.rerun()
     
     elif not st.session_state.quiz_completed:
-        # クイズ実行中
-        current_q = st.session_state.current_question
-        total_q = len(st.session_state.quiz_questions)
-        
-        if current_q < total_q:
-            question_data = st.session_state.quiz_questions[current_q]
-            user_answer = display_question(question_data, current_q, total_q)
-            
-            col1, col2, col3 = st.columns([1, 2, 1])
-            
-            with col2:
-                if not st.session_state.answer_shown:
-                    # 回答確定ボタン
-                    if st.button("回答を確定", type="primary", use_container_width=True):
-                        st.session_state.answer_shown = True
-                        st.rerun()
-                else:
-                    # 次の問題へボタン
-                    next_button_text = "次の問題へ" if current_q < total_q - 1 else "結果を見る"
-                    if st.button(next_button_text, type="primary", use_container_width=True):
-                        # 回答を保存
-                        st.session_state.user_answers.append(user_answer)
-                        
-                        # 正解チェック
-                        if user_answer == question_data['options'][question_data['correct']]:
-                            st.session_state.score += 1
-                        
-                        st.session_state.current_question += 1
-                        st.session_state.answer_shown = False  # 次の問題用にリセット
-                        
-                        # 最後の問題の場合
-                        if st.session_state.current_question >= total_q:
-                            st.session_state.quiz_completed = True
-                        
-                        st.rerun()
-        
+        # クイズ実行中（回答操作ではこのフラグメントだけが再実行される）
+        quiz_fragment(session_bank)
+    
     else:
         # 結果画面
-        st.write("## 🎉 クイズ完了！")
-        
-        total_score = st.session_state.score
-        total_questions = len(st.session_state.quiz_questions)
-        percentage = (total_score / total_questions) * 100
-        
-        # 総合スコア表示
-        st.metric("総合スコア", f"{total_score}/{total_questions} ({percentage:.1f}%)")
-        
-        # カテゴリ別スコア
-        category_percentages, category_scores, category_totals = calculate_category_scores(
-            st.session_state.user_answers, st.session_state.quiz_questions
-        )
-        
-        st.write("### 📊 カテゴリ別スコア")
-        for category, percentage in category_percentages.items():
-            score = category_scores[category]
-            total = category_totals[category]
-            st.write(f"**{category}**: {score}/{total} ({percentage:.1f}%)")
-        
-        # おすすめメッセージ
-        st.write("### 💡 おすすめの学習ポイント")
-        recommendations = get_recommendation_message(category_percentages)
-        for rec in recommendations:
-            st.write(rec)
-        
-        # 詳細結果（オプション）
-        with st.expander("📝 詳細な解答結果を見る"):
-            for i, (question, user_answer) in enumerate(zip(st.session_state.quiz_questions, st.session_state.user_answers)):
-                correct_answer = question['options'][question['correct']]
-                is_correct = user_answer == correct_answer
-                
-                st.write(f"**問題 {i+1}**: {question['question']}")
-                st.write(f"あなたの回答: {user_answer} {'✅' if is_correct else '❌'}")
-                if not is_correct:
-                    st.write(f"正解: {correct_answer}")
-                st.write(f"解説: {question['explanation']}")
-                st.write("---")
-        
-        # リセットボタン
-        if st.button("もう一度挑戦する", type="secondary"):
-            for key in ['quiz_started', 'current_question', 'score', 'quiz_questions', 'user_answers', 'quiz_completed', 'selected_mode', 'selected_field', 'answer_shown']:
-                if key in st.session_state:
-                    del st.session_state[key]
-            st.rerun()
+        results_fragment(session_bank)
 
     # フッター
     st.markdown("---")
@@ -374,4 +524,5 @@ def main():
     st.write("📖 [マニフェスト詳細](https://policy.team-mir.ai/view/README.md)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with rerun_timer("app"):
+        main()
\ No newline at end of file
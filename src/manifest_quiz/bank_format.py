@@ -0,0 +1,240 @@
+"""
+Compiled, memory-mappable question bank format.
+
+Layout (little-endian, every section 4-byte aligned):
+
+    header            magic "MQBK", format version, fields per question,
+                      question count, category count, bank version, CRC32,
+                      source CSV size, mtime (ns) and content digest
+    category offsets  u32[categories + 1]   category names in the string blob
+    category ranges   u32[categories] first question, u32[categories] count
+    category column   u16[questions]        interned category index
+    answer column     u8[questions]         correct option, 0-3
+    string offsets    u32[questions * fields + 1]
+    string blob       UTF-8 text
+
+Questions are stored grouped by category, so each category is a contiguous
+ID range. Readers map the file read-only and decode strings only when a
+question is accessed, so startup cost and private memory do not grow with
+the bank and several processes share the same page-cache pages.
+
+The header records which combined CSV the bank was compiled from, so
+readers can tell a bank left behind by a CSV-only rebuild from a current one.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+MAGIC = b"MQBK"
+FORMAT_VERSION = 2
+
+# String fields stored per question, in order
+STRING_FIELDS = ("question", "option1", "option2", "option3", "option4", "explanation", "source_section")
+
+_HEADER = struct.Struct("<4sHHIIQIQQQ")
+
+
+class BankFormatError(ValueError):
+    """Raised when a compiled bank file is malformed or of an unsupported version."""
+
+
+def content_digest(path: str) -> int:
+    """53-bit digest of a file's bytes (sha256 prefix; 53 bits fit a JSON number exactly)."""
+    with open(path, 'rb') as f:
+        return int.from_bytes(hashlib.file_digest(f, 'sha256').digest()[:8], 'little') >> 11
+
+
+def _align(offset: int) -> int:
+    return (offset + 3) & ~3
+
+
+def _layout(num_questions: int, num_categories: int) -> Dict[str, int]:
+    """Byte offsets of every section, derived from the counts in the header."""
+    offsets = {}
+    pos = _HEADER.size
+    for name, size in (
+        ("category_offsets", 4 * (num_categories + 1)),
+        ("category_first", 4 * num_categories),
+        ("category_count", 4 * num_categories),
+        ("category_ids", 2 * num_questions),
+        ("answers", num_questions),
+        ("string_offsets", 4 * (num_questions * len(STRING_FIELDS) + 1)),
+    ):
+        pos = _align(pos)
+        offsets[name] = pos
+        pos += size
+    offsets["strings"] = _align(pos)
+    return offsets
+
+
+def compile_bank(rows: Iterable[List[str]], output_path: str, bank_version: Optional[int] = None,
+                 source_path: Optional[str] = None) -> int:
+    """Compile quiz rows (combined CSV column order) into a bank file; returns the question count.
+
+    Rows are grouped by category in order of first appearance. Rows whose
+    correct_answer is not 1-4 cannot be served and are left out. Pass the
+    combined CSV the rows were written to as `source_path` so readers can
+    check that the bank is still current; its content digest then becomes
+    the bank version, the same one `QuestionBank.load` gives the CSV.
+    """
+    grouped: Dict[str, List[List[str]]] = {}
+    for row in rows:
+        if len(row) >= 8 and row[6].strip() in ("1", "2", "3", "4"):
+            grouped.setdefault(row[0], []).append(row)
+    categories = list(grouped)
+    ordered = [row for category in categories for row in grouped[category]]
+    num_questions = len(ordered)
+
+    blob = bytearray()
+    category_offsets = [0]
+    for category in categories:
+        blob += category.encode('utf-8')
+        category_offsets.append(len(blob))
+
+    category_first, category_count = [], []
+    for category in categories:
+        category_first.append(sum(category_count))
+        category_count.append(len(grouped[category]))
+
+    if len(categories) > 0xFFFF:
+        raise BankFormatError("too many categories for a u16 category column")
+    index = {category: i for i, category in enumerate(categories)}
+
+    category_ids, answers, string_offsets = [], bytearray(), [len(blob)]
+    for row in ordered:
+        category_ids.append(index[row[0]])
+        answers.append(int(row[6]) - 1)  # CSVでは1-4、内部では0-3
+        fields = [row[1], row[2], row[3], row[4], row[5], row[7], row[8] if len(row) > 8 else ""]
+        for text in fields:
+            blob += text.encode('utf-8')
+            string_offsets.append(len(blob))
+
+    layout = _layout(num_questions, len(categories))
+    body = bytearray(layout["strings"] - _HEADER.size + len(blob))
+
+    def put(section: str, data: bytes) -> None:
+        start = layout[section] - _HEADER.size
+        body[start:start + len(data)] = data
+
+    put("category_offsets", struct.pack(f"<{len(category_offsets)}I", *category_offsets))
+    put("category_first", struct.pack(f"<{len(category_first)}I", *category_first))
+    put("category_count", struct.pack(f"<{len(category_count)}I", *category_count))
+    put("category_ids", struct.pack(f"<{num_questions}H", *category_ids))
+    put("answers", bytes(answers))
+    put("string_offsets", struct.pack(f"<{len(string_offsets)}I", *string_offsets))
+    put("strings", bytes(blob))
+
+    source_size = source_mtime_ns = source_digest = 0
+    if source_path:
+        stat = os.stat(source_path)
+        source_size, source_mtime_ns, source_digest = stat.st_size, stat.st_mtime_ns, content_digest(source_path)
+    if bank_version is None:
+        # Same version as the bank loaded from the source CSV; without one, a digest of the payload
+        bank_version = source_digest or int.from_bytes(hashlib.sha256(body).digest()[:8], 'little') >> 11
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(STRING_FIELDS), num_questions, len(categories),
+                          bank_version, zlib.crc32(body), source_size, source_mtime_ns, source_digest)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, output_path)
+    return num_questions
+
+
+class MappedBank:
+    """Read-only, memory-mapped view of a compiled question bank.
+
+    Opening only reads the header and the small tables, so it costs the same
+    for any bank size. With `verify`, the whole payload is also checked
+    against the header checksum; the serving path leaves that to whoever
+    wrote the file (combine_quizzes.py verifies after compiling).
+    """
+
+    def __init__(self, path: str, verify: bool = False):
+        self.path = path
+        with open(path, 'rb') as f:
+            # mmap refuses empty files with a plain ValueError
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise BankFormatError(f"{path}: file too small")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, format_version, num_fields, self.num_questions, num_categories,
+         self.version, self.checksum, self.source_size, self.source_mtime_ns,
+         self.source_digest) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise BankFormatError(f"{path}: not a compiled question bank")
+        if format_version != FORMAT_VERSION or num_fields != len(STRING_FIELDS):
+            raise BankFormatError(f"{path}: unsupported bank format version {format_version}")
+        if verify and not self.verify():
+            raise BankFormatError(f"{path}: checksum mismatch")
+
+        layout = _layout(self.num_questions, num_categories)
+        if layout["strings"] > len(self._mmap):
+            raise BankFormatError(f"{path}: truncated")
+        view = memoryview(self._mmap)
+
+        def column(section: str, fmt: str, count: int):
+            start = layout[section]
+            return view[start:start + count * struct.calcsize(fmt)].cast(fmt)
+
+        self._category_ids = column("category_ids", "H", self.num_questions)
+        self._answers = column("answers", "B", self.num_questions)
+        self._string_offsets = column("string_offsets", "I", self.num_questions * len(STRING_FIELDS) + 1)
+        self._strings = view[layout["strings"]:]
+        if self._string_offsets[-1] > len(self._strings):
+            raise BankFormatError(f"{path}: truncated")
+
+        # The category table is tiny; decode it eagerly
+        category_offsets = column("category_offsets", "I", num_categories + 1)
+        first = column("category_first", "I", num_categories)
+        count = column("category_count", "I", num_categories)
+        self.categories = tuple(
+            bytes(self._strings[category_offsets[i]:category_offsets[i + 1]]).decode('utf-8')
+            for i in range(num_categories)
+        )
+        self.category_ranges = {
+            category: range(first[i], first[i] + count[i]) for i, category in enumerate(self.categories)
+        }
+
+    def verify(self) -> bool:
+        """Check the payload against the header checksum."""
+        return zlib.crc32(memoryview(self._mmap)[_HEADER.size:]) == self.checksum
+
+    def built_from(self, csv_path: str) -> bool:
+        """Whether this bank was compiled from the current contents of `csv_path`.
+
+        Size and mtime matching the header is enough; otherwise (a copy, a
+        touch) the file's digest decides. Banks compiled without a source
+        fall back to comparing modification times.
+        """
+        stat = os.stat(csv_path)
+        if not self.source_size and not self.source_mtime_ns:
+            return os.path.getmtime(self.path) >= stat.st_mtime
+        if (stat.st_size, stat.st_mtime_ns) == (self.source_size, self.source_mtime_ns):
+            return True
+        return stat.st_size == self.source_size and content_digest(csv_path) == self.source_digest
+
+    def __len__(self) -> int:
+        return self.num_questions
+
+    def _string(self, index: int) -> str:
+        start, end = self._string_offsets[index], self._string_offsets[index + 1]
+        return bytes(self._strings[start:end]).decode('utf-8')
+
+    def question(self, question_id: int) -> Dict[str, Any]:
+        """Decode one question into the app's question dict shape."""
+        base = question_id * len(STRING_FIELDS)
+        question, o1, o2, o3, o4, explanation, source_section = (
+            self._string(base + i) for i in range(len(STRING_FIELDS))
+        )
+        return {
+            "category": self.categories[self._category_ids[question_id]],
+            "question": question,
+            "options": [o1, o2, o3, o4],
+            "correct": self._answers[question_id],
+            "explanation": explanation,
+            "source_section": source_section,
+        }
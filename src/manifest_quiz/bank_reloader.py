@@ -0,0 +1,129 @@
+"""
+Background hot reload of the question bank.
+
+A poller thread stats the bank files every few seconds. When their mtime or
+size changes, it builds the new bank and its search index off the request
+path, validates it and swaps it in with a single reference assignment, so
+readers never block and never see a half-built bank. Recent versions stay
+reachable by version, so a quiz started on one bank finishes on it. Only the
+first bank is served before its index exists: the caller's startup load
+skips it, and the poller thread builds it as its first step.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from manifest_quiz.question_bank import FIELD_MAPPING, QuestionBank
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def load_bank(csv_path: str, compiled_path: Optional[str] = None) -> QuestionBank:
+    """Load the compiled bank if it was built from the current CSV, else the CSV.
+
+    A CSV-only rebuild leaves the compiled bank untouched but changes the
+    CSV's signature, so the poller reloads and this picks up the CSV.
+    """
+    return QuestionBank.load(csv_path, compiled_path)
+
+
+def validate_bank(bank: QuestionBank) -> None:
+    """Reject banks that would break the app: empty, or with questions that do not decode."""
+    if len(bank) == 0:
+        raise ValueError("bank has no questions")
+    if not any(bank.field_count(field) for field in FIELD_MAPPING):
+        raise ValueError("no question belongs to any field")
+    for question_id in {0, len(bank) // 2, len(bank) - 1}:
+        question = bank[question_id]
+        if len(question.options) != 4 or not 0 <= question.correct < 4:
+            raise ValueError(f"question {question_id} is malformed")
+
+
+class BankReloader:
+    """Holds the current QuestionBank and swaps in a rebuilt one when its files change."""
+
+    def __init__(self, csv_path: str, compiled_path: Optional[str] = None, poll_interval: float = 5.0,
+                 keep_versions: int = 4, loader: Callable[[str, Optional[str]], QuestionBank] = load_bank):
+        self.csv_path = csv_path
+        self.compiled_path = compiled_path
+        self.poll_interval = poll_interval
+        self.keep_versions = keep_versions
+        self.loader = loader
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._versions: "OrderedDict[object, QuestionBank]" = OrderedDict()
+        self._signature = self._stat()
+        # The first load happens in the caller so startup errors surface there
+        self._current = self._build()
+        self._remember(self._current)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bank-reloader", daemon=True)
+        self._thread.start()
+
+    def current(self) -> QuestionBank:
+        """The newest valid bank; a plain attribute read, never blocks."""
+        return self._current
+
+    def get(self, version) -> Optional[QuestionBank]:
+        """The bank with `version`, if it is the current one or one of the recent ones."""
+        with self._lock:
+            return self._versions.get(version)
+
+    def _stat(self) -> Signature:
+        signature = []
+        for path in (self.compiled_path, self.csv_path):
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _build(self) -> QuestionBank:
+        bank = self.loader(self.csv_path, self.compiled_path)
+        validate_bank(bank)
+        return bank
+
+    def _remember(self, bank: QuestionBank) -> None:
+        with self._lock:
+            self._versions[bank.version] = bank
+            self._versions.move_to_end(bank.version)
+            while len(self._versions) > self.keep_versions:
+                self._versions.popitem(last=False)
+
+    def check(self) -> bool:
+        """Reload if the files changed since the last attempt; returns True if a new bank was swapped in."""
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        # Remember the attempt even if it fails, so a bad file is not rebuilt on every poll
+        self._signature = signature
+        try:
+            bank = self._build()
+            # Reloads happen on the poller thread, so the index is built before the swap
+            bank.search_index()
+        except Exception as e:
+            self.last_error = f"{time.strftime('%H:%M:%S')}: {e}"
+            print(f"Question bank reload failed, keeping version {self._current.version}: {e}")
+            return False
+        self._remember(bank)
+        self._current = bank
+        self.reloads += 1
+        self.last_error = None
+        print(f"Question bank reloaded: version {bank.version}, {len(bank)} questions")
+        return True
+
+    def _run(self) -> None:
+        # The startup load left the first bank's index for this thread, so startup never waits for it
+        bank = self._current
+        try:
+            bank.search_index()
+        except Exception as e:
+            print(f"Search index build failed for version {bank.version}: {e}")
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def stop(self) -> None:
+        self._stop.set()
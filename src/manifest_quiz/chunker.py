@@ -0,0 +1,125 @@
+"""
+Markdown-heading-aware splitting of manifesto documents into sections under a token budget.
+"""
+
+import re
+from typing import List, Tuple
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*\S)\s*$')
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of a text."""
+    # Japanese text averages roughly one token per character (3 UTF-8 bytes)
+    return len(text.encode('utf-8')) // 3
+
+
+class Section:
+    """A contiguous slice of a document, with the headings above it for context."""
+
+    __slots__ = ("section_id", "title", "context", "text")
+
+    def __init__(self, section_id: str, title: str, context: str, text: str):
+        self.section_id = section_id
+        self.title = title
+        self.context = context
+        self.text = text
+
+    @property
+    def content(self) -> str:
+        """Section text prefixed with its ancestor headings."""
+        return f"{self.context}\n\n{self.text}" if self.context else self.text
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.content)
+
+
+def _split_blocks(content: str) -> List[Tuple[List[str], str, str]]:
+    """Split at every heading; returns (ancestor headings, heading title, block text)."""
+    blocks = []
+    path: List[Tuple[int, str]] = []
+    ancestors: List[str] = []
+    title = ""
+    lines: List[str] = []
+
+    for line in content.splitlines():
+        match = HEADING_RE.match(line)
+        if match:
+            if any(l.strip() for l in lines):
+                blocks.append((ancestors, title, "\n".join(lines).strip()))
+            level = len(match.group(1))
+            path = [(lvl, text) for lvl, text in path if lvl < level]
+            ancestors = [text for _, text in path]
+            path.append((level, line.strip()))
+            title = match.group(2)
+            lines = [line]
+        else:
+            lines.append(line)
+
+    if any(l.strip() for l in lines):
+        blocks.append((ancestors, title, "\n".join(lines).strip()))
+    return blocks
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Split a block that exceeds the budget at paragraph, then character boundaries."""
+    # Every hard cut must advance, even when the caller's budget is used up by context
+    max_tokens = max(1, max_tokens)
+    pieces: List[str] = []
+    current = ""
+    for paragraph in re.split(r'\n\s*\n', text):
+        while estimate_tokens(paragraph) > max_tokens:
+            # A single paragraph over budget: hard-split by characters
+            cut = max_tokens  # ~1 token per Japanese character
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:]
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = paragraph
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_sections(content: str, doc_id: str, max_tokens: int = 3000) -> List[Section]:
+    """Split a Markdown document into sections of at most ~`max_tokens` tokens.
+
+    Consecutive heading blocks are packed together until the budget is
+    reached, so small documents stay a single section. Section IDs are
+    `<doc_id>#s01`, `<doc_id>#s02`, ... in document order.
+    """
+    if estimate_tokens(content) <= max_tokens:
+        return [Section(f"{doc_id}#s01", "", "", content.strip())]
+
+    chunks: List[Tuple[List[str], str, str]] = []
+    for ancestors, title, text in _split_blocks(content):
+        budget = max_tokens - estimate_tokens("\n".join(ancestors))
+        if budget < 1:
+            # The heading path alone fills the budget: keep the section text, drop the context
+            ancestors, budget = [], max_tokens
+        for piece in _split_oversized(text, budget):
+            chunks.append((ancestors, title, piece))
+
+    sections: List[Section] = []
+    current = None
+    for ancestors, title, text in chunks:
+        if current is not None:
+            candidate = f"{current.text}\n\n{text}"
+            if estimate_tokens(current.context) + estimate_tokens(candidate) <= max_tokens:
+                current.text = candidate
+                continue
+            sections.append(current)
+        current = Section("", title, "\n".join(ancestors), text)
+    if current is not None:
+        sections.append(current)
+
+    for i, section in enumerate(sections, start=1):
+        section.section_id = f"{doc_id}#s{i:02d}"
+    return sections
@@ -0,0 +1,137 @@
+"""
+Near-duplicate question detection with MinHash and locality-sensitive hashing.
+
+Each question is reduced to the character bigrams (`grounding.char_ngrams`)
+of its question, correct option and explanation. MinHash signatures estimate the Jaccard similarity of
+those sets; LSH banding puts similar signatures in a shared bucket, so only
+rows that collide in some band are compared exactly. Signatures cost the
+same per row; unrelated rows still collide in some band with a small
+probability (about 0.3% of pairs at the default threshold), so exact
+comparisons grow with the number of pairs, but only dominate in banks of
+ten thousand rows and more (see benchmarks/bench_dedupe.py). Every dropped
+row is at least as similar as the threshold to the row kept in its place.
+"""
+
+import hashlib
+import struct
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from manifest_quiz.grounding import char_ngrams
+
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_NUM_PERM = 128
+
+_MAX_HASH = 0xFFFFFFFF
+# 32-bit hash values per 64-byte blake2b digest
+_VALUES_PER_DIGEST = 16
+
+
+def question_text(row: Sequence[str]) -> str:
+    """Text compared for a quiz row (category, question, 4 options, correct_answer, explanation, ...)."""
+    try:
+        answer = row[1 + int(str(row[6]).strip())]
+    except (IndexError, ValueError):
+        answer = ""
+    return f"{row[1]} {answer} {row[7] if len(row) > 7 else ''}"
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures over `num_perm` independent 32-bit hash functions.
+
+    The hash functions are slices of blake2b digests with per-block
+    personalization, 16 per digest. The hash vector of each distinct shingle
+    is computed once and cached; bigram vocabularies are small, so a
+    signature is mostly an element-wise min over cached vectors.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        self.num_perm = num_perm
+        blocks = -(-num_perm // _VALUES_PER_DIGEST)
+        self._persons = [struct.pack('<QQ', seed, block) for block in range(blocks)]
+        self._unpack = struct.Struct(f'<{num_perm}I').unpack_from
+        self._vectors: Dict[str, Tuple[int, ...]] = {}
+
+    def _vector(self, shingle: str) -> Tuple[int, ...]:
+        vector = self._vectors.get(shingle)
+        if vector is None:
+            data = shingle.encode('utf-8')
+            digests = b''.join(hashlib.blake2b(data, person=person).digest() for person in self._persons)
+            vector = self._vectors[shingle] = self._unpack(digests)
+        return vector
+
+    def signature(self, shingle_set: Set[str]) -> Tuple[int, ...]:
+        if not shingle_set:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(map(min, zip(*map(self._vector, shingle_set))))
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows per band) whose collision threshold (1/b)^(1/r) sits just below `threshold`.
+
+    Candidates are verified exactly, so the banding errs towards recall;
+    signature values left over after the last full band are unused.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= max(0.05, threshold - 0.15):
+            best = (bands, rows)
+    return best
+
+
+class DuplicateCluster(NamedTuple):
+    """Rows judged to be the same question: `keep` is the first one, `duplicates` the others."""
+    keep: int
+    duplicates: List[Tuple[int, float]]  # (row index, Jaccard similarity to `keep`)
+
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+                         num_perm: int = DEFAULT_NUM_PERM, k: int = 2,
+                         hasher: Optional[MinHasher] = None) -> List[DuplicateCluster]:
+    """Cluster texts whose shingle sets have a Jaccard similarity of at least `threshold`.
+
+    Pairs that collide in an LSH band are verified exactly. Rows are then
+    visited in index order: a row not yet dropped is kept, and every later
+    row similar to *it* is dropped into its cluster. Similarity is not
+    chained, so each dropped row is within `threshold` of the row kept for
+    it; a row only similar to another dropped row stays.
+    """
+    hasher = hasher or MinHasher(num_perm)
+    sets = [char_ngrams(text, k) for text in texts]
+    signatures = [hasher.signature(s) for s in sets]
+    bands, rows = lsh_bands(threshold, hasher.num_perm)
+
+    # Verified similar pairs, from each row to the later rows
+    similar: Dict[int, List[Tuple[int, float]]] = {}
+    checked = set()
+    for band in range(bands):
+        buckets: Dict[Tuple[int, ...], List[int]] = {}
+        for i, signature in enumerate(signatures):
+            buckets.setdefault(signature[band * rows:(band + 1) * rows], []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pair = (members[x], members[y])
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    similarity = jaccard(sets[pair[0]], sets[pair[1]])
+                    if similarity >= threshold:
+                        similar.setdefault(pair[0], []).append((pair[1], similarity))
+
+    clusters: List[DuplicateCluster] = []
+    dropped = set()
+    for keep in sorted(similar):
+        if keep in dropped:
+            continue
+        duplicates = sorted((i, similarity) for i, similarity in similar[keep] if i not in dropped)
+        if duplicates:
+            dropped.update(i for i, _ in duplicates)
+            clusters.append(DuplicateCluster(keep, duplicates))
+    return clusters
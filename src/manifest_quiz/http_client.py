@@ -0,0 +1,154 @@
+"""
+Pooled HTTP client with timeouts and retry/backoff for LLM API calls.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from manifest_quiz.rate_limiter import RateLimiter
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CallStats:
+    """Thread-safe per-call outcome counters for a batch run."""
+
+    FIELDS = ("calls", "succeeded", "failed", "retries", "rate_limited", "server_errors", "timeouts", "connection_errors")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def summary(self) -> str:
+        counts = self.snapshot()
+        return ", ".join(f"{name}={counts[name]}" for name in self.FIELDS)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryingHTTPClient:
+    """Keep-alive session shared by all workers, with exponential backoff and jitter.
+
+    Retries connection errors, timeouts, 429 and 5xx responses. Every attempt
+    goes through the shared rate limiter, and a 429 also pauses it so the
+    other workers back off too.
+    """
+
+    def __init__(self, pool_size: int = 16, connect_timeout: float = 10.0, read_timeout: float = 180.0,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.stats = CallStats()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _acquire(self, tokens: int, call_info: Optional[Dict[str, Any]]) -> None:
+        """Take one request and `tokens` tokens from the rate limiter, recording the wait in `call_info`."""
+        if self.rate_limiter is None:
+            return
+        start = time.perf_counter()
+        self.rate_limiter.acquire(tokens)
+        if call_info is not None:
+            call_info["wait"] = call_info.get("wait", 0.0) + time.perf_counter() - start
+
+    def post(self, url: str, headers: Dict[str, str], payload: Dict[str, Any],
+             call_info: Optional[Dict[str, Any]] = None, tokens: int = 0, **kwargs) -> requests.Response:
+        """POST `payload` as JSON, retrying transient failures; returns the final response.
+
+        Every attempt, retries included, first takes one request and the
+        estimated `tokens` from the rate limiter. If given,
+        `call_info["retries"]` is kept up to date with this call's retry
+        count and `call_info["wait"]` with the total time spent waiting for
+        the rate limiter.
+        """
+        self.stats.incr("calls")
+        attempt = 0
+        while True:
+            if call_info is not None:
+                call_info["retries"] = attempt
+            self._acquire(tokens, call_info)
+            retry_after = None
+            rate_limited = False
+            try:
+                response = self.session.post(url, headers=headers, json=payload, timeout=self.timeout, **kwargs)
+            except requests.Timeout:
+                self.stats.incr("timeouts")
+                if attempt >= self.max_retries:
+                    self.stats.incr("failed")
+                    raise
+            except requests.ConnectionError:
+                self.stats.incr("connection_errors")
+                if attempt >= self.max_retries:
+                    self.stats.incr("failed")
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    self.stats.incr("succeeded" if response.ok else "failed")
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                rate_limited = response.status_code == 429
+                self.stats.incr("rate_limited" if rate_limited else "server_errors")
+                if attempt >= self.max_retries:
+                    self.stats.incr("failed")
+                    return response
+                response.close()
+
+            # One delay for both this worker's sleep and the shared pause after a 429
+            delay = self._backoff(attempt, retry_after)
+            if rate_limited and self.rate_limiter is not None:
+                self.rate_limiter.pause(delay)
+            self.stats.incr("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any],
+                  call_info: Optional[Dict[str, Any]] = None, tokens: int = 0) -> Dict[str, Any]:
+        """POST with retries and return the decoded JSON body, raising on HTTP errors.
+
+        With `call_info`, also records the final attempt's time to response headers as `ttfb`.
+        """
+        response = self.post(url, headers, payload, call_info, tokens)
+        if call_info is not None:
+            call_info["ttfb"] = response.elapsed.total_seconds()
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,54 @@
+"""
+Chat-completion backends the quiz generator can send requests to.
+"""
+
+from typing import Dict, Optional
+
+
+class ChatBackend:
+    """An OpenAI-compatible chat-completions endpoint.
+
+    The generator posts OpenAI-style request bodies to `url` and reads
+    OpenAI-style responses and SSE streams back. Subclass and override
+    `headers` to add provider-specific authentication or metadata.
+    """
+
+    name = "custom"
+
+    def __init__(self, url: str, api_key: Optional[str] = None):
+        self.url = url
+        self.api_key = api_key
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def cache_model(self, model: str) -> str:
+        """Model name used in response-cache keys, so other endpoints never share OpenRouter entries."""
+        return f"{model}@{self.url}"
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.url!r})"
+
+
+class OpenRouterBackend(ChatBackend):
+    """The OpenRouter API (default backend)."""
+
+    name = "openrouter"
+    URL = "https://openrouter.ai/api/v1/chat/completions"
+
+    def __init__(self, api_key: str):
+        super().__init__(self.URL, api_key)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/manifest-quiz",
+            "X-Title": "Manifest Quiz Generator"
+        }
+
+    def cache_model(self, model: str) -> str:
+        return model
@@ -0,0 +1,256 @@
+"""
+Immutable, process-wide question bank shared by every session.
+
+Questions are plain tuples and the bank is never mutated after loading, so
+the app can hold a single instance in `st.cache_resource` instead of
+unpickling a fresh copy of every question on each rerun.
+"""
+
+import bisect
+import csv
+import os
+import random
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from manifest_quiz.bank_format import BankFormatError, MappedBank, content_digest
+from manifest_quiz.search import SearchHit, SearchIndex
+
+# 分野マッピング（ステップを統合）
+FIELD_MAPPING = {
+    "教育": ["ステップ１教育", "ステップ２教育", "ステップ３教育"],
+    "子育て": ["ステップ１子育て", "ステップ３子育て"],
+    "行政改革": ["ステップ１行政改革", "ステップ２行政改革"],
+    "産業": ["ステップ１産業", "ステップ３産業"],
+    "科学技術": ["ステップ１科学技術", "ステップ３科学技術"],
+    "医療": ["ステップ１医療", "ステップ２医療", "ステップ３医療"],
+    "経済財政": ["ステップ２経済財政", "ステップ３経済財政"],
+    "エネルギー": ["ステップ３エネルギー"],
+    "デジタル民主主義": ["ステップ１デジタル民主主義"],
+    "基本理念・政策": ["チームみらいのビジョン", "政策インデックス"],
+    "ステップ概要": ["ステップ１", "ステップ２", "ステップ３"],
+    "特別プラン・その他": ["100日プラン", "その他重要分野", "改善提案の反映方針"]
+}
+
+
+class Question(NamedTuple):
+    """One quiz question. `correct` is the 0-based index into `options`."""
+    id: int
+    category: str
+    question: str
+    options: Tuple[str, str, str, str]
+    correct: int
+    explanation: str
+    source_section: str = ""
+
+
+class _MappedQuestions(Sequence):
+    """Questions decoded lazily from a memory-mapped compiled bank."""
+
+    __slots__ = ("_bank",)
+
+    def __init__(self, bank: MappedBank):
+        self._bank = bank
+
+    def __len__(self) -> int:
+        return len(self._bank)
+
+    def __getitem__(self, question_id):
+        record = self._bank.question(question_id)
+        return Question(question_id, record["category"], record["question"], tuple(record["options"]),
+                        record["correct"], record["explanation"], record["source_section"])
+
+
+class IdRanges(Sequence):
+    """Concatenation of disjoint ID ranges, indexable in O(log ranges) without materializing IDs."""
+
+    __slots__ = ("_ranges", "_starts", "_length")
+
+    def __init__(self, ranges: Iterable[range]):
+        self._ranges = tuple(r for r in ranges if len(r))
+        self._starts = []
+        total = 0
+        for r in self._ranges:
+            self._starts.append(total)
+            total += len(r)
+        self._length = total
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        i = bisect.bisect_right(self._starts, index) - 1
+        return self._ranges[i][index - self._starts[i]]
+
+
+class QuestionBank:
+    """Read-only question bank with questions grouped by category.
+
+    Question IDs are positions in the bank; each category occupies a
+    contiguous ID range. The field index (field -> ID ranges and counts) is
+    built once here, so counting and sampling never walk the bank.
+    """
+
+    __slots__ = ("version", "categories", "_questions", "_category_ranges", "_field_ids", "_all_ids",
+                 "_search_index")
+
+    def __init__(self, questions: Sequence, category_ranges: Dict[str, range], version: Optional[int] = None,
+                 field_mapping: Mapping[str, List[str]] = FIELD_MAPPING):
+        self._questions = questions
+        self._category_ranges = category_ranges
+        self.categories = tuple(category_ranges)
+        self.version = version
+        self._all_ids = IdRanges([range(len(questions))])
+        self._field_ids = {
+            field: IdRanges(self.category_ids(category) for category in categories)
+            for field, categories in field_mapping.items()
+        }
+        self._search_index: Optional[SearchIndex] = None
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[List[str]], version: Optional[int] = None) -> "QuestionBank":
+        """Build a bank from combined-CSV rows, skipping rows that cannot be served."""
+        grouped: Dict[str, List[List[str]]] = {}
+        for row in rows:
+            if len(row) >= 8 and row[6].strip() in ("1", "2", "3", "4"):
+                grouped.setdefault(row[0], []).append(row)
+
+        questions: List[Question] = []
+        category_ranges: Dict[str, range] = {}
+        for category, category_rows in grouped.items():
+            start = len(questions)
+            for row in category_rows:
+                questions.append(Question(
+                    id=len(questions),
+                    category=category,
+                    question=row[1],
+                    options=(row[2], row[3], row[4], row[5]),
+                    correct=int(row[6]) - 1,  # CSVでは1-4、内部では0-3
+                    explanation=row[7],
+                    source_section=row[8] if len(row) > 8 else "",
+                ))
+            category_ranges[category] = range(start, len(questions))
+        return cls(tuple(questions), category_ranges, version)
+
+    @classmethod
+    def from_csv(cls, csv_path: str, version: Optional[int] = None) -> "QuestionBank":
+        """Load a combined quiz CSV."""
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            return cls.from_rows(reader, version)
+
+    @classmethod
+    def from_compiled(cls, bank_path: str) -> "QuestionBank":
+        """Wrap a memory-mapped compiled bank; questions are decoded on access."""
+        return cls._from_mapped(MappedBank(bank_path))
+
+    @classmethod
+    def _from_mapped(cls, bank: MappedBank) -> "QuestionBank":
+        return cls(_MappedQuestions(bank), dict(bank.category_ranges), bank.version)
+
+    @classmethod
+    def load(cls, csv_path: str, compiled_path: Optional[str] = None) -> "QuestionBank":
+        """Load the compiled bank if it was built from the current CSV, else the CSV.
+
+        A compiled bank that is unreadable, or was left behind when the CSV
+        was rebuilt without it, is skipped with a message. Either way the
+        bank version is the content digest of the CSV, so different banks
+        never share a version, however quickly they are rebuilt.
+        """
+        if compiled_path and os.path.exists(compiled_path):
+            try:
+                bank = MappedBank(compiled_path)
+                if not os.path.exists(csv_path) or bank.built_from(csv_path):
+                    return cls._from_mapped(bank)
+                print(f"Compiled bank {compiled_path} is older than {csv_path}, loading the CSV instead")
+            except (BankFormatError, OSError, ValueError) as e:
+                print(f"Compiled bank {compiled_path} unusable, falling back to {csv_path}: {e}")
+        return cls.from_csv(csv_path, content_digest(csv_path))
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __getitem__(self, question_id: int) -> Question:
+        return self._questions[question_id]
+
+    def category_ids(self, category: str) -> range:
+        """IDs of the questions in `category` (empty if unknown)."""
+        return self._category_ranges.get(category, range(0))
+
+    def count(self, category: str) -> int:
+        return len(self.category_ids(category))
+
+    def field_ids(self, field: Optional[str] = None) -> IdRanges:
+        """IDs of the questions in `field`, or of the whole bank for None/unknown fields."""
+        return self._field_ids.get(field, self._all_ids) if field else self._all_ids
+
+    def field_count(self, field: str) -> int:
+        return len(self._field_ids[field]) if field in self._field_ids else 0
+
+    def search_index(self) -> SearchIndex:
+        """Full-text index of the bank, built on first use (BankReloader builds it off the request path)."""
+        if self._search_index is None:
+            # Racing builders produce equal indexes, so no lock is needed
+            self._search_index = SearchIndex(self)
+        return self._search_index
+
+    def search(self, query: str, limit: int = 50) -> List[SearchHit]:
+        """Ranked questions matching `query`; see `SearchIndex.search`."""
+        return self.search_index().search(query, limit)
+
+    def sample(self, num_questions: int, field: Optional[str] = None,
+               rng: Optional[random.Random] = None,
+               weight: Optional[Callable[[int], float]] = None) -> List[Question]:
+        """Draw `num_questions` distinct questions in O(k); all of them, shuffled, if fewer exist.
+
+        With `weight` (question ID -> weight in (0, 1]), questions are drawn
+        with probability proportional to their weight; see `weighted_sample`.
+        """
+        rng = rng or random
+        ids = self.field_ids(field)
+        if weight is not None:
+            chosen = weighted_sample(ids, num_questions, weight, rng)
+        elif len(ids) <= num_questions:
+            chosen = list(ids)
+            rng.shuffle(chosen)
+        else:
+            chosen = rng.sample(ids, num_questions)
+        return [self._questions[qid] for qid in chosen]
+
+
+def weighted_sample(ids: Sequence, k: int, weight: Callable[[int], float], rng=random,
+                    min_weight: float = 0.05) -> List[int]:
+    """Draw `k` distinct IDs from `ids` with probability proportional to `weight(id)`.
+
+    Weights are clamped to [min_weight, 1], so rejection sampling (uniform
+    candidate, accepted with probability equal to its weight) needs at most
+    1/min_weight tries per draw in expectation, independent of the bank size,
+    and weights are looked up only for the candidates actually drawn. Nothing
+    is precomputed, so a weight change takes effect on the next draw for
+    free. When `k` is a large share of `ids` (where rejecting duplicates
+    would dominate), it falls back to one weighted-key pass over all IDs.
+    """
+    def clamped(qid: int) -> float:
+        return min(1.0, max(min_weight, weight(qid)))
+
+    n = len(ids)
+    if 2 * k >= n:
+        # Efraimidis-Spirakis: sort by u^(1/w), which samples without replacement proportionally to w
+        keyed = sorted(ids, key=lambda qid: rng.random() ** (1.0 / clamped(qid)), reverse=True)
+        return keyed[:k]
+
+    chosen: List[int] = []
+    seen = set()
+    while len(chosen) < k:
+        qid = ids[int(rng.random() * n)]
+        if qid in seen:
+            continue
+        if rng.random() < clamped(qid):
+            seen.add(qid)
+            chosen.append(qid)
+    return chosen
@@ -6,41 +6,347 @@ Quiz generator using OpenRouter's Gemini 2.5 Pro to create quiz questions from m
 import os
 import csv
 import json
+import hashlib
+import threading
+import time
 import requests
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Callable
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+
+from manifest_quiz.chunker import Section, estimate_tokens, split_sections
+from manifest_quiz.grounding import DEFAULT_MIN_SUPPORT, GroundingIndex, document_for_csv
+from manifest_quiz.http_client import RetryingHTTPClient
+from manifest_quiz.llm_backend import ChatBackend, OpenRouterBackend
+from manifest_quiz.quiz_schema import RESPONSE_FORMAT, Rejection, parse_csv_line, parse_json_questions
+from manifest_quiz.rate_limiter import RateLimiter
+from manifest_quiz.response_cache import ResponseCache
+from manifest_quiz.telemetry import GenerationTelemetry
 load_dotenv()
 
+QUIZ_COLUMNS = ['category', 'question', 'option1', 'option2', 'option3', 'option4', 'correct_answer',
+                'explanation', 'source_section']
+
+# Output format and sample rows shared by the single-document and packed CSV prompts
+_CSV_OUTPUT_FORMAT = """出力形式（CSVの行として）:
+category,question,option1,option2,option3,option4,correct_answer,explanation
+
+# サンプル出力
+category,question,option1,option2,option3,option4,correct_answer,explanation
+チームみらいのビジョン,チームみらいが掲げる理念は何ですか？,テクノロジーで誰も取り残さない日本をつくる,デジタル格差をなくして平等な社会をつくる,AIで人間の仕事を代替する未来をつくる,すべての人にスマートフォンを配布する,1,チームみらいの中心的な理念は「テクノロジーで誰も取り残さない日本をつくる」です。
+ステップ１教育,チームみらいが提案する「すべての子どもに届ける」ものは？,タブレット端末,専属AI家庭教師,プログラミング教育,デジタル教材,2,「すべての子どもに専属AI家庭教師を届ける」ことが提案されています。
+ステップ１科学技術,チームみらいが重視する研究者支援の基本方針は？,競争力の強化,効率性の追求,研究環境の包括的改善,成果主義の徹底,3,研究者が研究に専念できる包括的な環境改善を重視しています。
+
+"""
+
+# Version 1 puts the document ahead of the instructions in a single user
+# message. Version 2 sends the instructions and sample rows as a system
+# message that is identical for every request of an output format, followed
+# by the per-document payload, so provider-side prompt caching can reuse the
+# shared prefix.
+PROMPT_TEMPLATE_VERSION = 2
+
+_CSV_SYSTEM_PROMPT = f"""あなたは日本語のマニフェスト文書から4択クイズを作成します。
+ユーザーから「=== 文書N（カテゴリ名: ...）===」で始まる1件以上の文書と、文書ごとに作成する問題数が渡されます。
+
+要件:
+1. 4択クイズの形式で出力してください
+2. 各問題は元になった文書の重要な内容を扱うこと
+3. 選択肢は1つが正解、3つが不正解になるように作成
+4. 正解番号は1-4の数字で指定
+5. 各問題に簡潔な解説を付ける
+6. カテゴリ名には、問題の元になった文書の「カテゴリ名」をそのまま使用
+
+{_CSV_OUTPUT_FORMAT}
+ヘッダー行は出力せず、クイズ問題のCSV行だけを出力してください。
+"""
+
+_JSON_SYSTEM_PROMPT = """あなたは日本語のマニフェスト文書から4択クイズを作成します。
+ユーザーから「=== 文書1（カテゴリ名: ...）===」で始まる文書と、作成する問題数が渡されます。
+
+要件:
+1. 各問題は文書の重要な内容を扱うこと
+2. options は4つの異なる選択肢で、1つが正解、3つが不正解
+3. correct_answer は正解の選択肢の番号（1-4の整数）
+4. explanation に簡潔な解説を付ける
+
+出力形式（JSONのみ）:
+{"questions": [{"question": "...", "options": ["...", "...", "...", "..."], "correct_answer": 1, "explanation": "..."}]}
+"""
+
+
+class _PackedDocument(NamedTuple):
+    """A small single-section document generated together with others in one request."""
+    md_file: str
+    output_csv: str
+    category: str
+    section: Section
+
+
+class _IncrementalQuizWriter:
+    """CSV writer that persists each parsed row immediately.
+
+    Rows go to `<output>.partial` and are flushed as they arrive, so the
+    first questions are on disk while the model is still generating. The
+    file replaces the output on `commit` if at least one row was written.
+    """
+    
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.partial_path = f"{output_path}.partial"
+        self._lock = threading.Lock()
+        self._file = open(self.partial_path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(QUIZ_COLUMNS)
+        self.rows = 0
+    
+    def write_row(self, row: List[str]) -> None:
+        with self._lock:
+            self._writer.writerow(row + [''] * (len(QUIZ_COLUMNS) - len(row)))
+            self._file.flush()
+            self.rows += 1
+    
+    def commit(self) -> int:
+        """Close the file, keep it if it has rows, and return the row count."""
+        with self._lock:
+            self._file.close()
+            if self.rows:
+                os.replace(self.partial_path, self.output_path)
+            else:
+                os.remove(self.partial_path)
+            return self.rows
+
 class QuizGenerator:
-    def __init__(self, openrouter_api_key: str):
-        """Initialize the quiz generator with OpenRouter API key."""
+    def __init__(self, openrouter_api_key: str, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None, max_retries: int = 5,
+                 connect_timeout: float = 10.0, read_timeout: float = 180.0,
+                 cache: Optional[ResponseCache] = None, cache_only: bool = False,
+                 section_tokens: int = 3000, section_concurrency: int = 4, stream: bool = False,
+                 output_format: str = "csv", max_repairs: int = 1, backend: Optional[ChatBackend] = None,
+                 backoff_base: float = 1.0, telemetry: Optional[GenerationTelemetry] = None,
+                 pack_tokens: int = 0, pack_max_documents: int = 3,
+                 prompt_version: int = PROMPT_TEMPLATE_VERSION, grounding: Optional[GroundingIndex] = None,
+                 min_support: float = DEFAULT_MIN_SUPPORT):
+        """Initialize the quiz generator with OpenRouter API key, rate limits and retry policy.
+
+        With a `cache`, responses are replayed for unchanged prompts; with
+        `cache_only` a cache miss is an error instead of an API call.
+        Documents larger than `section_tokens` are split at Markdown headings
+        and their sections are generated in parallel. With `stream`, rows are
+        parsed and written while the response is still arriving.
+        `output_format="json"` requests schema-constrained structured output
+        and re-asks up to `max_repairs` times for just the rejected questions;
+        it validates whole responses, so it cannot be combined with `stream`.
+        `backend` selects the chat-completions endpoint (OpenRouter by default).
+        Per-call, per-section and per-file metrics go to `telemetry`.
+        With `pack_tokens` > 0, small documents are bin-packed, up to
+        `pack_max_documents` and `pack_tokens` of content per request, into
+        one CSV request each (see `plan_packs`). `prompt_version` selects
+        the prompt layout (see PROMPT_TEMPLATE_VERSION); version 1 reproduces
+        the original prompts and so their cached responses. With a
+        `grounding` index, every row is scored against its source document
+        and rows below `min_support` are reported.
+        """
+        if prompt_version not in (1, 2):
+            raise ValueError(f"unknown prompt template version {prompt_version}")
+        if stream and output_format == "json":
+            raise ValueError("streaming is only supported for CSV output")
         self.api_key = openrouter_api_key
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.backend = backend or OpenRouterBackend(openrouter_api_key)
         self.model = "google/gemini-2.5-pro-preview"
+        self.temperature = 0.3
+        self.max_tokens = 4000
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.http = RetryingHTTPClient(
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            rate_limiter=self.rate_limiter,
+        )
+        self.cache = cache
+        self.cache_only = cache_only
+        self.section_tokens = section_tokens
+        self.section_concurrency = section_concurrency
+        self.stream = stream
+        self.output_format = output_format
+        self.max_repairs = max_repairs
+        self.rejected_rows = 0
+        self.repaired_rows = 0
+        self._counter_lock = threading.Lock()
+        self.telemetry = telemetry or GenerationTelemetry()
+        self.pack_tokens = pack_tokens
+        self.pack_max_documents = pack_max_documents
+        self.prompt_version = prompt_version
+        self.grounding = grounding
+        self.min_support = min_support
+        self.low_support_rows = 0
     
-    def _call_openrouter_api(self, messages: List[Dict[str, str]]) -> str:
-        """Call OpenRouter API with the given messages."""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/manifest-quiz",
-            "X-Title": "Manifest Quiz Generator"
-        }
-        
-        data = {
+    def _estimate_tokens(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> int:
+        """Roughly estimate the tokens a call consumes (prompt + completion budget)."""
+        return sum(estimate_tokens(m["content"]) for m in messages) + (max_tokens or self.max_tokens)
+    
+    def _request_headers(self) -> Dict[str, str]:
+        return self.backend.headers()
+    
+    def _request_body(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        return {
             "model": self.model,
             "messages": messages,
-            "temperature": 0.3,
-            "max_tokens": 4000
+            "temperature": self.temperature,
+            "max_tokens": max_tokens or self.max_tokens,
+            **({"response_format": RESPONSE_FORMAT} if self.output_format == "json" else {})
         }
+    
+    def _call_openrouter_api(self, messages: List[Dict[str, str]], call: Optional[Dict[str, Any]] = None,
+                             max_tokens: Optional[int] = None) -> Tuple[str, Optional[str]]:
+        """Call OpenRouter API with the given messages; returns the content and the finish_reason.
+
+        `call`, if given, receives the call's metrics: rate-limit wait, retries,
+        time to first byte and the API's token `usage`. `max_tokens`
+        overrides the completion budget for this call.
+        """
+        call = {} if call is None else call
+        result = self.http.post_json(self.backend.url, self._request_headers(),
+                                     self._request_body(messages, max_tokens), call,
+                                     self._estimate_tokens(messages, max_tokens))
+        call["usage"] = result.get("usage")
+        choice = result["choices"][0]
+        return choice["message"]["content"], choice.get("finish_reason")
+    
+    def _stream_openrouter_api(self, messages: List[Dict[str, str]], on_line: Callable[[str], None],
+                               call: Optional[Dict[str, Any]] = None,
+                               max_tokens: Optional[int] = None) -> Tuple[str, Optional[str]]:
+        """Call OpenRouter API with server-sent events, passing each completed line to `on_line`.
+
+        Returns the text received and the finish_reason, which is None if
+        the stream dropped before its end. A dropped or length-truncated
+        stream keeps every line already passed on; only its unfinished last
+        line is discarded. `call` receives the
+        same metrics as in `_call_openrouter_api`, with the time to the first
+        streamed token as time to first byte.
+        """
+        call = {} if call is None else call
+        data = self._request_body(messages, max_tokens)
+        data["stream"] = True
         
-        response = requests.post(self.base_url, headers=headers, json=data)
+        start = time.perf_counter()
+        response = self.http.post(self.backend.url, self._request_headers(), data, call,
+                                  self._estimate_tokens(messages, max_tokens), stream=True)
         response.raise_for_status()
         
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
+        received = []
+        pending = ""
+        complete = False
+        finish_reason = None
+        try:
+            for raw in response.iter_lines():
+                # SSE lines: "data: {...}", "data: [DONE]" or ": keep-alive" comments
+                line = raw.decode('utf-8')
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    complete = True
+                    break
+                chunk = json.loads(payload)
+                if chunk.get("usage"):
+                    # Sent with the last chunk, sometimes with an empty choices list
+                    call["usage"] = chunk["usage"]
+                if not chunk.get("choices"):
+                    continue
+                choice = chunk["choices"][0]
+                delta = (choice.get("delta") or {}).get("content") or ""
+                if delta and "ttfb" not in call:
+                    call["ttfb"] = time.perf_counter() - start - call.get("wait", 0.0)
+                received.append(delta)
+                pending += delta
+                while '\n' in pending:
+                    completed_line, pending = pending.split('\n', 1)
+                    on_line(completed_line)
+                finish_reason = choice.get("finish_reason") or finish_reason
+                if finish_reason == "length":
+                    break
+        except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+            print(f"Stream interrupted after {len(''.join(received))} characters: {e}")
+        finally:
+            response.close()
+        
+        if complete and pending:
+            on_line(pending)
+        return "".join(received), finish_reason if complete or finish_reason == "length" else None
+    
+    def _complete(self, messages: List[Dict[str, str]], category: str,
+                  on_line: Optional[Callable[[str], None]] = None, max_tokens: Optional[int] = None,
+                  categories: Optional[List[str]] = None) -> str:
+        """Return the model response for `messages`, replaying it from the cache when possible.
+
+        If `on_line` is given it receives every response line, as soon as it
+        arrives in streaming mode. Every call is recorded in the telemetry.
+        A response covering several documents is cached under all their
+        `categories`, so purging any of them drops it.
+        """
+        start = time.perf_counter()
+        key = ResponseCache.make_key(self.backend.cache_model(self.model), self.temperature, messages)
+        if self.cache is not None:
+            response = self.cache.get(key)
+            if response is not None:
+                self._replay_lines(response, on_line)
+                self.telemetry.record_call(category, time.perf_counter() - start, source="cache")
+                return response
+            if self.cache_only:
+                raise LookupError(f"no cached response for category '{category}'")
+        
+        call: Dict[str, Any] = {}
+        streaming = self.stream and on_line is not None
+        try:
+            if streaming:
+                response, finish_reason = self._stream_openrouter_api(messages, on_line, call, max_tokens)
+            else:
+                response, finish_reason = self._call_openrouter_api(messages, call, max_tokens)
+        except Exception as e:
+            self._record_call(category, start, call, "stream" if streaming else "api", ok=False, error=str(e))
+            raise
+        complete = finish_reason == "stop"
+        self._record_call(category, start, call, "stream" if streaming else "api", ok=complete,
+                          finish_reason=finish_reason)
+        if not streaming:
+            self._replay_lines(response, on_line)
+        
+        # Never cache a truncated (max_tokens), filtered or dropped response; the next run should retry it
+        if not complete:
+            print(f"Incomplete response for {category} (finish_reason: {finish_reason}): "
+                  f"keeping the rows received so far, not caching it")
+        elif self.cache is not None:
+            self.cache.put(key, response, category, categories=categories, model=self.model,
+                           temperature=self.temperature)
+        return response
+    
+    def _record_call(self, category: str, start: float, call: Dict[str, Any], source: str, ok: bool,
+                     **extra: Any) -> None:
+        wait = call.get("wait", 0.0)
+        self.telemetry.record_call(category, time.perf_counter() - start - wait, call.get("ttfb"), wait,
+                                   call.get("usage"), call.get("retries", 0), source, ok,
+                                   template=self.prompt_version, **extra)
+    
+    def _replay_lines(self, response: str, on_line: Optional[Callable[[str], None]]) -> None:
+        if on_line is not None:
+            for line in response.split('\n'):
+                on_line(line)
+    
+    def settings_fingerprint(self) -> str:
+        """Hash of the settings that shape generated output (model, temperature, prompt template)."""
+        messages = self._build_messages("{content}", "{category}", "5-8")
+        # Version 1 hashes the bare prompt, as before template versions existed
+        template = messages[0]["content"] if self.prompt_version == 1 else messages
+        settings = [self.model, self.temperature, self.max_tokens, self.section_tokens, template]
+        if self.pack_tokens > 0 and self.output_format == "csv":
+            # Packed documents get a different prompt, so packing changes the output
+            settings += [self.pack_tokens, self.pack_max_documents, self._build_packed_messages([])]
+        payload = json.dumps(settings, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
     def _extract_category_from_filename(self, filename: str) -> str:
         """Extract category name from filename."""
@@ -48,10 +354,48 @@ class QuizGenerator:
         category = re.sub(r'^\d+_', '', filename.replace('.md', ''))
         return category
     
-    def _create_quiz_prompt(self, content: str, category: str) -> str:
+    def _questions_for_section(self, section: Section, num_sections: int) -> str:
+        """Number of questions to ask for, scaled with section size for chunked documents."""
+        if num_sections == 1:
+            return "5-8"
+        low = max(2, section.tokens // 800)
+        return f"{low}-{low + 2}"
+    
+    def _build_messages(self, content: str, category: str, num_questions: str) -> List[Dict[str, str]]:
+        """Chat messages asking for `num_questions` questions on one document, in the configured layout."""
+        if self.prompt_version == 1:
+            if self.output_format == "json":
+                prompt = self._create_structured_prompt(content, category, num_questions)
+            else:
+                prompt = self._create_quiz_prompt(content, category, num_questions)
+            return [{"role": "user", "content": prompt}]
+        system = _JSON_SYSTEM_PROMPT if self.output_format == "json" else _CSV_SYSTEM_PROMPT
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": self._document_payload([(category, content)], num_questions)},
+        ]
+    
+    def _build_packed_messages(self, documents: List[_PackedDocument],
+                               num_questions: str = "4-6") -> List[Dict[str, str]]:
+        """Chat messages asking for questions on several small documents (CSV only)."""
+        if self.prompt_version == 1:
+            return [{"role": "user", "content": self._create_packed_prompt(documents, num_questions)}]
+        payload = self._document_payload([(doc.category, doc.section.content) for doc in documents],
+                                         num_questions)
+        return [{"role": "system", "content": _CSV_SYSTEM_PROMPT}, {"role": "user", "content": payload}]
+    
+    def _document_payload(self, documents: List[Tuple[str, str]], num_questions: str) -> str:
+        """The per-request part of a version 2 prompt: the question count and the tagged documents."""
+        bodies = "\n\n".join(
+            f"=== 文書{i}（カテゴリ名: {category}）===\n{content}"
+            for i, (category, content) in enumerate(documents, 1)
+        )
+        return f"文書ごとに4択クイズを{num_questions}問ずつ作成してください。\n\n{bodies}\n"
+    
+    def _create_quiz_prompt(self, content: str, category: str, num_questions: str = "5-8") -> str:
         """Create a prompt for generating quiz questions."""
         return f"""
-以下の日本語のマニフェスト文書を読んで、内容に基づいて4択クイズを5-8問作成してください。
+以下の日本語のマニフェスト文書を読んで、内容に基づいて4択クイズを{num_questions}問作成してください。
 
 文書内容:
 {content}
@@ -64,24 +408,80 @@ class QuizGenerator:
 5. 各問題に簡潔な解説を付ける
 6. カテゴリ名は「{category}」を使用
 
-出力形式（CSVの行として）:
-category,question,option1,option2,option3,option4,correct_answer,explanation
+{_CSV_OUTPUT_FORMAT}
+例:
+{category},この政策の目標は何ですか？,デジタル化を進める,格差を解消する,経済成長を促進する,教育を改善する,1,この政策はデジタル化を通じて社会課題の解決を目指しています。
 
-# サンプル出力
-category,question,option1,option2,option3,option4,correct_answer,explanation
-チームみらいのビジョン,チームみらいが掲げる理念は何ですか？,テクノロジーで誰も取り残さない日本をつくる,デジタル格差をなくして平等な社会をつくる,AIで人間の仕事を代替する未来をつくる,すべての人にスマートフォンを配布する,1,チームみらいの中心的な理念は「テクノロジーで誰も取り残さない日本をつくる」です。
-ステップ１教育,チームみらいが提案する「すべての子どもに届ける」ものは？,タブレット端末,専属AI家庭教師,プログラミング教育,デジタル教材,2,「すべての子どもに専属AI家庭教師を届ける」ことが提案されています。
-ステップ１科学技術,チームみらいが重視する研究者支援の基本方針は？,競争力の強化,効率性の追求,研究環境の包括的改善,成果主義の徹底,3,研究者が研究に専念できる包括的な環境改善を重視しています。
+実際のクイズ問題を作成してください（ヘッダー行は不要）:
+"""
+    
+    def _create_packed_prompt(self, documents: List[_PackedDocument], num_questions: str = "4-6") -> str:
+        """Create one CSV prompt for several small documents, each tagged with its category.
 
+        The category column of every row says which document it belongs to,
+        so the response can be split back into per-file CSVs.
+        """
+        bodies = "\n\n".join(
+            f"=== 文書{i}（カテゴリ名: {doc.category}）===\n{doc.section.content}"
+            for i, doc in enumerate(documents, 1)
+        )
+        categories = "、".join(f"「{doc.category}」" for doc in documents)
+        return f"""
+以下の{len(documents)}件の日本語のマニフェスト文書を読んで、文書ごとに内容に基づいて4択クイズを{num_questions}問ずつ作成してください。
 
-例:
-{category},この政策の目標は何ですか？,デジタル化を進める,格差を解消する,経済成長を促進する,教育を改善する,1,この政策はデジタル化を通じて社会課題の解決を目指しています。
+{bodies}
 
+要件:
+1. 4択クイズの形式で出力してください
+2. 各問題は元になった文書の重要な内容を扱うこと
+3. 選択肢は1つが正解、3つが不正解になるように作成
+4. 正解番号は1-4の数字で指定
+5. 各問題に簡潔な解説を付ける
+6. カテゴリ名には、問題の元になった文書の「カテゴリ名」（{categories}）をそのまま使用
+
+{_CSV_OUTPUT_FORMAT}
 実際のクイズ問題を作成してください（ヘッダー行は不要）:
 """
     
-    def generate_quiz_for_file(self, md_file_path: str, output_csv_path: str) -> None:
-        """Generate quiz questions for a single MD file and save to CSV."""
+    def _create_structured_prompt(self, content: str, category: str, num_questions: str = "5-8") -> str:
+        """Create a prompt for generating quiz questions as schema-constrained JSON."""
+        return f"""
+以下の日本語のマニフェスト文書を読んで、内容に基づいて4択クイズを{num_questions}問作成してください。
+
+文書内容:
+{content}
+
+要件:
+1. 各問題は文書の重要な内容を扱うこと（対象分野: {category}）
+2. options は4つの異なる選択肢で、1つが正解、3つが不正解
+3. correct_answer は正解の選択肢の番号（1-4の整数）
+4. explanation に簡潔な解説を付ける
+
+出力形式（JSONのみ）:
+{{"questions": [{{"question": "...", "options": ["...", "...", "...", "..."], "correct_answer": 1, "explanation": "..."}}]}}
+"""
+    
+    def _create_repair_prompt(self, rejected: List[Rejection]) -> str:
+        """Ask the model to replace only the rejected questions."""
+        problems = "\n".join(
+            f"- {'全体' if index is None else f'{index + 1}問目'}: {reason}"
+            for index, _, reason in rejected
+        )
+        return f"""
+次の問題は形式が不正だったため採用できませんでした:
+{problems}
+
+不正だった問題の代わりとなる問題だけを、同じJSON形式（{{"questions": [...]}}）で{len(rejected)}問出力してください。
+正しく採用された問題は再出力しないでください。
+"""
+    
+    def generate_quiz_for_file(self, md_file_path: str, output_csv_path: str) -> bool:
+        """Generate quiz questions for a single MD file and save to CSV.
+
+        Large documents are split into sections that are generated in
+        parallel; every row records the ID of the section it came from.
+        Returns True if at least one section produced questions.
+        """
         # Read the markdown file
         with open(md_file_path, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -89,101 +489,425 @@ category,question,option1,option2,option3,option4,correct_answer,explanation
         # Extract category from filename
         filename = Path(md_file_path).name
         category = self._extract_category_from_filename(filename)
+        sections = split_sections(content, Path(md_file_path).stem, self.section_tokens)
+        
+        start = time.perf_counter()
+        writer = _IncrementalQuizWriter(output_csv_path)
+        emit = self._grounded(writer.write_row, Path(md_file_path).stem)
+        try:
+            if len(sections) == 1 or self.section_concurrency <= 1:
+                results = [self._generate_section(section, category, len(sections), emit)
+                           for section in sections]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.section_concurrency, len(sections))) as executor:
+                    results = list(executor.map(
+                        lambda s: self._generate_section(s, category, len(sections), emit), sections))
+        finally:
+            # Keep the rows that were written even if some sections failed
+            rows = writer.commit()
+            self.telemetry.record_file(filename, time.perf_counter() - start, rows, len(sections), rows > 0)
         
+        failed = results.count(None)
+        if rows == 0:
+            print(f"Error generating quiz for {filename}: no questions from {len(sections)} section(s)")
+            return False
+        
+        note = f" ({failed}/{len(sections)} sections failed)" if failed else ""
+        print(f"Generated quiz for {filename} -> {output_csv_path}: {rows} questions "
+              f"from {len(sections)} section(s){note}")
+        return True
+    
+    def _generate_section(self, section: Section, category: str, num_sections: int,
+                          emit: Callable[[List[str]], None]) -> Optional[int]:
+        """Generate quiz rows for one section, emitting each as soon as it parses.
+
+        Returns the number of rows emitted, or None if the call failed.
+        """
         # Create prompt and call API
-        prompt = self._create_quiz_prompt(content, category)
-        messages = [{"role": "user", "content": prompt}]
+        num_questions = self._questions_for_section(section, num_sections)
+        messages = self._build_messages(section.content, category, num_questions)
+        if self.output_format == "json":
+            try:
+                rows, rejected = self._generate_structured(messages, category)
+            except Exception as e:
+                print(f"Error generating section {section.section_id}: {e}")
+                return None
+            for row in rows:
+                emit([category, *row, section.section_id])
+            self.telemetry.record_section(category, section.section_id, len(rows), rejected)
+            return len(rows)
+        
+        emitted = 0
+        rejected = 0
+        
+        def on_line(line: str) -> None:
+            nonlocal emitted, rejected
+            # Tag each row with its source section
+            row, error = parse_csv_line(line)
+            if error is not None:
+                self._count_rejected(1)
+                rejected += 1
+            if row is not None:
+                emit(row + [section.section_id])
+                emitted += 1
         
         try:
-            response = self._call_openrouter_api(messages)
-            
-            # Parse the response and save to CSV
-            self._save_quiz_to_csv(response, output_csv_path)
-            print(f"Generated quiz for {filename} -> {output_csv_path}")
-            
+            self._complete(messages, category, on_line)
         except Exception as e:
-            print(f"Error generating quiz for {filename}: {e}")
+            print(f"Error generating section {section.section_id}: {e}")
+            return None
+        finally:
+            self.telemetry.record_section(category, section.section_id, emitted, rejected)
+        return emitted
+    
+    def _generate_structured(self, messages: List[Dict[str, str]],
+                             category: str) -> Tuple[List[List[str]], int]:
+        """Generate JSON questions, re-asking only for the rejected ones.
+
+        Returns rows without category (question, 4 options, answer,
+        explanation) and the number of questions rejected along the way.
+        """
+        response = self._complete(messages, category)
+        rows, rejected = parse_json_questions(response)
+        self._count_rejected(len(rejected))
+        rejected_total = len(rejected)
+        
+        for _ in range(self.max_repairs):
+            if not rejected:
+                break
+            repair_messages = messages + [
+                {"role": "assistant", "content": response},
+                {"role": "user", "content": self._create_repair_prompt(rejected)},
+            ]
+            repaired, still_rejected = parse_json_questions(self._complete(repair_messages, category))
+            # A whole-response failure is replaced by however many questions come back
+            repaired = repaired[:len(rejected)] if rejected[0][0] is not None else repaired
+            rows.extend(repaired)
+            with self._counter_lock:
+                self.repaired_rows += len(repaired)
+            self._count_rejected(len(still_rejected))
+            rejected_total += len(still_rejected)
+            rejected = still_rejected
+        return rows, rejected_total
+    
+    def _grounded(self, emit: Callable[[List[str]], None], document: str) -> Callable[[List[str]], None]:
+        """Wrap `emit` so every row is checked against `document` (an MD file stem) before it is written."""
+        if self.grounding is None or document not in self.grounding:
+            return emit
+        
+        def check_and_emit(row: List[str]) -> None:
+            self._check_support(document, row)
+            emit(row)
+        return check_and_emit
+    
+    def _check_support(self, document: str, row: List[str]) -> None:
+        """Flag a row whose question and answer are poorly supported by its source document."""
+        score = self.grounding.score_row(document, row)
+        if score is None or score.support >= self.min_support:
+            return
+        with self._counter_lock:
+            self.low_support_rows += 1
+        print(f"Low grounding support ({score.support:.2f}) in {document}: {row[1][:40]}")
+    
+    def _count_rejected(self, count: int) -> None:
+        with self._counter_lock:
+            self.rejected_rows += count
     
     def _save_quiz_to_csv(self, response: str, output_path: str) -> None:
         """Save the quiz response to a CSV file."""
-        lines = response.strip().split('\n')
-        
+        rows = self._parse_quiz_response(response)
+        document = document_for_csv(output_path)
+        if self.grounding is not None and document in self.grounding:
+            for row in rows:
+                self._check_support(document, row)
+        self._write_quiz_csv(rows, output_path)
+    
+    def _write_quiz_csv(self, rows: List[List[str]], output_path: str) -> None:
+        """Write parsed quiz rows (optionally with a source section column) to a CSV file."""
         with open(output_path, 'w', encoding='utf-8', newline='') as f:
             writer = csv.writer(f)
             # Write header
-            writer.writerow(['category', 'question', 'option1', 'option2', 'option3', 'option4', 'correct_answer', 'explanation'])
-            
-            # Write quiz data
-            for line in lines:
-                if line.strip() and ',' in line:
-                    # Split by comma but be careful with commas in content
-                    parts = []
-                    current_part = ""
-                    in_quotes = False
-                    
-                    for char in line:
-                        if char == '"':
-                            in_quotes = not in_quotes
-                        elif char == ',' and not in_quotes:
-                            parts.append(current_part.strip())
-                            current_part = ""
-                            continue
-                        current_part += char
-                    
-                    if current_part:
-                        parts.append(current_part.strip())
-                    
-                    if len(parts) >= 8:
-                        writer.writerow(parts[:8])
-    
-    def generate_quizzes_for_all_md_files(self, data_dir: str, output_dir: str = None) -> None:
-        """Generate quiz files for all MD files in the data directory."""
-        data_path = Path(data_dir)
-        output_path = Path(output_dir) if output_dir else Path.cwd()
+            writer.writerow(QUIZ_COLUMNS)
+            writer.writerows(row + [''] * (len(QUIZ_COLUMNS) - len(row)) for row in rows)
+    
+    def _parse_quiz_response(self, response: str) -> List[List[str]]:
+        """Parse CSV-formatted quiz lines from a model response."""
+        rows = [self._parse_quiz_line(line) for line in response.strip().split('\n')]
+        return [row for row in rows if row is not None]
+    
+    def _parse_quiz_line(self, line: str) -> Optional[List[str]]:
+        """Parse and validate one CSV-formatted quiz line; returns None for non-quiz or invalid lines."""
+        row, error = parse_csv_line(line)
+        if error is not None:
+            self._count_rejected(1)
+        return row
+    
+    def plan_packs(self, jobs: List[Tuple[str, str]]) -> Tuple[List[List[_PackedDocument]], List[Tuple[str, str]]]:
+        """Split (md_file, output_csv) jobs into packs of small documents and jobs generated one by one.
+
+        A document is small if it is a single section of at most half of
+        `pack_tokens`. Small documents are packed first-fit decreasing into
+        requests of at most `pack_tokens` of content and `pack_max_documents`
+        documents with distinct categories; a document left alone in its
+        pack is generated as usual. Packing needs the CSV format, whose
+        category column routes rows back to their files.
+        """
+        if self.pack_tokens <= 0 or self.pack_max_documents < 2 or self.output_format != "csv":
+            return [], list(jobs)
         
-        # Find all MD files
-        md_files = list(data_path.glob("*.md"))
+        small = []
+        single = []
+        for md_file, output_csv in jobs:
+            with open(md_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+            sections = split_sections(content, Path(md_file).stem, self.section_tokens)
+            if len(sections) == 1 and estimate_tokens(sections[0].content) <= self.pack_tokens // 2:
+                category = self._extract_category_from_filename(Path(md_file).name)
+                small.append(_PackedDocument(md_file, output_csv, category, sections[0]))
+            else:
+                single.append((md_file, output_csv))
+        
+        packs: List[List[_PackedDocument]] = []
+        loads: List[int] = []
+        for doc in sorted(small, key=lambda d: estimate_tokens(d.section.content), reverse=True):
+            tokens = estimate_tokens(doc.section.content)
+            for i, pack in enumerate(packs):
+                if (len(pack) < self.pack_max_documents and loads[i] + tokens <= self.pack_tokens
+                        and all(other.category != doc.category for other in pack)):
+                    pack.append(doc)
+                    loads[i] += tokens
+                    break
+            else:
+                packs.append([doc])
+                loads.append(tokens)
+        
+        single.extend((pack[0].md_file, pack[0].output_csv) for pack in packs if len(pack) == 1)
+        return [pack for pack in packs if len(pack) > 1], single
+    
+    def generate_pack(self, documents: List[_PackedDocument]) -> Dict[str, bool]:
+        """Generate several small documents with one request and split the rows into their CSVs.
+
+        A document that gets no rows from the packed response (the call
+        failed, or the model skipped it) is retried on its own. Returns a
+        mapping of MD file path to success.
+        """
+        start = time.perf_counter()
+        label = " + ".join(doc.category for doc in documents)
+        by_category = {doc.category: doc for doc in documents}
+        writers = {doc.category: _IncrementalQuizWriter(doc.output_csv) for doc in documents}
+        emitters = {doc.category: self._grounded(writers[doc.category].write_row, Path(doc.md_file).stem)
+                    for doc in documents}
+        rejected = dict.fromkeys(by_category, 0)
+        unrouted = 0
+        
+        def on_line(line: str) -> None:
+            nonlocal unrouted
+            row, error = parse_csv_line(line)
+            category = row[0] if row is not None else line.split(',', 1)[0].strip()
+            if error is None and row is not None and category not in by_category:
+                error = f"unknown category '{category}'"
+                row = None
+            if error is not None:
+                self._count_rejected(1)
+                if category in rejected:
+                    rejected[category] += 1
+                else:
+                    unrouted += 1
+            if row is not None:
+                emitters[category](row + [by_category[category].section.section_id])
+        
+        messages = self._build_packed_messages(documents)
+        try:
+            # Each document keeps the completion budget it would get on its own
+            self._complete(messages, label, on_line, max_tokens=self.max_tokens * len(documents),
+                           categories=list(by_category))
+        except Exception as e:
+            print(f"Error generating pack {label}: {e}")
+        finally:
+            rows = {category: writer.commit() for category, writer in writers.items()}
+        
+        wall = time.perf_counter() - start
+        results = {}
+        for doc in documents:
+            count = rows[doc.category]
+            self.telemetry.record_section(doc.category, doc.section.section_id, count, rejected[doc.category])
+            if count == 0:
+                print(f"No questions for {Path(doc.md_file).name} in pack {label}; generating it separately")
+                results[doc.md_file] = self.generate_quiz_for_file(doc.md_file, doc.output_csv)
+                continue
+            self.telemetry.record_file(Path(doc.md_file).name, wall, count, 1, True)
+            print(f"Generated quiz for {Path(doc.md_file).name} -> {doc.output_csv}: {count} questions "
+                  f"(packed with {len(documents) - 1} other file(s))")
+            results[doc.md_file] = True
+        if unrouted:
+            print(f"Pack {label}: {unrouted} row(s) rejected that could not be assigned to a file")
+        return results
+    
+    def find_md_files(self, data_dir: str) -> List[Path]:
+        """List the manifesto MD files in the data directory, sorted by name."""
+        md_files = sorted(Path(data_dir).glob("*.md"))
         
         # Filter out README and LICENSE files
-        md_files = [f for f in md_files if f.name not in ['README.md', 'LICENSE']]
+        return [f for f in md_files if f.name not in ['README.md', 'LICENSE']]
+    
+    def generate_quizzes(self, jobs: List[Tuple[str, str]], concurrency: int = 1) -> Dict[str, bool]:
+        """Generate (md_file, output_csv) jobs, optionally in parallel.
+
+        With `concurrency` > 1 the files are generated by a thread pool; the
+        shared rate limiter keeps the workers within the RPM/TPM budget.
+        With packing enabled, small files share requests (see `plan_packs`).
+        Returns a mapping of MD file path to success.
+        """
+        packs, jobs = self.plan_packs(jobs)
+        if packs:
+            packed = sum(len(pack) for pack in packs)
+            print(f"Packing {packed} small files into {len(packs)} requests")
+        
+        def run(job) -> Dict[str, bool]:
+            if isinstance(job, list):
+                return self.generate_pack(job)
+            md, csv_path = job
+            return {md: self.generate_quiz_for_file(md, csv_path)}
+        
+        results = {}
+        if concurrency <= 1:
+            for job in packs + jobs:
+                results.update(run(job))
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for future in as_completed([executor.submit(run, job) for job in packs + jobs]):
+                    results.update(future.result())
+        
+        failed = list(results.values()).count(False)
+        print(f"Generated {len(results) - failed}/{len(results)} quiz files ({failed} failed)")
+        print(f"API calls: {self.http.stats.summary()}")
+        print(f"Rows rejected by the parser: {self.rejected_rows} (repaired: {self.repaired_rows})")
+        if self.grounding is not None:
+            print(f"Rows with low grounding support (< {self.min_support:g}): {self.low_support_rows}")
+        if self.cache is not None:
+            self.cache.flush()
+            print(f"Response cache: {self.cache.summary()}")
+        print(self.telemetry.summary())
+        prometheus_path = self.telemetry.write_prometheus()
+        if prometheus_path:
+            print(f"Metrics written to {prometheus_path}")
+        return results
+    
+    def generate_quizzes_for_all_md_files(self, data_dir: str, output_dir: str = None, concurrency: int = 1,
+                                          skip_existing: Optional[bool] = None) -> None:
+        """Generate quiz files for all MD files in the data directory.
+
+        Existing CSVs are skipped unless a response cache is configured, in
+        which case unchanged files replay for free and edited files regenerate.
+        """
+        if skip_existing is None:
+            skip_existing = self.cache is None
+        output_path = Path(output_dir) if output_dir else Path.cwd()
+        
+        md_files = self.find_md_files(data_dir)
         
         print(f"Found {len(md_files)} MD files to process")
         
+        jobs = []
         for md_file in md_files:
             # Create output filename
             base_name = md_file.stem
             output_csv = output_path / f"quiz_{base_name}.csv"
             
             # Skip if CSV already exists and is recent
-            if output_csv.exists():
+            if skip_existing and output_csv.exists():
                 print(f"Quiz file already exists: {output_csv}")
                 continue
             
-            self.generate_quiz_for_file(str(md_file), str(output_csv))
-
+            jobs.append((str(md_file), str(output_csv)))
+        
+        self.generate_quizzes(jobs, concurrency)
 
 def main():
     """Main function to run the quiz generator."""
     import argparse
     
     parser = argparse.ArgumentParser(description='Generate quiz questions from manifesto MD files')
-    parser.add_argument('--api-key', required=True, help='OpenRouter API key')
+    parser.add_argument('--api-key', default=os.getenv('OPENROUTER_API_KEY'), help='OpenRouter API key')
+    parser.add_argument('--base-url',
+                        help='Send requests to this OpenAI-compatible chat-completions URL instead of OpenRouter '
+                             '(e.g. the local mock server in benchmarks/mock_llm_server.py)')
     parser.add_argument('--data-dir', default='data', help='Directory containing MD files')
     parser.add_argument('--output-dir', default='.', help='Output directory for CSV files')
     parser.add_argument('--file', help='Process specific MD file only')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of files to generate in parallel')
+    parser.add_argument('--rpm', type=int, help='Requests-per-minute limit')
+    parser.add_argument('--tpm', type=int, help='Tokens-per-minute limit')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries per call on 429/5xx/timeouts')
+    parser.add_argument('--read-timeout', type=float, default=180.0, help='Read timeout per call in seconds')
+    parser.add_argument('--cache-dir', default='.quiz_cache', help='Directory of the response cache')
+    parser.add_argument('--cache-max-mb', type=int, default=200, help='Response cache size cap in MB')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the response cache')
+    parser.add_argument('--cache-only', action='store_true', help='Replay cached responses only (no API calls)')
+    parser.add_argument('--section-tokens', type=int, default=3000,
+                        help='Split documents larger than this many tokens into sections')
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv',
+                        help='Ask for CSV lines or schema-constrained JSON output')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream responses and write questions as they arrive')
+    parser.add_argument('--purge-category', help='Remove cached responses for a category and exit')
+    parser.add_argument('--pack-tokens', type=int, default=0,
+                        help='Pack small files into shared requests of up to this many content tokens (default: off)')
+    parser.add_argument('--prompt-version', type=int, choices=[1, 2], default=PROMPT_TEMPLATE_VERSION,
+                        help=f'Prompt template version (default: {PROMPT_TEMPLATE_VERSION}; '
+                             f'1 replays responses cached before version 2)')
+    parser.add_argument('--min-support', type=float, default=DEFAULT_MIN_SUPPORT,
+                        help=f'Flag rows whose grounding support in the source document is below this '
+                             f'(default: {DEFAULT_MIN_SUPPORT})')
+    parser.add_argument('--no-grounding', action='store_true',
+                        help='Skip the grounding check against the manifesto text')
+    parser.add_argument('--metrics-log', default='quiz_metrics.jsonl',
+                        help='Append per-call metrics as JSON lines to this file (default: quiz_metrics.jsonl)')
+    parser.add_argument('--metrics-prom', default='quiz_metrics.prom',
+                        help='Write Prometheus text-format metrics here (default: quiz_metrics.prom)')
     
     args = parser.parse_args()
     
-    generator = QuizGenerator(args.api_key)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+    
+    if args.purge_category:
+        if cache is None:
+            parser.error('--purge-category requires the response cache')
+        removed = cache.purge_category(args.purge_category)
+        print(f"Purged {removed} cached responses for {args.purge_category}")
+        return
+    
+    if args.stream and args.format == 'json':
+        parser.error('--stream cannot be combined with --format json (JSON output is validated as a whole)')
+    
+    if not args.api_key and not args.cache_only and not args.base_url:
+        parser.error('--api-key (or OPENROUTER_API_KEY) is required unless --cache-only or --base-url is used')
+    
+    backend = ChatBackend(args.base_url, args.api_key) if args.base_url else None
+    telemetry = GenerationTelemetry(args.metrics_log or None, args.metrics_prom or None)
+    grounding = None
+    if not args.no_grounding:
+        grounding = GroundingIndex.load_or_build(str(Path(args.file).parent) if args.file else args.data_dir)
+    generator = QuizGenerator(args.api_key, requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                              max_retries=args.max_retries, read_timeout=args.read_timeout,
+                              cache=cache, cache_only=args.cache_only, section_tokens=args.section_tokens,
+                              stream=args.stream, output_format=args.format, backend=backend,
+                              telemetry=telemetry, pack_tokens=args.pack_tokens,
+                              prompt_version=args.prompt_version, grounding=grounding,
+                              min_support=args.min_support)
     
     if args.file:
         # Process single file
         output_name = f"quiz_{Path(args.file).stem}.csv"
         output_path = Path(args.output_dir) / output_name
         generator.generate_quiz_for_file(args.file, str(output_path))
+        if cache is not None:
+            cache.flush()
+        print(telemetry.summary())
+        telemetry.write_prometheus()
     else:
         # Process all files
-        generator.generate_quizzes_for_all_md_files(args.data_dir, args.output_dir)
+        generator.generate_quizzes_for_all_md_files(args.data_dir, args.output_dir, concurrency=args.concurrency)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+"""
+Schema and single-pass validating parsers for generated quiz questions.
+"""
+
+import csv
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}, "minItems": 4, "maxItems": 4},
+        "correct_answer": {"type": "integer", "minimum": 1, "maximum": 4},
+        "explanation": {"type": "string"},
+    },
+    "required": ["question", "options", "correct_answer", "explanation"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "quiz_questions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"questions": {"type": "array", "items": QUESTION_SCHEMA}},
+            "required": ["questions"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# A rejected item: (position in the response or None, the raw item, reason)
+Rejection = Tuple[Optional[int], Any, str]
+
+
+class QuestionValidationError(ValueError):
+    """Raised when a generated question does not satisfy the schema."""
+
+
+def _text(value: Any, field: str) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise QuestionValidationError(f"{field} must be a non-empty string")
+    return value.strip()
+
+
+def validate_question(item: Any) -> List[str]:
+    """Validate one question object and return it as a row without category:
+    [question, option1, option2, option3, option4, correct_answer, explanation].
+    """
+    if not isinstance(item, dict):
+        raise QuestionValidationError("question must be an object")
+    question = _text(item.get("question"), "question")
+    options = item.get("options")
+    if not isinstance(options, list) or len(options) != 4:
+        raise QuestionValidationError("options must be a list of exactly 4 strings")
+    options = [_text(option, f"options[{i}]") for i, option in enumerate(options)]
+    if len(set(options)) != 4:
+        raise QuestionValidationError("options must be distinct")
+    correct = item.get("correct_answer")
+    if isinstance(correct, str) and correct.strip().isdigit():
+        correct = int(correct)
+    if isinstance(correct, bool) or not isinstance(correct, int) or not 1 <= correct <= 4:
+        raise QuestionValidationError("correct_answer must be an integer from 1 to 4")
+    explanation = _text(item.get("explanation"), "explanation")
+    return [question, *options, str(correct), explanation]
+
+
+def _strip_code_fence(text: str) -> str:
+    match = re.search(r'```(?:json)?\s*(.*?)```', text, re.DOTALL)
+    return match.group(1) if match else text
+
+
+def parse_json_questions(text: str) -> Tuple[List[List[str]], List[Rejection]]:
+    """Parse a structured-output response in one pass into valid rows and rejections."""
+    try:
+        payload = json.loads(_strip_code_fence(text).strip())
+    except ValueError as e:
+        return [], [(None, text, f"response is not valid JSON: {e}")]
+
+    items = payload.get("questions") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return [], [(None, payload, "response must contain a 'questions' array")]
+
+    rows, rejected = [], []
+    for index, item in enumerate(items):
+        try:
+            rows.append(validate_question(item))
+        except QuestionValidationError as e:
+            rejected.append((index, item, str(e)))
+    return rows, rejected
+
+
+def parse_csv_line(line: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Parse and validate one CSV quiz line.
+
+    Returns (row, None) for a valid 8-column row, (None, reason) for an
+    invalid quiz line and (None, None) for lines that are not quiz rows at
+    all (blank lines, prose, the header).
+    """
+    if not (line.strip() and ',' in line):
+        return None, None
+    try:
+        parts = next(csv.reader([line.strip()], skipinitialspace=True))
+    except csv.Error as e:
+        return None, f"unparseable CSV: {e}"
+    parts = [part.strip() for part in parts]
+    if parts[:2] == ['category', 'question']:
+        return None, None
+    if len(parts) < 8:
+        return None, f"expected 8 columns, got {len(parts)}"
+
+    category = parts[0]
+    item = {"question": parts[1], "options": parts[2:6], "correct_answer": parts[6],
+            "explanation": ",".join(parts[7:])}
+    try:
+        return [category, *validate_question(item)], None
+    except QuestionValidationError as e:
+        return None, str(e)
@@ -0,0 +1,71 @@
+"""
+Thread-safe request/token rate limiter shared by concurrent quiz generation workers.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class _TokenBucket:
+    """Token bucket refilled continuously up to a per-minute budget."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)."""
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Limit calls to a requests-per-minute and/or tokens-per-minute budget.
+
+    `acquire` blocks the calling thread until both budgets allow the call.
+    `pause` is used when the provider pushes back (HTTP 429) so that every
+    worker backs off instead of hammering the endpoint.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self._requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request costing `tokens` tokens fits in the budget."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    wait = 0.0
+                    for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                        if bucket is not None:
+                            bucket.refill(now)
+                            wait = max(wait, bucket.wait_time(amount))
+                    if wait == 0.0:
+                        if self._requests is not None:
+                            self._requests.take(1)
+                        if self._tokens is not None:
+                            self._tokens.take(tokens)
+                        return
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for `seconds` (e.g. after a 429 response)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
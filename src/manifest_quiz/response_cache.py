@@ -0,0 +1,139 @@
+"""
+Content-addressed on-disk cache of raw LLM responses.
+
+Entries are keyed by a hash of the model, sampling parameters and prompt, so
+an unchanged manifesto file replays its previous response at no API cost,
+while an edited file (different prompt) misses and is regenerated.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+INDEX_FILENAME = "index.json"
+
+
+class ResponseCache:
+    """LRU-bounded response cache stored as one JSON file per entry."""
+
+    def __init__(self, cache_dir: str = ".quiz_cache", max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._index = self._load_index()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+        """Hash the request parameters that determine the response."""
+        payload = json.dumps(
+            {"model": model, "temperature": temperature, "messages": messages},
+            ensure_ascii=False, sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        index_path = self.cache_dir / INDEX_FILENAME
+        if not index_path.exists():
+            return {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop index entries whose files were removed by hand
+        return {key: meta for key, meta in index.items() if self._entry_path(key).exists()}
+
+    def _save_index(self) -> None:
+        index_path = self.cache_dir / INDEX_FILENAME
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+        self._dirty = False
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key`, or None on a miss."""
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                self.misses += 1
+                return None
+            try:
+                with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                del self._index[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+            meta["last_access"] = time.time()
+            self._dirty = True
+            self.hits += 1
+            return entry["response"]
+
+    def put(self, key: str, response: str, category: str, categories: Optional[List[str]] = None,
+            **metadata: Any) -> None:
+        """Store a raw response and evict least recently used entries over the size cap.
+
+        `category` labels the entry; a response covering several categories
+        (a packed request) lists them in `categories`, so purging any one of
+        them removes it.
+        """
+        categories = list(categories) if categories is not None else [category]
+        entry = {"category": category, "categories": categories, "response": response, "created": time.time(),
+                 **metadata}
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        path = self._entry_path(key)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self._index[key] = {"category": category, "categories": categories, "size": len(data),
+                                "last_access": time.time()}
+            self._evict()
+            self._save_index()
+
+    def _evict(self) -> None:
+        total = sum(meta["size"] for meta in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            total -= self._index.pop(key)["size"]
+            self._entry_path(key).unlink(missing_ok=True)
+            if total <= self.max_bytes:
+                break
+
+    def purge_category(self, category: str) -> int:
+        """Remove every entry generated for `category`, alone or packed with others; returns the number removed."""
+        with self._lock:
+            # Entries written before `categories` existed only have their label
+            keys = [key for key, meta in self._index.items()
+                    if category in meta.get("categories", (meta["category"],))]
+            for key in keys:
+                del self._index[key]
+                self._entry_path(key).unlink(missing_ok=True)
+            self._save_index()
+        return len(keys)
+
+    def flush(self) -> None:
+        """Persist LRU access times recorded by `get`."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def summary(self) -> str:
+        with self._lock:
+            size = sum(meta["size"] for meta in self._index.values())
+            return f"hits={self.hits}, misses={self.misses}, entries={len(self._index)}, bytes={size}"
@@ -0,0 +1,134 @@
+"""
+Full-text search over the question bank.
+
+A character-bigram inverted index (text normalized as in `grounding`) maps
+each bigram to the sorted IDs of the questions containing it. Each posting
+also records which fields contain the bigram (question, options,
+explanation), so a match in the question text ranks above one in the
+explanation without separate lists per field.
+
+A query only touches the posting lists of its own bigrams, and the lists of
+its most common bigrams only for candidates found in the rarer ones. Hits
+are ranked by the IDF-weighted share of query bigrams they contain, and the
+best candidates that contain the whole normalized query as a substring get a
+phrase bonus. The index is built once per bank and is read-only afterwards.
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Sequence
+
+from manifest_quiz.grounding import normalize_text
+
+# Field bits of a posting (low bits of id << _FIELD_BITS | mask)
+_QUESTION, _OPTIONS, _EXPLANATION = 1, 2, 4
+_FIELD_BITS = 3
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+# Weight of a bigram hit by the best field it occurs in
+_MASK_WEIGHT = tuple(
+    1.0 if mask & _QUESTION else 0.7 if mask & _OPTIONS else 0.4 if mask & _EXPLANATION else 0.0
+    for mask in range(1 << _FIELD_BITS)
+)
+# Hits must contain at least this share of the query bigrams
+MIN_MATCH = 0.6
+PHRASE_BONUS = 1.0
+
+
+class SearchHit(NamedTuple):
+    id: int
+    score: float
+
+
+def _bigrams(text: str) -> List[str]:
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class SearchIndex:
+    """Inverted index from character bigrams to the questions of one bank."""
+
+    __slots__ = ("_bank", "_postings", "_size")
+
+    def __init__(self, bank: Sequence):
+        self._bank = bank
+        self._size = len(bank)
+        masks: Dict[str, Dict[int, int]] = {}
+        for question_id in range(self._size):
+            question = bank[question_id]
+            fields = ((_QUESTION, question.question), (_OPTIONS, " ".join(question.options)),
+                      (_EXPLANATION, question.explanation))
+            for bit, text in fields:
+                for gram in set(_bigrams(normalize_text(text))):
+                    entry = masks.setdefault(gram, {})
+                    entry[question_id] = entry.get(question_id, 0) | bit
+        # IDs are visited in order, so every posting list is already sorted
+        self._postings = {
+            gram: array('I', (question_id << _FIELD_BITS | mask for question_id, mask in entry.items()))
+            for gram, entry in masks.items()
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _contains_phrase(self, question_id: int, phrase: str) -> bool:
+        question = self._bank[question_id]
+        return any(phrase in normalize_text(text)
+                   for text in (question.question, " ".join(question.options), question.explanation))
+
+    def search(self, query: str, limit: int = 50) -> List[SearchHit]:
+        """The best `limit` questions for `query`, best first; empty for queries under two characters.
+
+        The score is the IDF-weighted share of the query bigrams a question
+        contains (weighted by the field they occur in), plus `PHRASE_BONUS`
+        if the question contains the whole query.
+        """
+        phrase = normalize_text(query)
+        grams = set(_bigrams(phrase))
+        if not grams:
+            return []
+        # Rarest first: a hit contains at least `needed` query bigrams, so it is in
+        # one of the first len(grams) - needed + 1 posting lists
+        postings = sorted(((gram, self._postings.get(gram, ())) for gram in grams), key=lambda gp: len(gp[1]))
+        # Bigrams absent from the bank weigh like the rarest possible ones
+        weights = {gram: math.log(1 + self._size / max(1, len(p))) for gram, p in postings}
+        total = sum(weights.values()) or 1.0
+        needed = math.ceil(MIN_MATCH * len(grams))
+        seeds = len(grams) - needed + 1
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for gram, p in postings[:seeds]:
+            weight = weights[gram] / total
+            for posting in p:
+                question_id = posting >> _FIELD_BITS
+                scores[question_id] = scores.get(question_id, 0.0) + weight * _MASK_WEIGHT[posting & _FIELD_MASK]
+                matched[question_id] = matched.get(question_id, 0) + 1
+        for gram, p in postings[seeds:]:
+            weight = weights[gram] / total
+            if len(scores) * max(1, len(p)).bit_length() < len(p):
+                # Few candidates, long list: look each candidate up instead of walking the list
+                for question_id in scores:
+                    i = bisect_left(p, question_id << _FIELD_BITS)
+                    if i < len(p) and p[i] >> _FIELD_BITS == question_id:
+                        scores[question_id] += weight * _MASK_WEIGHT[p[i] & _FIELD_MASK]
+                        matched[question_id] += 1
+            else:
+                for posting in p:
+                    question_id = posting >> _FIELD_BITS
+                    if question_id in scores:
+                        scores[question_id] += weight * _MASK_WEIGHT[posting & _FIELD_MASK]
+                        matched[question_id] += 1
+
+        # Only the best candidates are decoded for the phrase check
+        candidates = heapq.nlargest(limit * 2,
+                                    (question_id for question_id, count in matched.items() if count >= needed),
+                                    key=scores.__getitem__)
+        hits = [
+            SearchHit(question_id, scores[question_id] + (
+                PHRASE_BONUS if matched[question_id] == len(grams) and self._contains_phrase(question_id, phrase)
+                else 0.0))
+            for question_id in candidates
+        ]
+        hits.sort(key=lambda hit: (-hit.score, hit.id))
+        return hits[:limit]
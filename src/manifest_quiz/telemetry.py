@@ -0,0 +1,212 @@
+"""
+Structured generation telemetry: per-call and per-file metrics, exported as
+JSON lines and as a Prometheus text-format file.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def cached_prompt_tokens(usage: Dict[str, Any]) -> int:
+    """Prompt tokens served from the provider's prompt cache, as reported in `usage`."""
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens", 0) or 0
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+class GenerationTelemetry:
+    """Thread-safe recorder for one generation run.
+
+    Every event is appended to `jsonl_path` as it happens (if given), so a
+    crashed batch still leaves its metrics behind; `write_prometheus`
+    renders the aggregates and `summary` the end-of-batch report.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self._lock = threading.Lock()
+        self.calls: List[Dict[str, Any]] = []
+        self.sections: List[Dict[str, Any]] = []
+        self.files: List[Dict[str, Any]] = []
+        self._log = open(jsonl_path, 'a', encoding='utf-8') if jsonl_path else None
+        self.run_id = time.strftime("%Y%m%dT%H%M%S")
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        event = {"ts": round(time.time(), 3), "run": self.run_id, **event}
+        if self._log is not None:
+            self._log.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._log.flush()
+
+    def record_call(self, category: str, wall_seconds: float, ttfb_seconds: Optional[float] = None,
+                    wait_seconds: float = 0.0, usage: Optional[Dict[str, Any]] = None, retries: int = 0,
+                    source: str = "api", ok: bool = True, **extra: Any) -> None:
+        """One LLM call. `source` is "api", "stream" or "cache" (replayed, no API cost).
+
+        Prompt tokens are split into those the provider served from its
+        prompt cache (`usage.prompt_tokens_details.cached_tokens`) and the rest.
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        cached_tokens = cached_prompt_tokens(usage)
+        event = {
+            "type": "call",
+            "category": category,
+            "source": source,
+            "ok": ok,
+            "wall_ms": round(wall_seconds * 1000, 1),
+            "ttfb_ms": round(ttfb_seconds * 1000, 1) if ttfb_seconds is not None else None,
+            "wait_ms": round(wait_seconds * 1000, 1),
+            "prompt_tokens": prompt_tokens,
+            "cached_prompt_tokens": cached_tokens,
+            "uncached_prompt_tokens": prompt_tokens - cached_tokens,
+            "completion_tokens": usage.get("completion_tokens", 0) or 0,
+            "retries": retries,
+            **extra,
+        }
+        with self._lock:
+            self.calls.append(event)
+            self._emit(event)
+
+    def record_section(self, category: str, section_id: str, accepted: int, rejected: int) -> None:
+        event = {"type": "section", "category": category, "section": section_id,
+                 "accepted": accepted, "rejected": rejected}
+        with self._lock:
+            self.sections.append(event)
+            self._emit(event)
+
+    def record_file(self, md_file: str, wall_seconds: float, rows: int, sections: int, ok: bool) -> None:
+        event = {"type": "file", "file": md_file, "wall_ms": round(wall_seconds * 1000, 1), "rows": rows,
+                 "sections": sections, "ok": ok}
+        with self._lock:
+            self.files.append(event)
+            self._emit(event)
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            api_calls = [c for c in self.calls if c["source"] != "cache"]
+            return {
+                "calls": len(api_calls),
+                "cache_hits": len(self.calls) - len(api_calls),
+                "failed_calls": sum(not c["ok"] for c in api_calls),
+                "retries": sum(c["retries"] for c in api_calls),
+                "prompt_tokens": sum(c["prompt_tokens"] for c in api_calls),
+                "cached_prompt_tokens": sum(c["cached_prompt_tokens"] for c in api_calls),
+                "completion_tokens": sum(c["completion_tokens"] for c in api_calls),
+                "call_wall_ms": [c["wall_ms"] for c in api_calls],
+                "ttfb_ms": [c["ttfb_ms"] for c in api_calls if c["ttfb_ms"] is not None],
+                "rows_accepted": sum(s["accepted"] for s in self.sections),
+                "rows_rejected": sum(s["rejected"] for s in self.sections),
+                "files": list(self.files),
+            }
+
+    def summary(self) -> str:
+        """Multi-line end-of-batch report."""
+        t = self.totals()
+        lines = [
+            f"Calls: {t['calls']} (+{t['cache_hits']} cache hits), failed: {t['failed_calls']}, "
+            f"retries: {t['retries']}",
+            f"Call latency: p50 {_percentile(t['call_wall_ms'], 0.5) / 1000:.1f}s, "
+            f"p95 {_percentile(t['call_wall_ms'], 0.95) / 1000:.1f}s; "
+            f"TTFB p50 {_percentile(t['ttfb_ms'], 0.5) / 1000:.1f}s",
+            f"Tokens: prompt {t['prompt_tokens']} (cached {t['cached_prompt_tokens']}, "
+            f"{t['cached_prompt_tokens'] / max(1, t['prompt_tokens']):.0%}), completion {t['completion_tokens']}",
+            f"Rows: accepted {t['rows_accepted']}, rejected {t['rows_rejected']}",
+        ]
+        slowest = sorted(t["files"], key=lambda f: f["wall_ms"], reverse=True)[:3]
+        if slowest:
+            lines.append("Slowest files: " + ", ".join(
+                f"{f['file']} ({f['wall_ms'] / 1000:.1f}s)" for f in slowest))
+        return "\n".join(lines)
+
+    def prometheus_text(self) -> str:
+        """Aggregates in the Prometheus text exposition format."""
+        with self._lock:
+            calls = list(self.calls)
+            sections = list(self.sections)
+            files = list(self.files)
+
+        by_category: Dict[str, Dict[str, float]] = {}
+        for c in calls:
+            m = by_category.setdefault(c["category"], dict.fromkeys(
+                ("calls", "cache_hits", "failed", "retries", "seconds", "ttfb_seconds", "ttfb_count",
+                 "prompt_tokens", "cached_prompt_tokens", "completion_tokens", "accepted", "rejected"), 0))
+            if c["source"] == "cache":
+                m["cache_hits"] += 1
+                continue
+            m["calls"] += 1
+            m["failed"] += not c["ok"]
+            m["retries"] += c["retries"]
+            m["seconds"] += c["wall_ms"] / 1000
+            if c["ttfb_ms"] is not None:
+                m["ttfb_seconds"] += c["ttfb_ms"] / 1000
+                m["ttfb_count"] += 1
+            m["prompt_tokens"] += c["prompt_tokens"]
+            m["cached_prompt_tokens"] += c["cached_prompt_tokens"]
+            m["completion_tokens"] += c["completion_tokens"]
+        for s in sections:
+            m = by_category.setdefault(s["category"], {})
+            m["accepted"] = m.get("accepted", 0) + s["accepted"]
+            m["rejected"] = m.get("rejected", 0) + s["rejected"]
+
+        metrics = [
+            ("quizgen_calls_total", "counter", "LLM API calls", "calls"),
+            ("quizgen_cache_hits_total", "counter", "Responses replayed from the response cache", "cache_hits"),
+            ("quizgen_failed_calls_total", "counter", "LLM API calls that failed", "failed"),
+            ("quizgen_retries_total", "counter", "HTTP retries", "retries"),
+            ("quizgen_call_seconds_total", "counter", "Total LLM call wall time", "seconds"),
+            ("quizgen_ttfb_seconds_total", "counter", "Total time to first byte", "ttfb_seconds"),
+            ("quizgen_ttfb_calls_total", "counter", "Calls with a measured time to first byte", "ttfb_count"),
+            ("quizgen_prompt_tokens_total", "counter", "Prompt tokens reported by the API", "prompt_tokens"),
+            ("quizgen_cached_prompt_tokens_total", "counter", "Prompt tokens served from the provider's prompt cache",
+             "cached_prompt_tokens"),
+            ("quizgen_completion_tokens_total", "counter", "Completion tokens reported by the API",
+             "completion_tokens"),
+            ("quizgen_rows_accepted_total", "counter", "Quiz rows accepted by the parser", "accepted"),
+            ("quizgen_rows_rejected_total", "counter", "Quiz rows rejected by the parser", "rejected"),
+        ]
+        out = []
+        for name, kind, help_text, key in metrics:
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            for category, m in sorted(by_category.items()):
+                out.append(f'{name}{{category="{_label(category)}"}} {m.get(key, 0):g}')
+        out.append("# HELP quizgen_file_duration_seconds Wall time to generate one manifesto file")
+        out.append("# TYPE quizgen_file_duration_seconds gauge")
+        for f in files:
+            out.append(f'quizgen_file_duration_seconds{{file="{_label(f["file"])}"}} {f["wall_ms"] / 1000:g}')
+        out.append("# HELP quizgen_file_rows Quiz rows written for one manifesto file")
+        out.append("# TYPE quizgen_file_rows gauge")
+        for f in files:
+            out.append(f'quizgen_file_rows{{file="{_label(f["file"])}"}} {f["rows"]}')
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path: Optional[str] = None) -> Optional[str]:
+        """Write the Prometheus text file (for node_exporter's textfile collector); returns its path."""
+        path = path or self.prometheus_path
+        if not path:
+            return None
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+    def close(self) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.answer_stats import AnswerStatsStore
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class AnswerStatsStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "stats.sqlite3")
+        self.output = io.StringIO()
+        redirect = contextlib.redirect_stdout(self.output)
+        redirect.__enter__()
+        self.addCleanup(redirect.__exit__, None, None, None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self, **kwargs):
+        store = AnswerStatsStore(self.db_path, flush_interval=0.01, snapshot_interval=0.0, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_writer_survives_a_failed_snapshot_refresh(self):
+        store = self.store()
+        refresh = store._refresh_snapshot
+        failures = []
+
+        def flaky_refresh(connection):
+            if not failures:
+                failures.append(1)
+                raise sqlite3.OperationalError("database is locked")
+            refresh(connection)
+
+        store._refresh_snapshot = flaky_refresh
+        store.record("教育", "問1", 0, 0)
+        self.assertTrue(wait_for(lambda: failures and store.snapshot().category_accuracy("教育") == 1.0))
+        self.assertTrue(store._thread.is_alive())
+        self.assertIn("Failed to refresh answer statistics", self.output.getvalue())
+
+    def test_failed_write_is_retried(self):
+        store = self.store()
+        write = store._write
+        failures = []
+
+        def flaky_write(connection, batch):
+            if not failures:
+                failures.append(len(batch))
+                raise sqlite3.OperationalError("disk I/O error")
+            write(connection, batch)
+
+        store._write = flaky_write
+        store.record("教育", "問1", 0, 0)
+        store.record("教育", "問2", 1, 0)
+        self.assertTrue(wait_for(lambda: store.flushed == 2))
+        self.assertEqual(store.dropped, 0)
+        self.assertTrue(wait_for(lambda: store.snapshot().categories.get("教育") == (2, 1)))
+
+    def test_answers_beyond_max_pending_are_counted_as_dropped(self):
+        store = self.store(max_pending=3)
+        # Keep the writer from draining while the queue fills
+        store._closed.set()
+        store._thread.join()
+        for i in range(5):
+            store.record("教育", f"問{i}", 0, 0)
+        self.assertEqual((store.recorded, store.dropped), (3, 2))
+
+    def test_concurrent_records_are_all_counted(self):
+        store = self.store()
+        threads = [threading.Thread(target=lambda: [store.record("教育", "問1", 0, 0) for _ in range(500)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(store.recorded, 4000)
+        store.close()
+        self.assertEqual(store.flushed, 4000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import contextlib
+import io
+import json
+import socket
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.api import start_in_thread
+
+
+class EchoService:
+    """Replies with the request body length; /boom raises."""
+
+    def handle(self, method, path, query="", body=b""):
+        if path == "/boom":
+            raise RuntimeError("handler bug")
+        return 200, json.dumps({"length": len(body)}).encode('utf-8')
+
+
+class ServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.address = start_in_thread(EchoService(), max_body_bytes=16)
+
+    def request(self, head: str, body: bytes = b""):
+        with socket.create_connection(self.address, timeout=5) as sock:
+            sock.sendall(head.encode('latin-1') + b"\r\n" + body)
+            response = b""
+            while b"\r\n\r\n" not in response:
+                response += sock.recv(4096)
+            headers, _, payload = response.partition(b"\r\n\r\n")
+            length = int(headers.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            while len(payload) < length:
+                payload += sock.recv(4096)
+        return int(headers.split(b" ")[1]), json.loads(payload)
+
+    def post(self, length_header: str, body: bytes = b""):
+        return self.request(f"POST /score HTTP/1.1\r\nConnection: close\r\n{length_header}", body)
+
+    def test_valid_body(self):
+        self.assertEqual(self.post("Content-Length: 2\r\n", b"{}"), (200, {"length": 2}))
+
+    def test_get_without_content_length(self):
+        self.assertEqual(self.request("GET /quiz HTTP/1.1\r\nConnection: close\r\n"), (200, {"length": 0}))
+
+    def test_bad_content_length_is_400(self):
+        for header in ("", "Content-Length: abc\r\n", "Content-Length: -1\r\n", "Content-Length: +2\r\n",
+                       "Content-Length: \r\n"):
+            with self.subTest(header=header):
+                self.assertEqual(self.post(header)[0], 400)
+
+    def test_oversized_body_is_413(self):
+        self.assertEqual(self.post("Content-Length: 17\r\n")[0], 413)
+        self.assertEqual(self.post(f"Content-Length: {10 ** 30}\r\n")[0], 413)
+
+    def test_handler_error_is_json_500(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()):
+            status, payload = self.request("GET /boom HTTP/1.1\r\nConnection: close\r\n")
+        self.assertEqual((status, payload), (500, {"error": "internal server error"}))
+        self.assertIn("handler bug", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.bank_format import compile_bank
+from manifest_quiz.bank_reloader import BankReloader
+from manifest_quiz.question_bank import QuestionBank
+from manifest_quiz.search import SearchIndex
+
+from test_question_bank import quiz_rows, write_csv
+
+
+class BankReloaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, "combined.csv")
+        self.bank_path = os.path.join(self.tmp.name, "combined.qbank")
+        write_csv(self.csv_path, quiz_rows("旧"))
+        compile_bank(quiz_rows("旧"), self.bank_path, source_path=self.csv_path)
+        self.reloader = BankReloader(self.csv_path, self.bank_path, poll_interval=3600)
+
+    def tearDown(self):
+        self.reloader.stop()
+        self.tmp.cleanup()
+
+    def test_csv_only_rebuild_is_picked_up(self):
+        old = self.reloader.current()
+        self.assertEqual(old[0].question, "旧問題0")
+
+        write_csv(self.csv_path, quiz_rows("新"))
+        self.assertTrue(self.reloader.check())
+
+        new = self.reloader.current()
+        self.assertEqual(new[0].question, "新問題0")
+        self.assertNotEqual(new.version, old.version)
+        # The quiz started on the old bank can still finish on it
+        self.assertIs(self.reloader.get(old.version), old)
+
+    def test_reloaded_bank_is_swapped_in_with_its_search_index(self):
+        write_csv(self.csv_path, quiz_rows("新"))
+        with mock.patch("manifest_quiz.question_bank.SearchIndex", wraps=SearchIndex) as build_index:
+            self.assertTrue(self.reloader.check())
+            new = self.reloader.current()
+            # Built by check() before the swap (the poller may still be indexing the old bank)
+            self.assertEqual([call.args[0] for call in build_index.call_args_list].count(new), 1)
+            new.search("新問題0")
+            self.assertEqual([call.args[0] for call in build_index.call_args_list].count(new), 1)
+
+    def test_compiled_and_csv_banks_share_the_version(self):
+        self.assertEqual(QuestionBank.load(self.csv_path, self.bank_path).version,
+                         QuestionBank.load(self.csv_path).version)
+
+    def test_same_mtime_different_content_gets_a_new_version(self):
+        stat = os.stat(self.csv_path)
+        old = QuestionBank.load(self.csv_path)
+        write_csv(self.csv_path, quiz_rows("別"))
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertNotEqual(QuestionBank.load(self.csv_path).version, old.version)
+
+
+class SearchIndexWarmupTest(unittest.TestCase):
+    def test_loading_does_not_wait_for_the_search_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "combined.csv")
+            write_csv(csv_path, quiz_rows("旧"))
+            release = threading.Event()
+            built = threading.Event()
+
+            def slow_index(bank):
+                release.wait(5)
+                index = SearchIndex(bank)
+                built.set()
+                return index
+
+            with mock.patch("manifest_quiz.question_bank.SearchIndex", slow_index):
+                reloader = BankReloader(csv_path, poll_interval=3600)
+                try:
+                    # The constructor returned while the index build is still blocked
+                    self.assertFalse(built.is_set())
+                    release.set()
+                    self.assertTrue(built.wait(5))
+                    self.assertEqual(reloader.current().search("旧問題0")[0].id, 0)
+                finally:
+                    reloader.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
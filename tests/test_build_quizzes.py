@@ -0,0 +1,153 @@
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / "src"))
+sys.path.append(str(ROOT))
+
+from build_quizzes import build
+from combine_quizzes import combine_quiz_csvs
+from manifest_quiz.grounding import GroundingIndex
+from manifest_quiz.quiz_generator import QuizGenerator
+
+DOCUMENTS = {
+    "01_教育": "# 教育\n\nすべての子どもに専属のAI家庭教師を届けます。教員の事務負担をデジタル化で減らします。",
+    "02_医療": "# 医療\n\nオンライン診療を普及させ、通院のない通院を実現します。電子カルテの標準化を進めます。",
+}
+ROWS = {
+    "01_教育": [
+        ["教育", "すべての子どもに届けるとしているものは何ですか？", "専属のAI家庭教師", "紙の教科書", "塾の無償化", "留学", "1",
+         "AI家庭教師を届けます。"],
+        ["教育", "教員の負担をどう減らしますか？", "デジタル化で事務負担を減らす", "増員のみ", "授業を減らす", "何もしない", "1",
+         "事務負担をデジタル化で減らします。"],
+        ["教育", "宇宙開発の予算はいくらですか？", "100兆円", "1円", "10億円", "0円", "1", "宇宙港を建設します。"],
+    ],
+    "02_医療": [
+        ["医療", "すべての子どもに届けるとしているものは何ですか？", "専属のAI家庭教師", "紙の教科書", "塾の無償化", "留学", "1",
+         "AI家庭教師を届けます。"],
+        ["医療", "何を普及させて通院のない通院を実現しますか？", "オンライン診療", "往診", "病院の新設", "救急車", "1",
+         "オンライン診療を普及させます。"],
+    ],
+}
+
+
+def write_inputs(directory):
+    for stem, text in DOCUMENTS.items():
+        (directory / f"{stem}.md").write_text(text, encoding='utf-8')
+        with open(directory / f"quiz_{stem}.csv", 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["category", "question", "option1", "option2", "option3", "option4",
+                             "correct_answer", "explanation"])
+            writer.writerows(ROWS[stem])
+
+
+def read_rows(path):
+    with open(path, encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+class BuildMatchesCombineTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        write_inputs(self.dir)
+        self.grounding = GroundingIndex.load_or_build(str(self.dir), cache_path=None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return str(self.dir / name)
+
+    def test_incremental_build_gives_the_same_bank_as_a_full_combine(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            combine_quiz_csvs(self.path("quiz_*.csv"), self.path("combined.csv"), grounding=self.grounding,
+                              quarantine_file=self.path("quarantine_combine.csv"), dedupe_threshold=0.5)
+            ok = build(data_dir=self.tmp.name, csv_dir=self.tmp.name, combined_file=self.path("built.csv"),
+                       manifest_file=self.path("manifest.json"), grounding=self.grounding,
+                       quarantine_file=self.path("quarantine_build.csv"), dedupe_threshold=0.5)
+        self.assertTrue(ok)
+
+        combined = read_rows(self.path("combined.csv"))
+        self.assertEqual(read_rows(self.path("built.csv")), combined)
+        self.assertEqual(read_rows(self.path("quarantine_build.csv")),
+                         read_rows(self.path("quarantine_combine.csv")))
+        # The ungrounded row was quarantined and the cross-file duplicate dropped
+        questions = [row[1] for row in combined[1:]]
+        self.assertNotIn("宇宙開発の予算はいくらですか？", questions)
+        self.assertEqual(questions.count("すべての子どもに届けるとしているものは何ですか？"), 1)
+
+
+class RepeatBuildTest(unittest.TestCase):
+    GENERATION = {"pack_tokens": 2000, "section_tokens": 1500, "output_format": "csv", "prompt_version": 2}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        write_inputs(self.dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_build(self, generator=None):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            ok = build(data_dir=self.tmp.name, csv_dir=self.tmp.name, combined_file=str(self.dir / "built.csv"),
+                       manifest_file=str(self.dir / "manifest.json"), generator=generator,
+                       generation=self.GENERATION)
+        self.assertTrue(ok)
+        return output.getvalue()
+
+    def test_identical_runs_with_and_without_a_key_are_no_ops(self):
+        self.run_build()
+        manifest = (self.dir / "manifest.json").read_text(encoding='utf-8')
+        combined_mtime = os.stat(self.dir / "built.csv").st_mtime_ns
+
+        # Same settings, now with an API key: nothing may be sent to the LLM
+        generator = QuizGenerator("test-key", **self.GENERATION)
+        generator.generate_quizzes = lambda *args: self.fail("unchanged files were regenerated")
+        for run in (self.run_build, lambda: self.run_build(generator)):
+            output = run()
+            self.assertIn("regenerate: 0", output)
+            self.assertIn("is up to date", output)
+        self.assertEqual((self.dir / "manifest.json").read_text(encoding='utf-8'), manifest)
+        self.assertEqual(os.stat(self.dir / "built.csv").st_mtime_ns, combined_mtime)
+
+    def test_file_that_failed_after_a_settings_change_is_retried(self):
+        self.run_build()
+        packed = dict(self.GENERATION, pack_tokens=4000)
+        generator = QuizGenerator("test-key", **packed)
+        failing = str(self.dir / f"{sorted(DOCUMENTS)[0]}.md")
+        generator.generate_quizzes = lambda jobs, concurrency: {md: md != failing for md, _ in jobs}
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            ok = build(data_dir=self.tmp.name, csv_dir=self.tmp.name, combined_file=str(self.dir / "built.csv"),
+                       manifest_file=str(self.dir / "manifest.json"), generator=generator, generation=packed)
+        self.assertFalse(ok)
+        self.assertIn(f"regenerate: {len(DOCUMENTS)}", output.getvalue())
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            build(data_dir=self.tmp.name, csv_dir=self.tmp.name, combined_file=str(self.dir / "built.csv"),
+                  manifest_file=str(self.dir / "manifest.json"), dry_run=True, generation=packed)
+        self.assertIn("regenerate: 1", output.getvalue())
+        self.assertIn(Path(failing).name, output.getvalue())
+
+    def test_changed_generation_settings_regenerate_everything(self):
+        self.run_build()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            build(data_dir=self.tmp.name, csv_dir=self.tmp.name, combined_file=str(self.dir / "built.csv"),
+                  manifest_file=str(self.dir / "manifest.json"), dry_run=True,
+                  generation=dict(self.GENERATION, pack_tokens=0))
+        self.assertIn(f"regenerate: {len(DOCUMENTS)}", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.chunker import estimate_tokens, split_sections
+
+
+class SplitSectionsTest(unittest.TestCase):
+    def test_tiny_budget_with_long_heading_path_terminates(self):
+        headings = "\n".join(f"{'#' * level} {'見出し' * 10}{level}" for level in range(1, 6))
+        body = "本文です。" * 40
+        content = f"{headings}\n\n{body}\n\n{body}\n"
+
+        sections = split_sections(content, "doc", max_tokens=5)
+
+        self.assertTrue(sections)
+        text = "".join(section.text for section in sections)
+        self.assertEqual(text.count("本文です。"), 80)
+        for section in sections:
+            self.assertLessEqual(estimate_tokens(section.text), 5)
+
+    def test_zero_budget_terminates(self):
+        sections = split_sections("# タイトル\n\n" + "あ" * 20, "doc", max_tokens=0)
+        self.assertIn("あ", "".join(section.text for section in sections))
+
+    def test_heading_context_kept_when_it_fits(self):
+        content = "# 大見出し\n\n## 小見出し\n\n" + "\n\n".join("段落" * 30 for _ in range(5))
+        sections = split_sections(content, "doc", max_tokens=100)
+        self.assertGreater(len(sections), 1)
+        self.assertTrue(all("# 大見出し" in section.context for section in sections[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
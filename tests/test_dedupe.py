@@ -0,0 +1,38 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.dedupe import find_near_duplicates, jaccard
+from manifest_quiz.grounding import char_ngrams
+
+
+class FindNearDuplicatesTest(unittest.TestCase):
+    def test_chain_does_not_drop_rows_below_threshold_to_the_kept_row(self):
+        # A~B and B~C are above the threshold, A~C is not
+        texts = ["abcdefgh", "cdefghij", "efghijkl"]
+        a, b, c = (char_ngrams(text) for text in texts)
+        self.assertGreaterEqual(jaccard(a, b), 0.5)
+        self.assertGreaterEqual(jaccard(b, c), 0.5)
+        self.assertLess(jaccard(a, c), 0.5)
+
+        clusters = find_near_duplicates(texts, 0.5)
+
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0].keep, 0)
+        self.assertEqual([i for i, _ in clusters[0].duplicates], [1])
+
+    def test_every_dropped_row_is_within_threshold_of_its_kept_row(self):
+        texts = ["abcdefgh", "cdefghij", "efghijkl", "abcdefgh", "ghijklmn"]
+        for cluster in find_near_duplicates(texts, 0.5):
+            for i, similarity in cluster.duplicates:
+                self.assertGreaterEqual(similarity, 0.5)
+                self.assertEqual(similarity, jaccard(char_ngrams(texts[cluster.keep]), char_ngrams(texts[i])))
+
+    def test_distinct_texts_are_kept(self):
+        self.assertEqual(find_near_duplicates(["教育のデジタル化", "エネルギー政策の転換"], 0.5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.http_client import RetryingHTTPClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.ok = status_code < 400
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def post(self, *args, **kwargs):
+        return self.responses.pop(0)
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.acquired = []
+        self.paused = []
+
+    def acquire(self, tokens=0):
+        self.acquired.append(tokens)
+
+    def pause(self, seconds):
+        self.paused.append(seconds)
+
+
+class RetryRateLimitTest(unittest.TestCase):
+    def client(self, responses, limiter):
+        client = RetryingHTTPClient(max_retries=3, backoff_base=0.01, rate_limiter=limiter)
+        client.session = FakeSession(responses)
+        return client
+
+    def test_every_attempt_acquires_the_limiter(self):
+        limiter = RecordingLimiter()
+        client = self.client([FakeResponse(503), FakeResponse(429), FakeResponse(200)], limiter)
+        call = {}
+        with mock.patch("manifest_quiz.http_client.time.sleep"):
+            response = client.post("http://example.invalid", {}, {}, call, tokens=1234)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(limiter.acquired, [1234, 1234, 1234])
+        self.assertEqual(call["retries"], 2)
+
+    def test_429_pauses_and_sleeps_for_the_same_delay(self):
+        limiter = RecordingLimiter()
+        client = self.client([FakeResponse(429), FakeResponse(200)], limiter)
+        with mock.patch("manifest_quiz.http_client.time.sleep") as sleep:
+            client.post("http://example.invalid", {}, {})
+        self.assertEqual(len(limiter.paused), 1)
+        sleep.assert_called_once_with(limiter.paused[0])
+
+    def test_retry_after_is_honored_when_larger(self):
+        limiter = RecordingLimiter()
+        client = self.client([FakeResponse(429, {"Retry-After": "7"}), FakeResponse(200)], limiter)
+        with mock.patch("manifest_quiz.http_client.time.sleep") as sleep:
+            client.post("http://example.invalid", {}, {})
+        self.assertEqual(limiter.paused, [7.0])
+        sleep.assert_called_once_with(7.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
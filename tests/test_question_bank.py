@@ -0,0 +1,83 @@
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.bank_format import BankFormatError, MappedBank, compile_bank
+from manifest_quiz.question_bank import QuestionBank, _MappedQuestions
+
+
+def quiz_rows(prefix):
+    return [["ステップ１教育", f"{prefix}問題{i}", "A", "B", "C", "D", "1", "解説"] for i in range(3)]
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["category", "question", "option1", "option2", "option3", "option4", "correct_answer",
+                         "explanation"])
+        writer.writerows(rows)
+
+
+class CompiledBankFreshnessTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, "combined.csv")
+        self.bank_path = os.path.join(self.tmp.name, "combined.qbank")
+        write_csv(self.csv_path, quiz_rows("旧"))
+        compile_bank(quiz_rows("旧"), self.bank_path, source_path=self.csv_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compiled_bank_used_when_built_from_current_csv(self):
+        bank = QuestionBank.load(self.csv_path, self.bank_path)
+        self.assertIsInstance(bank._questions, _MappedQuestions)
+
+    def test_stale_compiled_bank_falls_back_to_csv(self):
+        write_csv(self.csv_path, quiz_rows("新") + quiz_rows("追加"))
+        bank = QuestionBank.load(self.csv_path, self.bank_path)
+        self.assertNotIsInstance(bank._questions, _MappedQuestions)
+        self.assertEqual(len(bank), 6)
+        self.assertEqual(bank[0].question, "新問題0")
+
+    def test_touched_csv_with_same_content_is_still_current(self):
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(MappedBank(self.bank_path).built_from(self.csv_path))
+
+
+    def test_empty_or_truncated_compiled_bank_falls_back_to_csv(self):
+        with open(self.bank_path, 'rb') as f:
+            data = f.read()
+        for size in (0, 16, len(data) // 2, len(data) - 1):
+            with self.subTest(size=size):
+                with open(self.bank_path, 'wb') as f:
+                    f.write(data[:size])
+                with self.assertRaises(BankFormatError):
+                    MappedBank(self.bank_path)
+                with contextlib.redirect_stdout(io.StringIO()) as out:
+                    bank = QuestionBank.load(self.csv_path, self.bank_path)
+                self.assertNotIsInstance(bank._questions, _MappedQuestions)
+                self.assertEqual(bank[0].question, "旧問題0")
+                self.assertIn("unusable", out.getvalue())
+
+    def test_checksum_is_only_read_when_asked(self):
+        with open(self.bank_path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+        self.assertFalse(MappedBank(self.bank_path).verify())
+        with self.assertRaises(BankFormatError):
+            MappedBank(self.bank_path, verify=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from manifest_quiz.chunker import Section
+from manifest_quiz.quiz_generator import QuizGenerator, _PackedDocument
+from manifest_quiz.response_cache import ResponseCache
+
+CONTENT = "ステップ１教育,問題文,A,B,C,D,1,解説\n"
+
+
+class FakeHTTP:
+    """Answers every request with one canned chat completion."""
+
+    def __init__(self, finish_reason, content=CONTENT):
+        self.finish_reason = finish_reason
+        self.content = content
+        self.calls = 0
+
+    def post_json(self, url, headers, payload, call_info=None, tokens=0):
+        self.calls += 1
+        return {"choices": [{"message": {"content": self.content}, "finish_reason": self.finish_reason}]}
+
+    def post(self, url, headers, payload, call_info=None, tokens=0, stream=False):
+        self.calls += 1
+        return FakeStream(self.finish_reason)
+
+
+class FakeStream:
+    def __init__(self, finish_reason):
+        self.lines = [
+            "data: " + json.dumps({"choices": [{"delta": {"content": CONTENT}, "finish_reason": None}]}),
+            "data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": finish_reason}]}),
+            "data: [DONE]",
+        ]
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        return (line.encode('utf-8') for line in self.lines)
+
+    def close(self):
+        pass
+
+
+class ResponseCachingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name)
+        self.messages = [{"role": "user", "content": "クイズを作成してください"}]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generator(self, finish_reason, stream=False):
+        generator = QuizGenerator("test-key", cache=self.cache, stream=stream)
+        generator.http = FakeHTTP(finish_reason)
+        return generator
+
+    def complete_twice(self, finish_reason, stream=False):
+        generator = self.generator(finish_reason, stream)
+        on_line = (lambda line: None) if stream else None
+        for _ in range(2):
+            generator._complete(self.messages, "ステップ１教育", on_line)
+        return generator.http.calls
+
+    def test_complete_response_is_cached(self):
+        self.assertEqual(self.complete_twice("stop"), 1)
+
+    def test_truncated_response_is_not_cached(self):
+        self.assertEqual(self.complete_twice("length"), 2)
+
+    def test_truncated_stream_is_not_cached(self):
+        self.assertEqual(self.complete_twice("length", stream=True), 2)
+
+    def test_filtered_stream_is_not_cached(self):
+        self.assertEqual(self.complete_twice("content_filter", stream=True), 2)
+
+
+class PackedCachePurgeTest(unittest.TestCase):
+    CATEGORIES = ["ステップ１教育", "ステップ１医療", "ステップ１子育て"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmp.name, "cache"))
+        self.documents = []
+        for i, category in enumerate(self.CATEGORIES):
+            md_file = os.path.join(self.tmp.name, f"1{i}_{category}.md")
+            self.documents.append(_PackedDocument(md_file, os.path.join(self.tmp.name, f"quiz_{i}.csv"), category,
+                                                  Section(f"s{i}", category, "", f"{category}の本文")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate_pack(self):
+        generator = QuizGenerator("test-key", cache=self.cache, pack_tokens=2000)
+        generator.http = FakeHTTP("stop", "".join(f"{c},問題文,A,B,C,D,1,解説\n" for c in self.CATEGORIES))
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = generator.generate_pack(self.documents)
+        self.assertTrue(all(results.values()))
+        return generator.http.calls
+
+    def test_purging_one_category_drops_the_pack_containing_it(self):
+        self.assertEqual(self.generate_pack(), 1)
+        self.assertEqual(self.generate_pack(), 0)
+        self.assertEqual(self.cache.purge_category("ステップ１医療"), 1)
+        self.assertEqual(self.generate_pack(), 1)
+
+
+class OptionsTest(unittest.TestCase):
+    def test_stream_with_json_output_is_rejected(self):
+        with self.assertRaises(ValueError):
+            QuizGenerator("test-key", stream=True, output_format="json")
+
+
+if __name__ == "__main__":
+    unittest.main()